@@ -0,0 +1,384 @@
+import math
+import os
+import time
+from collections import OrderedDict, deque
+import numpy as np
+import events
+import jobs
+from physics_object import Vector3
+
+
+# Rough per-entity cost of the Python objects (Crop/Building, body handles,
+# registry and spatial-index entries) on top of the columnar chunk arrays
+ENTITY_OVERHEAD_BYTES = 1024
+
+
+def chunk_key(x, z, chunk_size):
+    """Grid coordinate of the chunk containing world point (x, z)."""
+    return (math.floor(x / chunk_size), math.floor(z / chunk_size))
+
+
+class ChunkData:
+    """Columnar state of one chunk: crops and buildings as parallel arrays."""
+
+    CROP_COLUMNS = {
+        'crop_positions': (np.float32, (3,)),
+        'crop_elapsed': (np.float64, ()),
+        'crop_last_stage_update': (np.int64, ()),
+        'crop_stages': (np.int8, ()),
+        'crop_thresholds': (np.float32, ()),
+    }
+    BUILDING_COLUMNS = {
+        'building_positions': (np.float64, (3,)),
+        'building_sizes': (np.float64, (3,)),
+        'building_wall_textures': (np.str_, ()),
+        'building_roof_textures': (np.str_, ()),
+    }
+
+    def __init__(self, **columns):
+        for name, (dtype, shape) in {**self.CROP_COLUMNS, **self.BUILDING_COLUMNS}.items():
+            value = columns.get(name)
+            if value is None:
+                value = np.empty((0,) + shape, dtype=dtype)
+            setattr(self, name, np.asarray(value, dtype=dtype))
+
+    @classmethod
+    def empty(cls):
+        return cls()
+
+    @property
+    def crop_count(self):
+        return len(self.crop_positions)
+
+    @property
+    def building_count(self):
+        return len(self.building_positions)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.column_names())
+
+    def column_names(self):
+        return tuple(self.CROP_COLUMNS) + tuple(self.BUILDING_COLUMNS)
+
+    def columns(self):
+        return {name: getattr(self, name) for name in self.column_names()}
+
+    @classmethod
+    def concatenate(cls, parts):
+        """One ChunkData holding the rows of all parts, in order."""
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        return cls(**{name: np.concatenate([getattr(part, name) for part in parts])
+                      for name in parts[0].column_names()})
+
+    def take(self, crop_rows, building_rows):
+        """New ChunkData with the selected crop and building rows."""
+        columns = {name: getattr(self, name)[crop_rows] for name in self.CROP_COLUMNS}
+        columns.update({name: getattr(self, name)[building_rows] for name in self.BUILDING_COLUMNS})
+        return ChunkData(**columns)
+
+    @classmethod
+    def from_entities(cls, crops, buildings):
+        """Snapshot live Crop and Building objects (reads the CropField arrays)."""
+        columns = {}
+        if crops:
+            field = crops[0].field
+            indices = np.array([crop.index for crop in crops], dtype=np.intp)
+            columns['crop_positions'] = [(c.position.x, c.position.y, c.position.z) for c in crops]
+            columns['crop_elapsed'] = field.elapsed_of(indices)
+            columns['crop_last_stage_update'] = field.last_stage_update[indices]
+            columns['crop_stages'] = field.stages[indices]
+            columns['crop_thresholds'] = field.thresholds[indices]
+        if buildings:
+            columns['building_positions'] = [(b.position.x, b.position.y, b.position.z) for b in buildings]
+            columns['building_sizes'] = [(b.width, b.height, b.depth) for b in buildings]
+            columns['building_wall_textures'] = [getattr(b, 'wall_texture', None) or '' for b in buildings]
+            columns['building_roof_textures'] = [getattr(b, 'roof_texture', None) or '' for b in buildings]
+        return cls(**columns)
+
+    def create_entities(self, load_textures=True):
+        """Instantiate Crop and Building objects from the columns (main thread only)."""
+        from crop import Crop
+        from building import Building
+
+        crops = []
+        for position, threshold in zip(self.crop_positions.tolist(), self.crop_thresholds.tolist()):
+            crops.append(Crop(Vector3(*position), threshold=threshold))
+        if crops:
+            field = crops[0].field
+            field.set_state([crop.index for crop in crops], self.crop_elapsed,
+                            self.crop_last_stage_update, self.crop_stages)
+
+        buildings = []
+        for position, size, wall, roof in zip(self.building_positions.tolist(), self.building_sizes.tolist(),
+                                              self.building_wall_textures.tolist(),
+                                              self.building_roof_textures.tolist()):
+            buildings.append(Building(
+                Vector3(*position), *size,
+                wall_texture=(wall or None) if load_textures else None,
+                roof_texture=(roof or None) if load_textures else None
+            ))
+        return crops, buildings
+
+
+class ChunkStore:
+    """One uncompressed .npz file of ChunkData columns per chunk in a directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"chunk_{key[0]}_{key[1]}.npz")
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def keys(self):
+        """Keys of every chunk saved in the directory."""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith('chunk_') and name.endswith('.npz'):
+                x, z = name[len('chunk_'):-len('.npz')].split('_')
+                found.append((int(x), int(z)))
+        return found
+
+    def load(self, key):
+        """ChunkData for key, or None if the chunk was never saved."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as archive:
+            return ChunkData(**{name: archive[name] for name in archive.files})
+
+    def save(self, key, data):
+        # Write to a temporary file first so a crash never leaves half a chunk
+        path = self.path(key)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, **data.columns())
+        os.replace(temporary, path)
+
+
+class Chunk:
+    """A resident chunk and its estimated memory footprint."""
+
+    def __init__(self, key, data_bytes, entity_count):
+        self.key = key
+        self.data_bytes = data_bytes
+        self.entity_count = entity_count
+
+    @property
+    def nbytes(self):
+        return self.data_bytes + self.entity_count * ENTITY_OVERHEAD_BYTES
+
+
+class ChunkManager:
+    """Streams fixed-size chunks of crops and buildings around the player.
+
+    update() requests every chunk within `load_radius` chunks of the player.
+    Jobs on `job_system` read (or generate) their ChunkData, nearest chunks
+    first; the main thread then creates the entities and hands them to
+    `attach`. Loads of chunks the player has moved away from are cancelled.
+    When the resident chunks exceed `memory_budget` bytes, the least
+    recently used chunks outside the load radius are snapshotted, written
+    back by a job and their entities passed to `detach`.
+
+    At most one job touches a chunk's file at a time: a chunk evicted again
+    while its previous save is still running is saved after it, and a chunk
+    requested while its save is in flight is rebuilt from the snapshot
+    being saved instead of the file.
+
+    Chunk membership is decided by position: at eviction every crop or
+    building whose center lies in the chunk (found through `spatial_index`)
+    is saved with it, including ones planted since it was loaded.
+    """
+
+    def __init__(self, store, attach, detach, spatial_index, chunk_size=32.0,
+                 load_radius=2, memory_budget=64 * 1024 * 1024, generator=None,
+                 load_textures=True, job_system=None):
+        self.store = store
+        self.attach = attach
+        self.detach = detach
+        self.spatial_index = spatial_index
+        self.chunk_size = chunk_size
+        self.load_radius = load_radius
+        self.memory_budget = memory_budget
+        self.generator = generator      # key -> ChunkData for chunks never saved
+        self.load_textures = load_textures
+
+        self.job_system = job_system if job_system is not None else jobs.job_system
+
+        self.resident = OrderedDict()   # key -> Chunk, least recently used first
+        self.pending = {}               # key -> request time
+        self.loading = {}               # key -> load Job
+        self.saving = {}                # key -> save Job
+        self.unsaved = {}               # key -> latest snapshot not yet on disk
+        self.completed = deque()        # (key, data, request time) ready to attach
+
+        self.load_latencies = deque(maxlen=256)
+        self.loads = 0
+        self.evictions = 0
+        self.cancelled_loads = 0
+
+    # --------------------
+    # Jobs: disk I/O and generation only, no game objects
+    # --------------------
+    def read_chunk(self, key):
+        data = self.store.load(key)
+        if data is None and self.generator:
+            data = self.generator(key)
+        return data if data is not None else ChunkData.empty()
+
+    def request_load(self, key, ring):
+        requested_at = self.pending[key] = time.perf_counter()
+        snapshot = self.unsaved.get(key)
+        if snapshot is not None:
+            self.completed.append((key, snapshot, requested_at))
+            return
+        self.loading[key] = self.job_system.submit(
+            self.read_chunk, key, priority=jobs.NORMAL + ring,
+            on_complete=lambda job: self.finish_load(key, job, requested_at))
+
+    def finish_load(self, key, job, requested_at):
+        self.loading.pop(key, None)
+        data = job.value
+        if job.error is not None:
+            events.bus.log(f"Chunk load failed for {key}: {job.error}", events.ERROR)
+            data = ChunkData.empty()
+        self.completed.append((key, data, requested_at))
+
+    def request_save(self, key, data):
+        self.unsaved[key] = data
+        if key not in self.saving:
+            self.saving[key] = self.job_system.submit(
+                self.store.save, key, data, priority=jobs.LOW,
+                on_complete=lambda job: self.finish_save(key, data, job))
+
+    def finish_save(self, key, data, job):
+        del self.saving[key]
+        if job.error is not None:
+            events.bus.log(f"Chunk save failed for {key}: {job.error}", events.ERROR)
+        latest = self.unsaved.get(key)
+        if latest is data:
+            del self.unsaved[key]
+        elif latest is not None:
+            self.request_save(key, latest)  # evicted again meanwhile
+
+    # --------------------
+    # Main thread
+    # --------------------
+    def wanted_keys(self, x, z):
+        cx, cz = chunk_key(x, z, self.chunk_size)
+        r = self.load_radius
+        return {(cx + dx, cz + dz) for dx in range(-r, r + 1) for dz in range(-r, r + 1)}
+
+    def update(self, position):
+        """Apply finished loads, request missing chunks and evict over budget."""
+        wanted = self.wanted_keys(position.x, position.z)
+        self.apply_completed(wanted)
+
+        for key in list(self.loading):
+            if key not in wanted and self.loading[key].cancel():
+                del self.loading[key]
+                self.pending.pop(key, None)
+                self.cancelled_loads += 1
+
+        cx, cz = chunk_key(position.x, position.z, self.chunk_size)
+        for key in wanted:
+            if key in self.resident:
+                self.resident.move_to_end(key)
+            elif key not in self.pending:
+                self.request_load(key, max(abs(key[0] - cx), abs(key[1] - cz)))
+
+        self.evict_over_budget(wanted)
+
+    def apply_completed(self, wanted=None):
+        while self.completed:
+            key, data, requested_at = self.completed.popleft()
+            self.pending.pop(key, None)
+            if key in self.resident or (wanted is not None and key not in wanted):
+                continue    # player moved on; the data stays on disk
+            crops, buildings = data.create_entities(self.load_textures)
+            self.attach(crops + buildings)
+            self.resident[key] = Chunk(key, data.nbytes, len(crops) + len(buildings))
+            self.load_latencies.append(time.perf_counter() - requested_at)
+            self.loads += 1
+
+    @property
+    def resident_bytes(self):
+        return sum(chunk.nbytes for chunk in self.resident.values())
+
+    def evict_over_budget(self, keep):
+        total = self.resident_bytes
+        for key in list(self.resident):
+            if total <= self.memory_budget:
+                break
+            if key in keep:
+                continue
+            total -= self.resident[key].nbytes
+            self.evict(key)
+
+    def chunk_entities(self, key):
+        """Crops and buildings whose center lies in the chunk."""
+        size = self.chunk_size
+        min_x, min_z = key[0] * size, key[1] * size
+
+        def in_chunk(entity):
+            return ((hasattr(entity, 'crop_type') or hasattr(entity, 'building_type')) and
+                    chunk_key(entity.position.x, entity.position.z, size) == key)
+
+        found = self.spatial_index.query_aabb(min_x, min_z, min_x + size, min_z + size, in_chunk)
+        crops = [e for e in found if hasattr(e, 'crop_type')]
+        buildings = [e for e in found if hasattr(e, 'building_type')]
+        return crops, buildings
+
+    def evict(self, key):
+        """Snapshot a chunk, queue it for writing and remove its entities."""
+        crops, buildings = self.chunk_entities(key)
+        data = ChunkData.from_entities(crops, buildings)
+        self.request_save(key, data)
+        self.detach(crops + buildings)
+        del self.resident[key]
+        self.evictions += 1
+
+    def wait_saves(self):
+        """Block until every evicted chunk is on disk."""
+        while self.saving:
+            self.job_system.wait(list(self.saving.values()))
+
+    def flush(self):
+        """Evict every resident chunk and wait until everything is on disk."""
+        for key in list(self.resident):
+            self.evict(key)
+        self.wait_saves()
+
+    def wait_idle(self):
+        """Block until queued I/O is done, then apply the finished loads."""
+        while self.loading or self.saving:
+            self.job_system.wait(list(self.loading.values()) + list(self.saving.values()))
+        self.apply_completed()
+
+    def shutdown(self):
+        for job in self.loading.values():
+            job.cancel()
+        self.loading = {}
+        self.pending = {}
+        self.flush()
+
+    def metrics(self):
+        latencies = list(self.load_latencies)
+        return {
+            'resident_chunks': len(self.resident),
+            'resident_bytes': self.resident_bytes,
+            'memory_budget': self.memory_budget,
+            'pending_loads': len(self.pending),
+            'pending_saves': len(self.saving),
+            'loads': self.loads,
+            'cancelled_loads': self.cancelled_loads,
+            'evictions': self.evictions,
+            'load_latency_ms_avg': 1000.0 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'load_latency_ms_max': 1000.0 * max(latencies) if latencies else 0.0,
+        }
@@ -0,0 +1,196 @@
+import numpy as np
+from physics_object import PhysicsObject
+
+
+AXIS_NAMES = ('x', 'y', 'z')
+
+
+def body_bounds(bodies):
+    """(N, 3) min and max corners of each body's axis-aligned box."""
+    n = len(bodies)
+    centers = np.empty((n, 3), dtype=np.float64)
+    half = np.empty((n, 3), dtype=np.float64)
+    for i, body in enumerate(bodies):
+        p = body.position
+        centers[i] = (p.x, p.y, p.z)
+        half[i] = (body.width, body.height, body.depth)
+    half *= 0.5
+    return centers - half, centers + half
+
+
+class BoundsLayout:
+    """Gathers body AABBs, reading PhysicsWorld bodies straight from its arrays."""
+
+    def __init__(self, bodies):
+        self.world = None
+        world_rows, body_indices, others = [], [], []
+        for i, body in enumerate(bodies):
+            world = getattr(body, 'physics_world', None)
+            if world is not None and (self.world is None or world is self.world):
+                self.world = world
+                world_rows.append(i)
+                body_indices.append(body.body_index)
+            else:
+                others.append(i)
+        self.world_rows = np.array(world_rows, dtype=np.intp)
+        self.body_indices = np.array(body_indices, dtype=np.intp)
+        self.others = others
+        self.count = len(bodies)
+
+    def bounds(self, bodies):
+        mins = np.empty((self.count, 3), dtype=np.float64)
+        maxs = np.empty((self.count, 3), dtype=np.float64)
+        if len(self.world_rows):
+            centers = self.world.positions[self.body_indices]
+            half = self.world.sizes[self.body_indices] * 0.5
+            mins[self.world_rows] = centers - half
+            maxs[self.world_rows] = centers + half
+        if self.others:
+            other_mins, other_maxs = body_bounds([bodies[i] for i in self.others])
+            mins[self.others] = other_mins
+            maxs[self.others] = other_maxs
+        return mins, maxs
+
+
+def sweep_and_prune(mins, maxs):
+    """Candidate overlapping pairs (i, j) with i != j, as two index arrays.
+
+    Boxes are sorted along X; every box is paired with the boxes whose X
+    interval starts before its own ends, then pairs that are separated on
+    Y or Z are dropped.
+    """
+    n = len(mins)
+    if n < 2:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    order = np.argsort(mins[:, 0], kind='stable')
+    sorted_min = mins[order, 0]
+    sorted_max = maxs[order, 0]
+
+    starts = np.arange(1, n + 1)
+    ends = np.searchsorted(sorted_min, sorted_max, side='left')
+    counts = np.maximum(ends - starts, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    first = np.repeat(np.arange(n), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = np.repeat(starts, counts) + offsets
+    i = order[first]
+    j = order[second]
+
+    overlap = ((mins[i, 1] < maxs[j, 1]) & (maxs[i, 1] > mins[j, 1]) &
+               (mins[i, 2] < maxs[j, 2]) & (maxs[i, 2] > mins[j, 2]))
+    return i[overlap], j[overlap]
+
+
+class CollisionSystem:
+    """Broad phase (sweep and prune) + AABB narrow phase + penetration resolution.
+
+    Bodies need position/width/height/depth; `collidable` (default True) and
+    `static` (default False) are read if present. Static bodies are never
+    pushed. `axes` limits which axes penetrations are resolved along.
+    """
+
+    def __init__(self, axes=(0, 1, 2)):
+        self.axes = axes
+        self.bodies = []
+        self.layout = None       # cached BoundsLayout, rebuilt when bodies change
+        self.static = None
+        self.pair_count = 0      # broad-phase candidates last step
+        self.contact_count = 0   # confirmed contacts last step
+
+    def add(self, body):
+        if getattr(body, 'collidable', True):
+            self.bodies.append(body)
+            self.layout = None
+
+    def remove(self, body):
+        if body in self.bodies:
+            self.bodies.remove(body)
+            self.layout = None
+
+    def remove_many(self, bodies):
+        doomed = set(bodies)
+        self.bodies = [body for body in self.bodies if body not in doomed]
+        self.layout = None
+
+    def clear(self):
+        self.bodies = []
+        self.layout = None
+
+    def find_pairs(self):
+        """Broad phase: candidate pairs of bodies, at least one of them dynamic."""
+        bodies = self.bodies
+        if self.layout is None:
+            self.layout = BoundsLayout(bodies)
+            self.static = np.fromiter((getattr(b, 'static', False) for b in bodies),
+                                      dtype=bool, count=len(bodies))
+        mins, maxs = self.layout.bounds(bodies)
+        i, j = sweep_and_prune(mins, maxs)
+        keep = ~(self.static[i] & self.static[j])
+        return [(bodies[a], bodies[b]) for a, b in zip(i[keep].tolist(), j[keep].tolist())]
+
+    def step(self):
+        """Detect and resolve all contacts. Returns the list of colliding pairs."""
+        pairs = self.find_pairs()
+        self.pair_count = len(pairs)
+
+        contacts = []
+        for a, b in pairs:
+            if PhysicsObject.check_collision(a, b):
+                self.resolve(a, b)
+                contacts.append((a, b))
+                if hasattr(a, 'handle_collision'):
+                    a.handle_collision(b)
+                if hasattr(b, 'handle_collision'):
+                    b.handle_collision(a)
+        self.contact_count = len(contacts)
+        return contacts
+
+    def resolve(self, a, b):
+        """Separate two overlapping boxes along the axis of least penetration."""
+        a_static = getattr(a, 'static', False)
+        b_static = getattr(b, 'static', False)
+        if a_static and b_static:
+            return
+
+        a_size = (a.width, a.height, a.depth)
+        b_size = (b.width, b.height, b.depth)
+        best_axis, best_push = None, None
+        for axis in self.axes:
+            name = AXIS_NAMES[axis]
+            a_center = getattr(a.position, name)
+            b_center = getattr(b.position, name)
+            overlap = (a_size[axis] + b_size[axis]) / 2 - abs(a_center - b_center)
+            if overlap <= 0:
+                return
+            if best_push is None or overlap < abs(best_push):
+                best_axis = name
+                best_push = overlap if a_center >= b_center else -overlap
+
+        if best_axis is None:
+            return
+
+        if b_static:
+            self.push(a, best_axis, best_push)
+        elif a_static:
+            self.push(b, best_axis, -best_push)
+        else:
+            self.push(a, best_axis, best_push / 2)
+            self.push(b, best_axis, -best_push / 2)
+
+    @staticmethod
+    def push(body, axis, amount):
+        """Move a body and cancel its velocity into the contact."""
+        setattr(body.position, axis, getattr(body.position, axis) + amount)
+        velocity = getattr(body, 'velocity', None)
+        if velocity is not None:
+            v = getattr(velocity, axis)
+            if v * amount < 0:
+                setattr(velocity, axis, 0.0)
+        if getattr(body, 'spatial_index', None) is not None:
+            body.spatial_index.move(body)
@@ -1,89 +1,96 @@
-import time
+import crop_field
+import events
 from physics_object import PhysicsObject, Vector3
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from physics_object import PhysicsObject, Vector3
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
-
-
-
+from mesh import get_mesh, build_sphere
+from OpenGL.GL import glColor3f, glPopMatrix, glPushMatrix, glScalef, glTranslatef
 
 
 class Crop(PhysicsObject):
+    """A single crop: a thin view over its slot in a CropField.
+
+    Growth is advanced for the whole field at once by CropField.step();
+    growth_stage, color, height and threshold read and write the field arrays.
+    """
+    crop_type = 'wheat'
     
-    def __init__(self, position, width=1.0, height=1.0, depth=1.0, threshold=5):
+    def __init__(self, position, width=1.0, height=1.0, depth=1.0, threshold=5, field=None):
+        self.field = field if field is not None else crop_field.default_field
+        self.index = self.field.add(position, threshold)
         super().__init__(position, Vector3(0, 0, 0), width, height, depth)
         self.growth_stage = 0  # 0 = seed, 1 = sprout, 2 = grown
         self.color = (0.6, 0.4, 0.2)  # Brown seed
         self.threshold = threshold
-        # Timer initialization
-        self.start_time = time.perf_counter()
-        self.last_second_printed = 0
-        self.last_stage_update = 0
-        
-        print(f"Crop created at position {position}")
-        print(f"Timer started: 0 seconds")
-
-    def update(self, delta_time):
-        self.update_timer()
-        return super().update(delta_time)
-
-    def update_timer(self):
-        """Update crop timer and handle growth stages."""
-        current_time = time.perf_counter()
-        elapsed_time = current_time - self.start_time
-        elapsed_seconds = int(elapsed_time)
-        
-        # Print elapsed time every second
-        if elapsed_seconds > self.last_second_printed:
-            self.last_second_printed = elapsed_seconds
-            print(f"Crop elapsed time: {elapsed_seconds} seconds")
-        
-        # Update stage every threshold time
-        stage_check = elapsed_seconds // self.threshold  
-        if stage_check > self.last_stage_update:
-            self.last_stage_update = stage_check
-            self.grow()
-            print(f"Crop stage updated after {elapsed_seconds} seconds - Stage: {self.growth_stage}")
+        self.collidable = False  # The player walks through the field
+        self.dynamic = False
+
+        if events.bus.wants(events.CropPlanted):
+            events.bus.emit(events.CropPlanted(self.index, (position.x, position.y, position.z)))
+
+    @property
+    def growth_stage(self):
+        return int(self.field.stages[self.index])
+
+    @growth_stage.setter
+    def growth_stage(self, stage):
+        self.field.stages[self.index] = stage
+        self.field.mark_dirty(self.index)
+
+    @property
+    def color(self):
+        return tuple(self.field.colors[self.index].tolist())
+
+    @color.setter
+    def color(self, color):
+        self.field.colors[self.index] = color
+        self.field.mark_dirty(self.index)
+
+    @property
+    def height(self):
+        return float(self.field.heights[self.index])
+
+    @height.setter
+    def height(self, height):
+        self.field.heights[self.index] = height
+        self.field.mark_dirty(self.index)
+
+    @property
+    def threshold(self):
+        return float(self.field.thresholds[self.index])
+
+    @threshold.setter
+    def threshold(self, threshold):
+        self.field.thresholds[self.index] = threshold
+
+    @property
+    def last_stage_update(self):
+        return int(self.field.last_stage_update[self.index])
+
+    def is_mature(self):
+        """Whether the crop is ready for harvest."""
+        return self.growth_stage >= crop_field.MAX_STAGE
 
     def grow(self):
         """Advance growth stage and update appearance."""
-        if self.growth_stage < 2:
-            self.growth_stage += 1
-
-        if self.growth_stage == 1:
-            self.color = (0.2, 0.8, 0.2)  # Green sprout
-            self.height = 2.0
-            print("Crop grew to sprout stage!")
-        elif self.growth_stage == 2:
-            self.color = (1.0, 1.0, 0.0)  # Yellow harvest-ready
-            self.height = 3.0
-            print("Crop is ready for harvest!")
+        self.field.grow([self.index])
 
     def get_elapsed_seconds(self):
-        """Get total elapsed seconds since creation."""
-        return int(time.perf_counter() - self.start_time)
+        """Get total elapsed (simulated) seconds since planting."""
+        return int(self.field.elapsed_of(self.index))
     
     def get_time_until_next_stage(self):
         """Get seconds until next growth stage."""
-        elapsed = self.get_elapsed_seconds()
-        if self.growth_stage >= 2:
-            return 0  # Fully grown
-        
-        next_stage_time = (self.last_stage_update + 1) * 5
-        return max(0, next_stage_time - elapsed)
+        return self.field.time_until_next_stage(self.index)
     
     def reset_timer(self):
         """Reset the crop timer (useful for testing)."""
-        self.start_time = time.perf_counter()
-        self.last_second_printed = 0
-        self.last_stage_update = 0
-        self.growth_stage = 0
-        self.color = (0.6, 0.4, 0.2)
-        self.height = 1.0
-        print("Crop timer reset!")
+        self.field.reset(self.index)
+        if events.bus.wants(events.CropReset):
+            events.bus.emit(events.CropReset(self.index))
+
+    def release(self):
+        """Give the crop's slot back to its field."""
+        self.field.remove(self.index)
+        super().release()
 
     def render(self):
         """Render crop as a small scaled cube with current color."""
@@ -92,15 +99,17 @@ class Crop(PhysicsObject):
         
         # Scale based on current size
         glScalef(self.width, self.height, self.depth)
-        glutSolidSphere(.3,5,5)
+        if self.lod_level == 0:
+            get_mesh(build_sphere, .3, 5, 5).draw()
+        elif self.lod_level == 1:
+            get_mesh(build_sphere, .3, 4, 2).draw()
+        else:
+            get_mesh(build_sphere, .3, 3, 2).draw()
         
         glPopMatrix()
 
     def draw(self):
-        """Main draw method that updates timer and renders."""
-        # Update timer first
-        self.update_timer()
-        
+        """Main draw method (growth is updated by the field, not here)."""
         # Position the crop
         glPushMatrix()
         glTranslatef(self.position.x, self.position.y, self.position.z)
@@ -109,5 +118,3 @@ class Crop(PhysicsObject):
         self.render()
         
         glPopMatrix()
-
-
@@ -0,0 +1,363 @@
+import heapq
+import numpy as np
+
+
+# Appearance per growth stage: 0 = seed, 1 = sprout, 2 = grown
+STAGE_COLORS = np.array([
+    (0.6, 0.4, 0.2),  # Brown seed
+    (0.2, 0.8, 0.2),  # Green sprout
+    (1.0, 1.0, 0.0),  # Yellow harvest-ready
+], dtype=np.float32)
+STAGE_HEIGHTS = np.array([1.0, 2.0, 3.0], dtype=np.float32)
+MAX_STAGE = len(STAGE_COLORS) - 1
+
+
+class CropField:
+    """Structure-of-arrays store for crop growth state.
+
+    Every crop owns one slot (an index into the arrays). Slots of removed
+    crops are recycled, so indices stay stable for views.
+
+    Growth runs on the field's simulated clock (`time`, advanced only by
+    step()), so pausing or fast-forwarding the simulation works unchanged.
+    A crop grows one stage each time the whole seconds since planting pass
+    another multiple of its threshold. Instead of checking every crop each
+    tick, each crop's next transition is filed in a bucket of a timing
+    wheel (`resolution` seconds wide); step() only looks at the buckets
+    that came due, so its cost follows the number of growth events.
+
+    Slots whose appearance changed (planted, grown, reset, removed) are
+    flagged in `dirty` until a renderer collects them with take_dirty().
+    `generation` increases on clear(), when every slot index is invalidated.
+    `revision` increases whenever slots are planted, removed or have their
+    growth state set outside step(), so copies of the schedule (see
+    sharding.py) know when to rebuild.
+    """
+
+    def __init__(self, capacity=64, resolution=1.0):
+        self.count = 0      # slots in use, including dead ones below count
+        self.free = []      # dead slots available for reuse
+        self.generation = 0
+        self.revision = 0
+        self.any_dirty = False
+        self.time = 0.0     # simulated seconds
+        self.resolution = resolution
+        self.buckets = {}       # bucket number -> list of slot index arrays
+        self.bucket_heap = []   # bucket numbers with pending entries
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.planted_at = np.zeros(capacity, dtype=np.float64)     # field time when elapsed was 0
+        self.last_stage_update = np.zeros(capacity, dtype=np.int64)
+        self.stages = np.zeros(capacity, dtype=np.int8)
+        self.thresholds = np.ones(capacity, dtype=np.float32)      # seconds per stage
+        self.colors = np.zeros((capacity, 3), dtype=np.float32)
+        self.heights = np.zeros(capacity, dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.due_time = np.full(capacity, np.inf)                  # next scheduled transition
+
+    def grow_capacity(self, needed):
+        """Reallocate the arrays so at least `needed` slots fit."""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        old = {name: getattr(self, name) for name in self.array_names()}
+        self.allocate(capacity)
+        for name, array in old.items():
+            getattr(self, name)[:self.count] = array[:self.count]
+
+    @staticmethod
+    def array_names():
+        return ('positions', 'planted_at', 'last_stage_update', 'stages',
+                'thresholds', 'colors', 'heights', 'alive', 'dirty', 'due_time')
+
+    def __len__(self):
+        return self.count - len(self.free)
+
+    def clear(self):
+        self.count = 0
+        self.free = []
+        self.alive[:] = False
+        self.dirty[:] = False
+        self.due_time[:] = np.inf
+        self.buckets = {}
+        self.bucket_heap = []
+        self.any_dirty = False
+        self.generation += 1
+        self.revision += 1
+
+    def mark_dirty(self, indices):
+        self.dirty[indices] = True
+        self.any_dirty = True
+
+    def take_dirty(self):
+        """Indices flagged since the last call, clearing the flags."""
+        if not self.any_dirty:
+            return np.empty(0, dtype=np.intp)
+        indices = np.flatnonzero(self.dirty[:self.count])
+        self.dirty[indices] = False
+        self.any_dirty = False
+        return indices
+
+    def elapsed_of(self, indices):
+        """Simulated seconds since the given crops were planted."""
+        return self.time - self.planted_at[indices]
+
+    def add(self, position, threshold=5, height=None):
+        """Plant one crop and return its slot index."""
+        if self.free:
+            index = self.free.pop()
+        else:
+            self.grow_capacity(self.count + 1)
+            index = self.count
+            self.count += 1
+
+        self.positions[index] = (position.x, position.y, position.z)
+        self.thresholds[index] = threshold
+        self.alive[index] = True
+        self.reset(index)
+        if height is not None:
+            self.heights[index] = height
+        return index
+
+    def add_many(self, positions, thresholds=5):
+        """Plant crops in bulk from an (N, 3) array; returns their indices."""
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        n = len(positions)
+        start = self.count
+        self.grow_capacity(start + n)
+        end = start + n
+        self.count = end
+
+        self.positions[start:end] = positions
+        self.thresholds[start:end] = thresholds
+        self.planted_at[start:end] = self.time
+        self.last_stage_update[start:end] = 0
+        self.stages[start:end] = 0
+        self.colors[start:end] = STAGE_COLORS[0]
+        self.heights[start:end] = STAGE_HEIGHTS[0]
+        self.alive[start:end] = True
+        self.mark_dirty(slice(start, end))
+        self.revision += 1
+        indices = np.arange(start, end)
+        self.schedule(indices)
+        return indices
+
+    def remove(self, index):
+        """Free a slot (e.g. after harvesting)."""
+        if self.alive[index]:
+            self.alive[index] = False
+            self.due_time[index] = np.inf
+            self.free.append(index)
+            self.mark_dirty(index)
+            self.revision += 1
+
+    def reset(self, index):
+        """Put a crop back to a freshly planted seed."""
+        self.planted_at[index] = self.time
+        self.last_stage_update[index] = 0
+        self.stages[index] = 0
+        self.colors[index] = STAGE_COLORS[0]
+        self.heights[index] = STAGE_HEIGHTS[0]
+        self.mark_dirty(index)
+        self.schedule([index])
+        self.revision += 1
+
+    def set_state(self, indices, elapsed, last_stage_update, stages):
+        """Restore saved growth state (timers and stage) for the given slots."""
+        indices = np.asarray(indices)
+        stages = np.minimum(np.asarray(stages), MAX_STAGE)
+        self.planted_at[indices] = self.time - np.asarray(elapsed, dtype=np.float64)
+        self.last_stage_update[indices] = last_stage_update
+        self.stages[indices] = stages
+        self.colors[indices] = STAGE_COLORS[stages]
+        self.heights[indices] = STAGE_HEIGHTS[stages]
+        self.mark_dirty(indices)
+        self.schedule(indices)
+        self.revision += 1
+
+    def grow(self, indices):
+        """Advance the given crops one stage (capped) and update appearance."""
+        indices = np.asarray(indices)
+        self.stages[indices] = np.minimum(self.stages[indices] + 1, MAX_STAGE)
+        stages = self.stages[indices]
+        self.colors[indices] = STAGE_COLORS[stages]
+        self.heights[indices] = STAGE_HEIGHTS[stages]
+        self.mark_dirty(indices)
+
+    # --------------------
+    # Growth scheduling
+    # --------------------
+    def schedule(self, indices):
+        """File each crop's next stage transition in the timing wheel."""
+        indices = np.asarray(indices, dtype=np.intp)
+        growing = indices[self.alive[indices] & (self.stages[indices] < MAX_STAGE)]
+        self.due_time[indices] = np.inf
+        if len(growing) == 0:
+            return
+        # Next transition once whole elapsed seconds reach (checks + 1) thresholds
+        next_check = np.ceil((self.last_stage_update[growing] + 1) * self.thresholds[growing].astype(np.float64))
+        due = self.planted_at[growing] + next_check
+        self.due_time[growing] = due
+        self.file(growing, np.floor(due / self.resolution).astype(np.int64))
+
+    def file(self, indices, buckets):
+        if len(indices) == 0:
+            return
+        if np.all(buckets == buckets[0]):
+            self.file_bucket(int(buckets[0]), indices)
+            return
+        order = np.argsort(buckets, kind='stable')
+        buckets, indices = buckets[order], indices[order]
+        unique, starts = np.unique(buckets, return_index=True)
+        for bucket, group in zip(unique.tolist(), np.split(indices, starts[1:])):
+            self.file_bucket(bucket, group)
+
+    def file_bucket(self, bucket, indices):
+        entries = self.buckets.get(bucket)
+        if entries is None:
+            self.buckets[bucket] = [indices]
+            heapq.heappush(self.bucket_heap, bucket)
+        else:
+            entries.append(indices)
+
+    def pending_events(self):
+        """Number of scheduled transitions (stale entries excluded)."""
+        return int(np.isfinite(self.due_time[:self.count]).sum())
+
+    def step(self, delta_time):
+        """Advance simulated time; return the indices that changed stage.
+
+        Only buckets whose time has come are examined. A crop grows at most
+        one stage per step, like the original per-frame check.
+        """
+        self.time += delta_time
+        now = self.time
+        current = int(np.floor(now / self.resolution))
+        heap = self.bucket_heap
+        due_parts, carried = [], []
+        while heap and heap[0] <= current:
+            bucket = heapq.heappop(heap)
+            entries = self.buckets.pop(bucket)
+            indices = np.unique(np.concatenate(entries) if len(entries) > 1 else entries[0])
+            # Drop stale entries (removed, reset or rescheduled since filing)
+            due_time = self.due_time[indices]
+            live = np.floor(due_time / self.resolution) == bucket
+            indices = indices[live]
+            if len(indices) == 0:
+                continue
+            checks = self.checks(indices)
+            ready = checks > self.last_stage_update[indices]
+            due_parts.append(indices[ready])
+            carried.append(indices[~ready])
+
+        # Entries not quite due yet wait in the current bucket
+        for indices in carried:
+            if len(indices):
+                self.due_time[indices] = np.maximum(self.due_time[indices], current * self.resolution)
+                self.file_bucket(current, indices)
+
+        if not due_parts:
+            return np.empty(0, dtype=np.intp)
+        due = np.concatenate(due_parts) if len(due_parts) > 1 else due_parts[0]
+        if len(due) == 0:
+            return due
+        self.last_stage_update[due] = self.checks(due)
+        changed = due[self.stages[due] < MAX_STAGE]
+        self.grow(changed)
+        self.schedule(due)
+        return changed
+
+    def checks(self, indices):
+        """How many whole thresholds fit in each crop's whole elapsed seconds."""
+        return (np.floor(self.elapsed_of(indices)) // self.thresholds[indices]).astype(np.int64)
+
+    def step_polling(self, delta_time):
+        """Reference implementation of step(): checks every live crop.
+
+        Same rule and result as step(); kept for benchmarks and checks.
+        """
+        self.time += delta_time
+        due = poll_growth(self, np.flatnonzero(self.alive[:self.count]), self.time)
+        if len(due):
+            self.any_dirty = True
+            self.schedule(due)
+        return due
+
+    def catch_up(self, seconds, replay=False):
+        """Advance simulated time by `seconds` in one closed-form pass.
+
+        Each crop gains one stage per threshold crossing, capped at
+        MAX_STAGE, which is what step() produces when stepped more finely
+        than any threshold; no intermediate steps are run. Returns the
+        indices that changed stage. With replay, returns (changed, events)
+        where events is (times, indices, stages): every stage change with
+        the simulated time it happened at, ordered by time, then index.
+        """
+        start = self.time
+        self.time += seconds
+        growing = np.flatnonzero(self.alive[:self.count] & (self.stages[:self.count] < MAX_STAGE))
+        previous = self.last_stage_update[growing]
+        gains = np.maximum(self.checks(growing) - previous, 0)
+        gains = np.minimum(gains, MAX_STAGE - self.stages[growing].astype(np.int64))
+        grew = gains > 0
+        changed, gains, previous = growing[grew], gains[grew], previous[grew]
+
+        old_stages = self.stages[changed].astype(np.int64)
+        # A crop that matures stops being scheduled, so its counter stops there too
+        self.last_stage_update[changed] = previous + gains
+        stages = old_stages + gains
+        self.stages[changed] = stages
+        self.colors[changed] = STAGE_COLORS[stages]
+        self.heights[changed] = STAGE_HEIGHTS[stages]
+        self.mark_dirty(changed)
+        self.schedule(changed)
+        self.revision += 1
+        if not replay:
+            return changed
+
+        # k-th gain of a crop happens once its whole elapsed seconds reach (previous + k) thresholds
+        indices = np.repeat(changed, gains)
+        first = np.repeat(np.cumsum(gains) - gains, gains)
+        k = np.arange(len(indices)) - first + 1
+        crossing = np.ceil((np.repeat(previous, gains) + k) * self.thresholds[indices].astype(np.float64))
+        times = np.maximum(self.planted_at[indices] + crossing, start)  # overdue ones fire right away
+        event_stages = np.repeat(old_stages, gains) + k
+        order = np.lexsort((indices, times))
+        return changed, (times[order], indices[order], event_stages[order].astype(np.int8))
+
+    def time_until_next_stage(self, index):
+        """Seconds until the crop at index grows again (0 when fully grown)."""
+        if self.stages[index] >= MAX_STAGE:
+            return 0
+        next_stage_time = (self.last_stage_update[index] + 1) * self.thresholds[index]
+        return max(0, int(next_stage_time) - int(self.elapsed_of(index)))
+
+
+def poll_growth(arrays, rows, now):
+    """Grow the crops among `rows` that crossed a threshold by field time `now`.
+
+    `arrays` is a CropField or anything with its array attributes (shard
+    workers pass views of shared memory). Sets the dirty flags but leaves
+    scheduling to the caller. Returns the rows that grew.
+    """
+    rows = rows[arrays.alive[rows] & (arrays.stages[rows] < MAX_STAGE)]
+    checks = (np.floor(now - arrays.planted_at[rows]) // arrays.thresholds[rows]).astype(np.int64)
+    due = checks > arrays.last_stage_update[rows]
+    rows = rows[due]
+    arrays.last_stage_update[rows] = checks[due]
+    stages = arrays.stages[rows] + 1
+    arrays.stages[rows] = stages
+    arrays.colors[rows] = STAGE_COLORS[stages]
+    arrays.heights[rows] = STAGE_HEIGHTS[stages]
+    arrays.dirty[rows] = True
+    return rows
+
+
+# Field that Crop objects register with unless given another one
+default_field = CropField()
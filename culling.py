@@ -0,0 +1,158 @@
+import math
+import numpy as np
+
+
+# Plane order in Frustum.planes
+NEAR, FAR, LEFT, RIGHT, BOTTOM, TOP = range(6)
+
+
+def _normalize(v):
+    return v / np.linalg.norm(v)
+
+
+class Frustum:
+    """View frustum as six inward-facing planes (nx, ny, nz, d).
+
+    A point p is inside a plane when n.p + d >= 0. Built from the same
+    parameters as gluLookAt/gluPerspective, so no GL state is needed.
+    """
+
+    def __init__(self, planes, eye):
+        self.planes = np.asarray(planes, dtype=np.float64).reshape(6, 4)
+        self.eye = np.asarray(eye, dtype=np.float64)
+        self.key = self.planes.tobytes()   # cheap equality check between frames
+
+    @classmethod
+    def from_camera(cls, eye, target, up, fov_y=45.0, aspect=800.0 / 600.0, near=0.5, far=100.0):
+        eye = np.asarray(eye, dtype=np.float64)
+        forward = _normalize(np.asarray(target, dtype=np.float64) - eye)
+        side = _normalize(np.cross(forward, np.asarray(up, dtype=np.float64)))
+        true_up = np.cross(side, forward)
+
+        tan_v = math.tan(math.radians(fov_y) / 2)
+        tan_h = tan_v * aspect
+        normals = [
+            forward,                          # near
+            -forward,                         # far
+            _normalize(side + tan_h * forward),      # left
+            _normalize(-side + tan_h * forward),     # right
+            _normalize(true_up + tan_v * forward),   # bottom
+            _normalize(-true_up + tan_v * forward),  # top
+        ]
+        points = [eye + forward * near, eye + forward * far, eye, eye, eye, eye]
+        planes = [(n[0], n[1], n[2], -np.dot(n, p)) for n, p in zip(normals, points)]
+        return cls(planes, eye)
+
+    def distances(self, points):
+        """(N, 6) signed distance of each point to each plane."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        return points @ self.planes[:, :3].T + self.planes[:, 3]
+
+    def test_spheres(self, centers, radii):
+        """Boolean mask of spheres that are at least partly inside."""
+        radii = np.asarray(radii, dtype=np.float64).reshape(-1, 1)
+        return np.all(self.distances(centers) >= -radii, axis=1)
+
+    def test_aabbs(self, mins, maxs):
+        """Boolean mask of boxes that are at least partly inside (positive-vertex test)."""
+        mins = np.asarray(mins, dtype=np.float64).reshape(-1, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(-1, 3)
+        normals = self.planes[:, :3]
+        # For every plane, the box corner furthest along its normal
+        positive = np.where(normals[None, :, :] >= 0, maxs[:, None, :], mins[:, None, :])
+        dists = np.einsum('bpk,pk->bp', positive, normals) + self.planes[:, 3]
+        return np.all(dists >= 0, axis=1)
+
+    def contains_point(self, point):
+        return bool(np.all(self.distances(point) >= 0))
+
+
+class LodPolicy:
+    """Distance-based level of detail: level i is used up to distances[i]."""
+
+    def __init__(self, distances=(25.0, 50.0)):
+        self.distances = np.asarray(distances, dtype=np.float64)
+
+    @property
+    def level_count(self):
+        return len(self.distances) + 1
+
+    def levels(self, centers, eye):
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        dist = np.linalg.norm(centers - eye, axis=1)
+        return np.searchsorted(self.distances, dist, side='right')
+
+
+def bounding_sphere(entity):
+    """Center and radius enclosing an entity's width/height/depth box."""
+    p = entity.position
+    radius = 0.5 * math.sqrt(entity.width ** 2 + entity.height ** 2 + entity.depth ** 2)
+    return (p.x, p.y, p.z), radius
+
+
+def visible_cells(grid, frustum, height_range=(-10.0, 20.0)):
+    """Keys of occupied SpatialHash cells whose (padded) box touches the frustum.
+
+    Cells are padded by one cell size on XZ, so entities smaller than a cell
+    that stick out of their center's cell are still kept.
+    """
+    keys = list(grid.cells)
+    if not keys:
+        return set()
+    size = grid.cell_size
+    cells = np.array(keys, dtype=np.float64)
+    mins = np.column_stack([cells[:, 0] * size - size, np.full(len(keys), height_range[0]), cells[:, 1] * size - size])
+    maxs = np.column_stack([cells[:, 0] * size + 2 * size, np.full(len(keys), height_range[1]), cells[:, 1] * size + 2 * size])
+    inside = frustum.test_aabbs(mins, maxs)
+    return {key for key, keep in zip(keys, inside.tolist()) if keep}
+
+
+def grid_candidates(entities, frustum, grid, ungridded=None):
+    """The entities that may be visible, found through a SpatialHash.
+
+    Only the buckets of visible cells are walked, so entities in culled
+    cells cost nothing in Python. Oversized entities and entities the grid
+    does not hold (`ungridded`) are always candidates.
+
+    Given a set and its ungridded part, the cost is the contents of the
+    visible cells plus the oversized and ungridded entities. Anything else
+    is turned into a set and checked against the grid first, which is O(n);
+    RenderSystem keeps both between frames to skip that.
+    """
+    wanted = entities if isinstance(entities, (set, frozenset)) else set(entities)
+    if ungridded is None:
+        ungridded = wanted.difference(grid.entity_cells)
+    cells, oversized = grid.cells, grid.oversized
+    candidates = [entity for key in visible_cells(grid, frustum) for entity in cells[key]
+                  if entity in wanted and entity not in oversized]
+    candidates.extend(entity for entity in oversized if entity in wanted)
+    candidates.extend(ungridded)
+    return candidates, len(wanted) - len(candidates)
+
+
+def cull_entities(entities, frustum, lod=None, grid=None, ungridded=None):
+    """Split entities into those to draw and a culled count.
+
+    Returns (visible entities, their LOD levels, culled count). With a grid,
+    entities in cells outside the frustum are dropped without being looked
+    at (grid_candidates); the rest get the sphere test. Visible entities
+    come back in no particular order.
+    """
+    if grid is not None:
+        candidates, culled = grid_candidates(entities, frustum, grid, ungridded)
+    else:
+        candidates, culled = list(entities), 0
+    if not candidates:
+        return [], np.empty(0, dtype=np.intp), culled
+
+    spheres = [bounding_sphere(entity) for entity in candidates]
+    centers = np.array([center for center, _ in spheres], dtype=np.float64)
+    radii = [radius for _, radius in spheres]
+    inside = frustum.test_spheres(centers, radii)
+    culled += int(len(candidates) - inside.sum())
+    visible = [entity for entity, keep in zip(candidates, inside.tolist()) if keep]
+    if lod is not None:
+        levels = lod.levels(centers[inside], frustum.eye)
+    else:
+        levels = np.zeros(len(visible), dtype=np.intp)
+    return visible, levels, culled
@@ -1,8 +1,11 @@
 #entity
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
+from OpenGL.GL import (
+    GL_TRIANGLES, glBegin, glColor3f, glEnd, glPopMatrix, glPushMatrix, glRotatef, glScalef,
+    glTranslatef, glVertex3f
+)
+from OpenGL.GLU import gluCylinder, gluNewQuadric
+from OpenGL.GLUT import glutSolidCube, glutSolidSphere
 
 from physics_object import PhysicsObject, Vector3
 
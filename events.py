@@ -0,0 +1,259 @@
+import sys
+import time
+from collections import deque
+
+
+# Levels, as in the logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+
+# --------------------
+# Typed events
+# --------------------
+class Event:
+    """Base class of game events. Subclasses set `level` and `fields`."""
+    __slots__ = ('time',)
+    level = INFO
+    fields = ()
+
+    def __init__(self, *values):
+        self.time = 0.0
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+
+    def message(self):
+        return ', '.join(f"{name}={getattr(self, name)}" for name in self.fields)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.message()})"
+
+
+class LogMessage(Event):
+    """Free-form text for messages that have no event type of their own."""
+    __slots__ = ('text', 'level')
+    fields = ('text',)
+
+    def __init__(self, text, level=INFO):
+        super().__init__(text)
+        self.level = level
+
+    def message(self):
+        return self.text
+
+
+class CropPlanted(Event):
+    __slots__ = ('index', 'position')
+    level = DEBUG
+    fields = ('index', 'position')
+
+
+class CropReset(Event):
+    __slots__ = ('index',)
+    level = DEBUG
+    fields = ('index',)
+
+
+class CropStageChanged(Event):
+    """One per growth step: every crop that advanced, as field slot indices.
+
+    sim_time is the field's simulated time of the change.
+    """
+    __slots__ = ('indices', 'stages', 'sim_time')
+    level = DEBUG
+    fields = ('indices', 'stages', 'sim_time')
+
+    def __init__(self, indices, stages, sim_time=None):
+        super().__init__(indices, stages, sim_time)
+
+    def message(self):
+        return f"{len(self.indices)} crop(s) advanced a growth stage"
+
+
+class Harvested(Event):
+    __slots__ = ('position', 'total')
+    fields = ('position', 'total')
+
+    def message(self):
+        return f"Harvested crop! Total: {self.total}"
+
+
+class Planted(Event):
+    __slots__ = ('position', 'remaining')
+    fields = ('position', 'remaining')
+
+    def message(self):
+        return f"Planted crop! Remaining: {self.remaining}"
+
+
+class BuildingUsed(Event):
+    __slots__ = ('energy',)
+    fields = ('energy',)
+
+    def message(self):
+        return f"Used building! Energy: {self.energy}"
+
+
+class GameSaved(Event):
+    __slots__ = ('path',)
+    fields = ('path',)
+
+    def message(self):
+        return f"Saved game to {self.path}"
+
+
+# --------------------
+# Sinks
+# --------------------
+def format_event(event):
+    return f"{event.time:10.3f} {LEVEL_NAMES.get(event.level, event.level):<7} {event.message()}"
+
+
+class MemorySink:
+    """Keeps every accepted event in a list (handy for tests and tools)."""
+
+    def __init__(self, level=DEBUG):
+        self.level = level
+        self.events = []
+        self.flushes = 0
+
+    def write(self, events):
+        self.events.extend(events)
+        self.flushes += 1
+
+    def close(self):
+        pass
+
+
+class StreamSink:
+    """Formats events as text lines and writes each batch with one call."""
+
+    def __init__(self, stream=None, level=INFO):
+        self.stream = stream if stream is not None else sys.stdout
+        self.level = level
+
+    def write(self, events):
+        self.stream.write(''.join(format_event(event) + '\n' for event in events))
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class FileSink(StreamSink):
+    """StreamSink appending to a file it owns."""
+
+    def __init__(self, path, level=DEBUG):
+        super().__init__(open(path, 'a', encoding='utf-8'), level)
+        self.path = path
+
+    def close(self):
+        self.stream.close()
+
+
+# --------------------
+# Bus
+# --------------------
+class EventBus:
+    """Leveled game-event bus.
+
+    Type subscribers receive every event of their type immediately,
+    whatever the level. `level` only filters logging: events at or above
+    it are kept in a ring buffer of the last `capacity` events and queued
+    for the sinks, which receive them in batches on flush() (or once
+    `batch_size` events are waiting). Hot paths that build an event only to
+    emit it should check wants() first, so an event nobody takes costs a
+    comparison and a dict lookup.
+    """
+
+    def __init__(self, level=INFO, capacity=1024, batch_size=256, clock=time.perf_counter):
+        self.level = level
+        self.recent = deque(maxlen=capacity)
+        self.batch_size = batch_size
+        self.clock = clock
+        self.sinks = []
+        self.pending = []
+        self.subscribers = {}   # event type -> callbacks
+        self.emitted = 0
+        self.dropped = 0        # events below level (not logged)
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def subscribed(self, event_type):
+        subscribers = self.subscribers
+        return bool(subscribers) and any(subscribers.get(cls) for cls in event_type.__mro__)
+
+    def wants(self, event_type):
+        """Whether emitting an event of this type reaches anyone: the log or a subscriber."""
+        return event_type.level >= self.level or self.subscribed(event_type)
+
+    def set_level(self, level):
+        self.level = level
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        self.flush()
+        self.sinks.remove(sink)
+        sink.close()
+
+    def subscribe(self, event_type, callback):
+        """Call callback(event) for every accepted event of event_type (or a subclass)."""
+        self.subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+        callbacks = self.subscribers.get(event_type)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+
+    def emit(self, event):
+        logged = event.level >= self.level
+        if not logged and not self.subscribers:
+            self.dropped += 1
+            return
+        event.time = self.clock()
+        if self.subscribers:
+            for event_type in type(event).__mro__:
+                for callback in self.subscribers.get(event_type, ()):
+                    callback(event)
+        if not logged:
+            self.dropped += 1
+            return
+        self.emitted += 1
+        self.recent.append(event)
+        if self.sinks:
+            self.pending.append(event)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def log(self, text, level=INFO):
+        if level >= self.level or self.subscribed(LogMessage):
+            self.emit(LogMessage(text, level))
+
+    def flush(self):
+        """Hand queued events to the sinks, one batch per sink."""
+        if not self.pending:
+            return
+        events, self.pending = self.pending, []
+        for sink in self.sinks:
+            accepted = [event for event in events if event.level >= sink.level]
+            if accepted:
+                sink.write(accepted)
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+
+
+# Bus used by the game; prints INFO and above to stdout
+bus = EventBus()
+bus.add_sink(StreamSink())
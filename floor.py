@@ -1,11 +1,10 @@
-from physics_object import PhysicsObject, Vector3, load_texture
-from physics_object import PhysicsObject, Vector3
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from physics_object import PhysicsObject, Vector3
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
+from physics_object import PhysicsObject, Vector3, load_texture, release_texture
+from mesh import get_mesh, build_ground_quad
+from OpenGL.GL import (
+    GL_LIGHTING, GL_TEXTURE_2D, glBindTexture, glColor3f, glDisable, glEnable, glPopMatrix,
+    glPushMatrix, glScalef, glTranslatef
+)
+from OpenGL.GLUT import glutSolidCube, glutSolidSphere
 
 
 def draw_sun(game_state):
@@ -23,44 +22,25 @@ class Floor(PhysicsObject):
                  texture_file=None, texture_repeat=10.0):
         super().__init__(position, Vector3(0, 0, 0), width, height, depth)
         self.color = (0.3, 0.6, 0.1) 
+        self.collidable = False  # The ground is handled by ground_level, not collisions
+        self.dynamic = False
         self.texture_id = None
         self.texture_repeat = texture_repeat  # How many times to repeat texture
         
         # Load texture if provided
         if texture_file:
             self.texture_id =  load_texture(texture_file)
+
+    def release(self):
+        """Return the floor texture to the shared cache."""
+        release_texture(self.texture_id)
+        self.texture_id = None
+        super().release()
     
     
     def draw_textured_quad(self):
-        """Draw a textured quad for the floor."""
-        half_width = self.width / 2
-        half_height = self.height / 2
-        
-        # Calculate texture coordinates based on repeat factor
-        tex_max = self.texture_repeat
-        
-        glBegin(GL_QUADS)
-        
-        # Bottom face (the floor surface)
-        glNormal3f(0, 1, 0)  # Normal pointing up
-        
-        # Vertex 1: Front-left
-        glTexCoord2f(0, 0)
-        glVertex3f(-half_width, 0, half_height)
-        
-        # Vertex 2: Front-right  
-        glTexCoord2f(tex_max, 0)
-        glVertex3f(half_width, 0, half_height)
-        
-        # Vertex 3: Back-right
-        glTexCoord2f(tex_max, tex_max)
-        glVertex3f(half_width, 0, -half_height)
-        
-        # Vertex 4: Back-left
-        glTexCoord2f(0, tex_max)
-        glVertex3f(-half_width, 0, -half_height)
-        
-        glEnd()
+        """Draw the textured floor surface from its cached VBO mesh."""
+        get_mesh(build_ground_quad, self.width, self.height, self.texture_repeat).draw()
     
     def draw_colored_cube(self):
         """Draw the floor as a colored cube (fallback)."""
@@ -0,0 +1,704 @@
+"""Headless simulation runner and tick benchmark.
+
+Builds the same world as the game (create_world_entities/create_player),
+steps it without a window and reports ticks per second, per-system timings
+and allocations. Run `python headless.py --suite` for the scaling suite.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+import main
+import crop_field
+import jobs
+import physics_world
+import replay
+import savefile
+import sharding
+import texture
+import worldgen
+from chunks import ChunkData
+from crop import Crop
+from collision import CollisionSystem
+from physics_object import PhysicsObject, Vector3
+
+
+# name -> (crop count, ticks to run)
+SCENARIOS = {
+    'crops_1': (1, 600),
+    'crops_1k': (1000, 300),
+    'crops_100k': (100000, 5),
+}
+
+# Images the game loads, for the texture benchmark
+TEXTURE_ASSETS = ('assets/terrain.jpg', 'assets/wall.jpg', 'assets/roof.png')
+
+# The camera steers the player's movement, so every run starts from the game's initial one
+INITIAL_CAMERA = {key: list(main.game_state[key]) for key in ('camera_position', 'camera_target', 'camera_up')}
+
+
+def default_input_script(ticks):
+    """Scripted input: walk forward/strafe and use every action key periodically.
+
+    Returns a dict of tick -> list of (event, key) where event is 'down' or 'up'.
+    """
+    script = {}
+    for tick in range(0, ticks, 120):
+        script.setdefault(tick, []).append(('down', b'w'))
+        script.setdefault(tick + 60, []).extend([('up', b'w'), ('down', b'a')])
+        script.setdefault(tick + 90, []).append(('up', b'a'))
+    for tick in range(10, ticks, 30):
+        script.setdefault(tick, []).extend([('down', b'e'), ('down', b'f')])
+    for tick in range(25, ticks, 60):
+        script.setdefault(tick, []).append(('down', b'r'))
+    return script
+
+
+def build_world(crop_count, seed=0):
+    """Reset main.game_state to the standard world plus a generated farm's crops (as Crop entities)."""
+    state = main.game_state
+    crop_field.default_field.clear()
+    physics_world.default_world.clear()
+    crop_field.default_field.time = 0.0     # before planting: planted_at is stamped from it
+    player = main.create_player()
+    player.crop_count = 10
+    entities = main.create_world_entities(load_textures=False)
+
+    existing = sum(1 for e in entities if isinstance(e, Crop))
+    farm = worldgen.FarmGenerator(seed).farm(max(0, crop_count - existing))
+    crops = [Crop(Vector3(*position), threshold=threshold)
+             for position, threshold in zip(farm.crop_positions.tolist(), farm.crop_thresholds.tolist())]
+    if crops:
+        crop_field.default_field.set_state([crop.index for crop in crops], farm.crop_elapsed,
+                                           farm.crop_last_stage_update, farm.crop_stages)
+    entities.extend(crops)
+
+    main.setup_world(player, entities, [])
+    reset_camera(state)
+    state['elapsed_sec'] = 0
+    return state
+
+
+def reset_camera(state):
+    for key, value in INITIAL_CAMERA.items():
+        state[key][:] = value
+
+
+def build_replay_world(world):
+    """Rebuild the starting world an input log was recorded in (its 'world' metadata)."""
+    if 'scenario' in world:
+        return build_world(world['scenario'])
+    # The windowed game's world, without textures
+    state = main.game_state
+    crop_field.default_field.clear()
+    physics_world.default_world.clear()
+    crop_field.default_field.time = 0.0
+    main.initialize_entities(load_textures=False)
+    main.apply_world_options(world, load_textures=False, offline_growth=False)
+    reset_camera(state)
+    state['elapsed_sec'] = 0
+    return state
+
+
+class HeadlessRunner:
+    """Steps the world with scripted input; the system runner times each system."""
+
+    def __init__(self, state, script=None):
+        self.state = state
+        self.script = script or {}
+        self.tick = 0
+        self.input_time = 0.0
+        state['systems'].reset_timings()
+
+    def run_input(self):
+        for event, key in self.script.get(self.tick, ()):
+            # Through the GLUT callbacks, so input recording sees scripted keys too
+            if event == 'down':
+                main.on_keyboard_down(key, 0, 0)
+            else:
+                main.on_keyboard_up(key, 0, 0)
+
+    def step(self, delta_time):
+        start = time.perf_counter()
+        self.run_input()
+        self.input_time += time.perf_counter() - start
+        main.step_simulation(delta_time)
+        jobs.job_system.run_completed()     # game_loop's per-frame drain
+        self.tick += 1
+
+    def timings(self):
+        """Total seconds spent per system (plus input) so far."""
+        totals = {'input': self.input_time}
+        for name, timing in self.state['systems'].timings.items():
+            totals[name] = timing['total_ms'] / 1000.0
+        return totals
+
+
+def run_scenario(crop_count, ticks, alloc_ticks=10, delta_time=main.DELTA_TIME):
+    """Build a world, run it headless and return a metrics dict."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        build_start = time.perf_counter()
+        state = build_world(crop_count)
+        build_time = time.perf_counter() - build_start
+
+        runner = HeadlessRunner(state, default_input_script(ticks + alloc_ticks))
+        start = time.perf_counter()
+        for _ in range(ticks):
+            runner.step(delta_time)
+        elapsed = time.perf_counter() - start
+        timings = runner.timings()
+
+        # Allocation sampling runs separately so tracing does not skew timings
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for _ in range(alloc_ticks):
+            runner.step(delta_time)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    return {
+        'crops': crop_count,
+        'ticks': ticks,
+        'build_s': build_time,
+        'ticks_per_s': ticks / elapsed if elapsed else float('inf'),
+        'ms_per_tick': 1000.0 * elapsed / ticks if ticks else 0.0,
+        'system_ms_per_tick': {name: 1000.0 * total / ticks for name, total in timings.items()},
+        'alloc_blocks_per_tick': sum(s.count_diff for s in stats) / alloc_ticks if alloc_ticks else 0,
+        'alloc_peak_kib': peak / 1024.0,
+    }
+
+
+def run_collision_benchmark(body_count=10000, ticks=30, seed=0, delta_time=main.DELTA_TIME):
+    """Step `body_count` falling, sliding boxes through the collision system."""
+    rng = random.Random(seed)
+    world = physics_world.PhysicsWorld(capacity=body_count)
+    extent = (body_count ** 0.5) * 3.0
+    bodies = []
+    for _ in range(body_count):
+        body = PhysicsObject(
+            Vector3(rng.uniform(-extent, extent), rng.uniform(0.5, 4.0), rng.uniform(-extent, extent)),
+            Vector3(rng.uniform(-2, 2), 0.0, rng.uniform(-2, 2)),
+            1.0, 1.0, 1.0,
+            world=world
+        )
+        bodies.append(body)
+
+    collision_system = CollisionSystem()
+    for body in bodies:
+        collision_system.add(body)
+
+    physics_time = collision_time = 0.0
+    pairs = contacts = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        world.step(delta_time)
+        mid = time.perf_counter()
+        collision_system.step()
+        end = time.perf_counter()
+        physics_time += mid - start
+        collision_time += end - mid
+        pairs += collision_system.pair_count
+        contacts += collision_system.contact_count
+
+    return {
+        'bodies': body_count,
+        'ticks': ticks,
+        'physics_ms_per_tick': 1000.0 * physics_time / ticks,
+        'collision_ms_per_tick': 1000.0 * collision_time / ticks,
+        'pairs_per_tick': pairs / ticks,
+        'contacts_per_tick': contacts / ticks,
+    }
+
+
+def run_physics_benchmark(body_count=100000, ticks=60, seed=0, delta_time=main.DELTA_TIME):
+    """Time PhysicsWorld.step over `body_count` dynamic bodies."""
+    rng = random.Random(seed)
+    world = physics_world.PhysicsWorld(capacity=body_count)
+    for _ in range(body_count):
+        PhysicsObject(
+            Vector3(rng.uniform(-100, 100), rng.uniform(0.5, 20.0), rng.uniform(-100, 100)),
+            Vector3(rng.uniform(-2, 2), rng.uniform(-1, 5), rng.uniform(-2, 2)),
+            1.0, 1.0, 1.0,
+            world=world
+        )
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.step(delta_time)
+    elapsed = time.perf_counter() - start
+    return {
+        'bodies': body_count,
+        'ticks': ticks,
+        'physics_ms_per_tick': 1000.0 * elapsed / ticks,
+    }
+
+
+def run_growth_benchmark(crop_count=100000, ticks=600, seed=0, delta_time=main.DELTA_TIME):
+    """Compare the growth scheduler (CropField.step) with polling every crop."""
+    fields = {name: worldgen.generate_field(crop_count, seed)[0] for name in ('scheduled', 'polling')}
+
+    times = {}
+    events = 0
+    for name, step in (('scheduled', fields['scheduled'].step), ('polling', fields['polling'].step_polling)):
+        start = time.perf_counter()
+        for _ in range(ticks):
+            changed = step(delta_time)
+            if name == 'scheduled':
+                events += len(changed)
+        times[name] = time.perf_counter() - start
+
+    scheduled, polling = fields['scheduled'], fields['polling']
+    return {
+        'crops': crop_count,
+        'ticks': ticks,
+        'simulated_s': scheduled.time,
+        'growth_events': events,
+        'scheduled_ms_per_tick': 1000.0 * times['scheduled'] / ticks,
+        'polling_ms_per_tick': 1000.0 * times['polling'] / ticks,
+        'speedup': times['polling'] / times['scheduled'] if times['scheduled'] else 0.0,
+        'stages_match': bool(np.array_equal(scheduled.stages, polling.stages) and
+                             np.array_equal(scheduled.last_stage_update[scheduled.stages < crop_field.MAX_STAGE],
+                                            polling.last_stage_update[polling.stages < crop_field.MAX_STAGE])),
+    }
+
+
+def run_texture_benchmark(paths=TEXTURE_ASSETS, repeats=3, workers=4):
+    """Time loading mip chains by decoding the images vs reading the disk cache."""
+    cache_dir = tempfile.mkdtemp(prefix='texture_cache_')
+    cache = texture.MipCache(cache_dir)
+    try:
+        decode_s, cache_s = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for path in paths:
+                texture.load_mip_levels(path)
+            decode_s.append(time.perf_counter() - start)
+        for path in paths:
+            texture.load_mip_levels(path, cache)     # fill the cache
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for path in paths:
+                levels, from_cache = texture.load_mip_levels(path, cache)
+                assert from_cache
+            cache_s.append(time.perf_counter() - start)
+
+        # Same decode work spread over a job system
+        pool = jobs.JobSystem(workers)
+        start = time.perf_counter()
+        for job in [pool.submit(texture.load_mip_levels, path) for path in paths]:
+            job.result()
+        pool_s = time.perf_counter() - start
+        pool.shutdown()
+
+        cached_bytes = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    decode_ms, cached_ms = 1000.0 * min(decode_s), 1000.0 * min(cache_s)
+    return {
+        'textures': len(paths),
+        'decode_ms': decode_ms,
+        'pool_decode_ms': 1000.0 * pool_s,
+        'cache_load_ms': cached_ms,
+        'speedup': decode_ms / cached_ms if cached_ms else 0.0,
+        'cache_mib': cached_bytes / (1024 * 1024),
+    }
+
+
+# Run in a fresh interpreter by run_startup_benchmark; prints one JSON line
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_done = time.perf_counter()
+import OpenGL.GL, OpenGL.GLU, OpenGL.GLUT
+opengl_done = time.perf_counter()
+import main
+import_done = time.perf_counter()
+
+import hud
+hud.preload_default_atlas()
+main.initialize_entities(load_textures=False)
+setup_done = time.perf_counter()
+
+# First frame, minus the GL calls: one simulation step and the CPU side of rendering
+state = main.game_state
+state['loop'].run(1)
+main.interpolate_camera()
+main.update_frustum()
+first_frame = time.perf_counter()
+font_deferred = hud.default_atlas(wait=False) is None
+
+# The HUD font finishes in the background
+state['hud_layer'].update_geometry()
+assets_done = time.perf_counter()
+
+ms = lambda a, b: 1000.0 * (b - a)
+print(json.dumps({
+    'numpy_ms': ms(start, numpy_done),
+    'opengl_ms': ms(numpy_done, opengl_done),
+    'game_modules_ms': ms(opengl_done, import_done),
+    'import_ms': ms(start, import_done),
+    'setup_ms': ms(import_done, setup_done),
+    'first_frame_ms': ms(start, first_frame),
+    'assets_ready_ms': ms(start, assets_done),
+    'font_deferred': font_deferred,
+}))
+"""
+
+
+def run_startup_benchmark(repeats=5):
+    """Import time and time to first (headless) frame, each in a fresh interpreter.
+
+    Reports the median of `repeats` runs; times are measured from the start
+    of the script, so interpreter start-up itself is not included.
+    """
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    result = {'runs': repeats}
+    for name in runs[0]:
+        values = sorted(run[name] for run in runs)
+        result[name] = values[len(values) // 2]
+    return result
+
+
+def run_catch_up_benchmark(crop_count=1000000, seconds=3600.0, check_crops=20000, check_seconds=120.0,
+                           seed=0, delta_time=main.DELTA_TIME):
+    """Time CropField.catch_up over a long time jump, and check it against stepping.
+
+    The check steps a smaller field frame by frame for `check_seconds` and
+    compares stages with a closed-form catch-up over the same span.
+    """
+    def planted(count):
+        return worldgen.generate_field(count, seed, thresholds=(5.0, 600.0))[0]
+
+    field = planted(crop_count)
+    start = time.perf_counter()
+    changed = field.catch_up(seconds)
+    catch_up_time = time.perf_counter() - start
+
+    field = planted(crop_count)
+    start = time.perf_counter()
+    _, (times, _, _) = field.catch_up(seconds, replay=True)
+    replay_time = time.perf_counter() - start
+
+    stepped = planted(check_crops)
+    closed = planted(check_crops)
+    ticks = int(round(check_seconds / delta_time))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        stepped.step(delta_time)
+    step_time = time.perf_counter() - start
+    closed.catch_up(stepped.time)   # the accumulated clock, not ticks * delta_time
+
+    return {
+        'crops': crop_count,
+        'seconds': seconds,
+        'crop_seconds': crop_count * seconds,
+        'changed': len(changed),
+        'catch_up_ms': 1000.0 * catch_up_time,
+        'replay_ms': 1000.0 * replay_time,
+        'replay_events': len(times),
+        'check_crops': check_crops,
+        'check_stepped_ms': 1000.0 * step_time,
+        'matches_stepping': bool(np.array_equal(stepped.stages, closed.stages) and
+                                 np.array_equal(stepped.last_stage_update, closed.last_stage_update)),
+    }
+
+
+def run_sharding_benchmark(crop_count=200000, body_count=20000, ticks=120, worker_counts=(1, 2, 4, 8),
+                           seed=0, delta_time=main.DELTA_TIME):
+    """Step growth and physics sharded over 1/2/4/8 worker processes, against serial stepping.
+
+    Every run starts from the same world and must end with the same crop
+    stages and body positions as CropField.step plus PhysicsWorld.step.
+    Worker counts that enable_sharding would turn down (serial_fallback)
+    are reported with the serial time and the reason instead of being run.
+    """
+    def build():
+        rng = np.random.default_rng(seed)
+        field, farm = worldgen.generate_field(crop_count, seed, thresholds=(0.5, 5.0))
+        extent = float(np.abs(farm.crop_positions[:, [0, 2]]).max())
+        world = physics_world.PhysicsWorld(capacity=body_count)
+        for _ in range(body_count):
+            PhysicsObject(
+                Vector3(rng.uniform(-extent, extent), rng.uniform(0.5, 20.0), rng.uniform(-extent, extent)),
+                Vector3(rng.uniform(-30, 30), rng.uniform(-1, 5), rng.uniform(-2, 2)),
+                1.0, 1.0, 1.0,
+                world=world
+            )
+        return field, world
+
+    field, world = build()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        field.step(delta_time)
+        world.step(delta_time)
+    serial_time = time.perf_counter() - start
+    reference = (field.stages.copy(), world.positions[:world.count].copy())
+
+    result = {'crops': crop_count, 'bodies': body_count, 'ticks': ticks, 'cpus': os.cpu_count(),
+              'serial_ms_per_tick': 1000.0 * serial_time / ticks}
+    matches = True
+    for workers in worker_counts:
+        field, world = build()
+        reason = sharding.serial_fallback(workers, field, world)
+        if reason is not None:
+            result[f'workers_{workers}_ms_per_tick'] = result['serial_ms_per_tick']
+            result[f'workers_{workers}_fallback'] = reason
+            continue
+        simulation = sharding.ShardedSimulation(field, world, workers)
+        try:
+            simulation.step(delta_time)     # first step builds each region's schedule
+            start = time.perf_counter()
+            for _ in range(ticks - 1):
+                simulation.step(delta_time)
+            elapsed = time.perf_counter() - start
+            matches = matches and bool(np.array_equal(field.stages, reference[0]) and
+                                       np.array_equal(world.positions[:world.count], reference[1]))
+            result[f'workers_{workers}_ms_per_tick'] = 1000.0 * elapsed / (ticks - 1)
+            result[f'workers_{workers}_handoffs'] = simulation.handoffs
+        finally:
+            simulation.close()
+    result['matches_serial'] = matches
+    return result
+
+
+def run_save_benchmark(crop_count=1000000, seed=0, path=None):
+    """Save a generated farm of `crop_count` crops, reopen it and check the round trip."""
+    field, farm = worldgen.generate_field(crop_count, seed)
+    data = ChunkData.concatenate([
+        savefile.snapshot_field(field),
+        farm.take(slice(0, 0), slice(None)),    # its farmhouses and props
+    ])
+    metadata = {'elapsed_sec': 12.5, 'player': {'position': [1.0, 0.2, 2.0], 'yaw': 0.5, 'pitch': 0.1,
+                                                 'crop_count': 7, 'energy': 80}}
+
+    owns_path = path is None
+    if owns_path:
+        handle, path = tempfile.mkstemp(suffix='.sav')
+        os.close(handle)
+    try:
+        start = time.perf_counter()
+        savefile.write_save(path, data, metadata)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        save = savefile.SaveFile(path)
+        open_time = time.perf_counter() - start
+
+        keys = save.chunk_keys()
+        start = time.perf_counter()
+        chunk = save.chunk(keys[len(keys) // 2])
+        chunk_time = time.perf_counter() - start
+
+        # Round trip: same rows (in chunk order), same metadata
+        loaded = save.world()
+        order = np.lexsort((data.crop_positions[:, 2], data.crop_positions[:, 0]))
+        loaded_order = np.lexsort((loaded.crop_positions[:, 2], loaded.crop_positions[:, 0]))
+        building_order = np.lexsort((data.building_positions[:, 2], data.building_positions[:, 0]))
+        loaded_building_order = np.lexsort((loaded.building_positions[:, 2], loaded.building_positions[:, 0]))
+        matches = all(
+            np.array_equal(getattr(data, name)[order], getattr(loaded, name)[loaded_order])
+            for name in ChunkData.CROP_COLUMNS
+        ) and all(
+            np.array_equal(getattr(data, name)[building_order], getattr(loaded, name)[loaded_building_order])
+            for name in ChunkData.BUILDING_COLUMNS
+        ) and save.metadata['player'] == metadata['player'] and save.crop_count == crop_count
+        size = os.path.getsize(path)
+        save.close()
+    finally:
+        if owns_path:
+            os.remove(path)
+
+    return {
+        'crops': crop_count,
+        'chunks': len(keys),
+        'file_mib': size / (1024 * 1024),
+        'write_ms': 1000.0 * write_time,
+        'open_ms': 1000.0 * open_time,
+        'chunk_read_ms': 1000.0 * chunk_time,
+        'chunk_crops': chunk.crop_count,
+        'round_trip_ok': bool(matches),
+    }
+
+
+def run_worldgen_benchmark(crop_count=1000000, seed=0, chunk_size=main.CHUNK_SIZE, chunk_count=256):
+    """Time generating a farm of `crop_count` crops into a CropField, and streaming chunks of one."""
+    generator = worldgen.FarmGenerator(seed)
+    start = time.perf_counter()
+    farm = generator.farm(crop_count)
+    generate_time = time.perf_counter() - start
+
+    field = crop_field.CropField(capacity=crop_count)
+    start = time.perf_counter()
+    worldgen.add_to_field(field, farm)
+    fill_time = time.perf_counter() - start
+
+    side = int(chunk_count ** 0.5)
+    generate_chunk = generator.chunk_generator(chunk_size)
+    start = time.perf_counter()
+    chunk_crops = sum(generate_chunk((x, z)).crop_count for x in range(side) for z in range(side))
+    chunk_time = time.perf_counter() - start
+    return {
+        'crops': crop_count,
+        'buildings': farm.building_count,
+        'generate_ms': 1000.0 * generate_time,
+        'fill_field_ms': 1000.0 * fill_time,
+        'crops_per_s': crop_count / (generate_time + fill_time),
+        'stages': np.bincount(field.stages[:field.count], minlength=crop_field.MAX_STAGE + 1).tolist(),
+        'chunks': side * side,
+        'chunk_ms': 1000.0 * chunk_time / (side * side),
+        'chunk_crops_avg': chunk_crops / (side * side),
+    }
+
+
+def run_recording(path, crop_count, ticks, delta_time=main.DELTA_TIME):
+    """Run a scenario's scripted input and record it to an input log at `path`."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        state = build_world(crop_count)
+        recorder = main.start_recording(path, {'scenario': crop_count})
+        runner = HeadlessRunner(state, default_input_script(ticks))
+        for _ in range(ticks):
+            runner.step(delta_time)
+        main.stop_recording()
+    return {
+        'crops': crop_count,
+        'ticks': ticks,
+        'events': recorder.events,
+        'checkpoints': recorder.checkpoints,
+        'log_bytes': os.path.getsize(path),
+    }
+
+
+def run_replay(path, delta_time=main.DELTA_TIME):
+    """Replay an input log headless, checking the simulation against every recorded digest."""
+    log = replay.InputLog(path)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        state = build_replay_world(log.metadata.get('world', {}))
+        replayer = main.start_replay(log)
+        runner = HeadlessRunner(state)
+        start = time.perf_counter()
+        while state['replayer'] is not None:
+            runner.step(delta_time)
+        elapsed = time.perf_counter() - start
+    result = replayer.summary()
+    result['ms_per_tick'] = 1000.0 * elapsed / max(1, runner.tick)
+    result['system_ms_per_tick'] = {name: 1000.0 * total / max(1, runner.tick)
+                                    for name, total in runner.timings().items()}
+    return result
+
+
+# Result fields that check correctness rather than measure speed; main_cli exits 1 if any is False
+CHECKS = ('round_trip_ok', 'stages_match', 'matches_stepping', 'matches_serial', 'matches_recording')
+
+
+def failed_checks(result):
+    return [name for name in CHECKS if result.get(name) is False]
+
+
+def print_result(result):
+    print(', '.join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+
+
+def format_result(name, result):
+    systems = ', '.join(f"{n}={ms:.3f}" for n, ms in result['system_ms_per_tick'].items())
+    return (f"{name:>12}: {result['ticks_per_s']:10.1f} ticks/s  "
+            f"{result['ms_per_tick']:9.3f} ms/tick  [{systems}]  "
+            f"allocs/tick={result['alloc_blocks_per_tick']:.1f}  peak={result['alloc_peak_kib']:.0f} KiB")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--crops', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--suite', action='store_true', help='run every scenario in SCENARIOS')
+    parser.add_argument('--collisions', type=int, metavar='BODIES',
+                        help='benchmark the collision system with this many dynamic bodies')
+    parser.add_argument('--physics', type=int, metavar='BODIES',
+                        help='benchmark PhysicsWorld.step with this many dynamic bodies')
+    parser.add_argument('--save', type=int, metavar='CROPS',
+                        help='benchmark writing and memory-mapping a save with this many crops')
+    parser.add_argument('--growth', type=int, metavar='CROPS',
+                        help='benchmark scheduled crop growth against polling with this many crops')
+    parser.add_argument('--textures', action='store_true',
+                        help='benchmark decoding textures against loading them from the mip cache')
+    parser.add_argument('--startup', action='store_true',
+                        help='measure import time and time to the first headless frame')
+    parser.add_argument('--catch-up', type=int, metavar='CROPS',
+                        help='benchmark closed-form growth catch-up over an hour with this many crops')
+    parser.add_argument('--worldgen', type=int, metavar='CROPS',
+                        help='benchmark generating a procedural farm with this many crops')
+    parser.add_argument('--shards', type=int, metavar='CROPS',
+                        help='benchmark growth and physics sharded over 1/2/4/8 processes with this many crops')
+    parser.add_argument('--record', metavar='LOG',
+                        help='record the scenario\'s scripted input (--crops, --ticks) to an input log')
+    parser.add_argument('--replay', metavar='LOG',
+                        help='replay an input log (from the game or --record) and compare with the recording')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    if (args.collisions or args.physics or args.save or args.growth or args.textures
+            or args.startup or args.catch_up or args.shards or args.worldgen or args.record or args.replay):
+        if args.record:
+            result = run_recording(args.record, args.crops, args.ticks)
+        elif args.replay:
+            result = run_replay(args.replay)
+        elif args.collisions:
+            result = run_collision_benchmark(args.collisions)
+        elif args.physics:
+            result = run_physics_benchmark(args.physics)
+        elif args.save:
+            result = run_save_benchmark(args.save)
+        elif args.growth:
+            result = run_growth_benchmark(args.growth)
+        elif args.textures:
+            result = run_texture_benchmark()
+        elif args.catch_up:
+            result = run_catch_up_benchmark(args.catch_up)
+        elif args.worldgen:
+            result = run_worldgen_benchmark(args.worldgen)
+        elif args.shards:
+            result = run_sharding_benchmark(args.shards, body_count=max(1, args.shards // 10))
+        else:
+            result = run_startup_benchmark()
+        print_result(result)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
+        failed = failed_checks(result)
+        if failed:
+            sys.exit(f"FAILED: {', '.join(failed)}")
+        return
+
+    if args.suite:
+        scenarios = SCENARIOS
+    else:
+        scenarios = {f"crops_{args.crops}": (args.crops, args.ticks)}
+
+    results = {}
+    for name, (crops, ticks) in scenarios.items():
+        results[name] = run_scenario(crops, ticks)
+        print(format_result(name, results[name]))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,348 @@
+import ctypes
+import math
+import numpy as np
+from OpenGL.GL import (
+    GL_ALPHA, GL_ARRAY_BUFFER, GL_BLEND, GL_CLAMP_TO_EDGE, GL_COLOR_ARRAY, GL_CURRENT_BIT,
+    GL_DEPTH_TEST, GL_DYNAMIC_DRAW, GL_ENABLE_BIT, GL_FLOAT, GL_LIGHTING, GL_MODELVIEW, GL_NEAREST,
+    GL_ONE_MINUS_SRC_ALPHA, GL_PROJECTION, GL_SRC_ALPHA, GL_TEXTURE_2D, GL_TEXTURE_COORD_ARRAY,
+    GL_TEXTURE_MAG_FILTER, GL_TEXTURE_MIN_FILTER, GL_TEXTURE_WRAP_S, GL_TEXTURE_WRAP_T,
+    GL_TRIANGLES, GL_UNPACK_ALIGNMENT, GL_UNSIGNED_BYTE, GL_VERTEX_ARRAY, glBindBuffer,
+    glBindTexture, glBlendFunc, glBufferData, glColorPointer, glDeleteBuffers, glDeleteTextures,
+    glDisable, glDisableClientState, glDrawArrays, glEnable, glEnableClientState, glGenBuffers,
+    glGenTextures, glLoadIdentity, glMatrixMode, glPixelStorei, glPopAttrib, glPopMatrix,
+    glPushAttrib, glPushMatrix, glTexCoordPointer, glTexImage2D, glTexParameteri, glVertexPointer
+)
+from OpenGL.GLU import gluOrtho2D
+import jobs
+
+
+# Interleaved HUD vertex layout: position (2) + texcoord (2) + color (4)
+HUD_VERTEX_COMPONENTS = 8
+HUD_VERTEX_STRIDE = HUD_VERTEX_COMPONENTS * 4
+HUD_TEXCOORD_OFFSET = 2 * 4
+HUD_COLOR_OFFSET = 4 * 4
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+
+# --------------------
+# Geometry (no GL calls, safe to use headless)
+# --------------------
+class HudGeometry:
+    """Collects colored screen-space triangles and textured text quads.
+
+    Everything is emitted as triangles in the HUD vertex layout, so a whole
+    layer draws with one call for shapes and one for text.
+    """
+
+    def __init__(self):
+        self.shapes = []    # lists of vertex tuples
+        self.text = []
+
+    def rect(self, x, y, width, height, color):
+        self.shapes.extend(_quad(x, y, x + width, y + height, 0, 0, 0, 0, color))
+
+    def outline(self, x, y, width, height, color, line_width=1.0):
+        """Rectangle border as four thin quads centered on the edges (like glLineWidth)."""
+        h = line_width / 2
+        self.rect(x - h, y - h, width + line_width, line_width, color)             # bottom
+        self.rect(x - h, y + height - h, width + line_width, line_width, color)    # top
+        self.rect(x - h, y + h, line_width, height - line_width, color)            # left
+        self.rect(x + width - h, y + h, line_width, height - line_width, color)    # right
+
+    def triangle(self, p0, p1, p2, color):
+        color = _rgba(color)
+        for px, py in (p0, p1, p2):
+            self.shapes.append((px, py, 0, 0) + color)
+
+    def label(self, atlas, text, x, y, color):
+        """Text with its baseline at y, laid out from the glyph atlas."""
+        for x0, y0, x1, y1, u0, v0, u1, v1 in atlas.layout(text, x, y):
+            self.text.extend(_quad(x0, y0, x1, y1, u0, v1, u1, v0, color))
+
+    def arrays(self):
+        """(shape vertices, text vertices) as float32 arrays."""
+        return _to_array(self.shapes), _to_array(self.text)
+
+
+def _rgba(color):
+    return tuple(color) if len(color) == 4 else tuple(color) + (1.0,)
+
+
+def _quad(x0, y0, x1, y1, u0, v0, u1, v1, color):
+    """Two triangles; (u0, v0) maps to the bottom-left corner (x0, y0)."""
+    color = _rgba(color)
+    bl = (x0, y0, u0, v0) + color
+    br = (x1, y0, u1, v0) + color
+    tr = (x1, y1, u1, v1) + color
+    tl = (x0, y1, u0, v1) + color
+    return [bl, br, tr, bl, tr, tl]
+
+
+def _to_array(vertices):
+    if not vertices:
+        return np.empty((0, HUD_VERTEX_COMPONENTS), dtype=np.float32)
+    return np.array(vertices, dtype=np.float32)
+
+
+class GlyphAtlas:
+    """Printable ASCII rendered once with PIL into a single alpha texture."""
+
+    def __init__(self, size=12, first=32, last=126, columns=16):
+        from PIL import Image, ImageDraw, ImageFont
+        try:
+            font = ImageFont.load_default(size=size)
+        except TypeError:
+            font = ImageFont.load_default()     # Pillow < 10.1: fixed bitmap font
+
+        if hasattr(font, 'getmetrics'):
+            self.ascent, self.descent = font.getmetrics()
+        else:
+            self.ascent, self.descent = font.getbbox('Ay')[3], 0
+        self.first = first
+        chars = [chr(code) for code in range(first, last + 1)]
+        self.advances = [int(math.ceil(font.getlength(ch))) for ch in chars]
+
+        self.cell_width = max(self.advances) + 1
+        self.cell_height = self.ascent + self.descent
+        rows = (len(chars) + columns - 1) // columns
+        image = Image.new('L', (columns * self.cell_width, rows * self.cell_height), 0)
+        draw = ImageDraw.Draw(image)
+        self.cells = []
+        for i, ch in enumerate(chars):
+            row, col = divmod(i, columns)
+            left, top = col * self.cell_width, row * self.cell_height
+            draw.text((left, top), ch, fill=255, font=font)
+            self.cells.append((left, top))
+
+        # Rows are uploaded top first, so image row r sits at v = r / height
+        self.pixels = np.ascontiguousarray(np.asarray(image, dtype=np.uint8))
+        self.height, self.width = self.pixels.shape
+        self.texture_id = None
+
+    def text_width(self, text):
+        return sum(self.advance(ch) for ch in text)
+
+    def advance(self, ch):
+        index = ord(ch) - self.first
+        if 0 <= index < len(self.advances):
+            return self.advances[index]
+        return self.advances[0]
+
+    def layout(self, text, x, y):
+        """Yield (x0, y0, x1, y1, u0, v0, u1, v1) per glyph; v0 is the glyph's top."""
+        for ch in text:
+            index = ord(ch) - self.first
+            if not 0 <= index < len(self.cells):
+                index = 0
+            advance = self.advances[index]
+            if ch != ' ':
+                left, top = self.cells[index]
+                yield (x, y - self.descent, x + advance, y + self.ascent,
+                       left / self.width, top / self.height,
+                       (left + advance) / self.width, (top + self.cell_height) / self.height)
+            x += advance
+
+    def upload(self):
+        self.texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, self.width, self.height, 0,
+                     GL_ALPHA, GL_UNSIGNED_BYTE, self.pixels)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def bind(self):
+        if self.texture_id is None:
+            self.upload()
+        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+
+    def release(self):
+        if self.texture_id is not None:
+            glDeleteTextures([self.texture_id])
+            self.texture_id = None
+
+
+# Shared atlas, created on first use or by preload_default_atlas()
+_default_atlas = None
+_atlas_job = None
+
+
+def preload_default_atlas():
+    """Start rendering the shared atlas (PIL) as a background job."""
+    global _atlas_job
+    if _default_atlas is None and _atlas_job is None:
+        _atlas_job = jobs.job_system.submit(GlyphAtlas, priority=jobs.HIGH)
+
+
+def default_atlas(wait=True):
+    """The shared atlas; None while it is still being preloaded and wait is False."""
+    global _default_atlas, _atlas_job
+    if _default_atlas is None and _atlas_job is not None:
+        if not wait and not _atlas_job.finished.is_set():
+            return None
+        try:
+            _default_atlas = _atlas_job.result()
+        except Exception:
+            pass    # cancelled or failed: build it here instead
+        _atlas_job = None
+    if _default_atlas is None:
+        _default_atlas = GlyphAtlas()
+    return _default_atlas
+
+
+# --------------------
+# GPU side
+# --------------------
+class HudBuffer:
+    """A vertex buffer of HUD triangles, re-uploaded only when replaced."""
+
+    def __init__(self):
+        self.vbo = None
+        self.vertex_count = 0
+        self.pending = None
+
+    def set(self, vertices):
+        self.pending = vertices
+
+    def draw(self):
+        if self.pending is not None:
+            if self.vbo is None:
+                self.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.pending.nbytes, self.pending, GL_DYNAMIC_DRAW)
+            self.vertex_count = len(self.pending)
+            self.pending = None
+        if self.vertex_count == 0:
+            return
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, HUD_VERTEX_STRIDE, ctypes.c_void_p(0))
+        glTexCoordPointer(2, GL_FLOAT, HUD_VERTEX_STRIDE, ctypes.c_void_p(HUD_TEXCOORD_OFFSET))
+        glColorPointer(4, GL_FLOAT, HUD_VERTEX_STRIDE, ctypes.c_void_p(HUD_COLOR_OFFSET))
+        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+        self.vbo = None
+        self.vertex_count = 0
+
+
+def begin_2d(width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """Switch to a pixel-space orthographic projection for HUD drawing."""
+    glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+    glDisable(GL_LIGHTING)
+    glDisable(GL_DEPTH_TEST)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, width, 0, height)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+
+def end_2d():
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glPopAttrib()
+
+
+class HudLayer:
+    """Draws a set of HUD elements in one 2D pass.
+
+    Static geometry of all elements is built once into one buffer. Each
+    element's dynamic geometry is rebuilt only while it is marked dirty
+    (see ui.HudElement), after which the dynamic buffers are re-uploaded.
+    Shapes draw in two calls (static, dynamic) and all text in one.
+    """
+
+    def __init__(self, elements=(), atlas=None, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.elements = list(elements)
+        self.atlas = atlas
+        self.width = width
+        self.height = height
+        self.static_shapes = HudBuffer()
+        self.dynamic_shapes = HudBuffer()
+        self.text = HudBuffer()
+        self.static_text = None     # cached static text vertices
+        self.layout_dirty = True
+        self.rebuilds = 0           # dynamic rebuilds so far, for profiling
+
+    def add(self, element):
+        self.elements.append(element)
+        self.layout_dirty = True
+
+    def remove(self, element):
+        self.elements.remove(element)
+        self.layout_dirty = True
+
+    def get_atlas(self, wait=True):
+        if self.atlas is None:
+            self.atlas = default_atlas(wait)
+        return self.atlas
+
+    def update_geometry(self):
+        """Rebuild whatever changed; returns True if any buffer was replaced."""
+        atlas = self.get_atlas()
+        changed = self.layout_dirty
+        if self.layout_dirty:
+            shapes, texts = [], []
+            for element in self.elements:
+                element_shapes, element_text = element.static_geometry(atlas)
+                shapes.append(element_shapes)
+                texts.append(element_text)
+            self.static_shapes.set(np.concatenate(shapes) if shapes else _to_array([]))
+            self.static_text = np.concatenate(texts) if texts else _to_array([])
+            self.layout_dirty = False
+
+        for element in self.elements:
+            if element.dirty:
+                element.rebuild_dynamic(atlas)
+                self.rebuilds += 1
+                changed = True
+
+        if changed:
+            shapes = [element.dynamic_shapes for element in self.elements]
+            texts = [self.static_text] + [element.dynamic_text for element in self.elements]
+            self.dynamic_shapes.set(np.concatenate(shapes) if shapes else _to_array([]))
+            self.text.set(np.concatenate(texts))
+        return changed
+
+    def draw(self):
+        if self.get_atlas(wait=False) is None:
+            return      # first frames: the HUD appears once its font is ready
+        self.update_geometry()
+        begin_2d(self.width, self.height)
+        self.static_shapes.draw()
+        self.dynamic_shapes.draw()
+        glEnable(GL_TEXTURE_2D)
+        self.get_atlas().bind()
+        self.text.draw()
+        glBindTexture(GL_TEXTURE_2D, 0)
+        end_2d()
+
+    def release(self):
+        for buffer in (self.static_shapes, self.dynamic_shapes, self.text):
+            buffer.release()
+        self.layout_dirty = True
+        for element in self.elements:
+            element.dirty = True
@@ -0,0 +1,414 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import (
+    GL_ARRAY_BUFFER, GL_DYNAMIC_DRAW, GL_ELEMENT_ARRAY_BUFFER, GL_FALSE, GL_FLOAT,
+    GL_FRAGMENT_SHADER, GL_LINK_STATUS, GL_STREAM_DRAW, GL_TRIANGLES, GL_UNSIGNED_INT,
+    GL_VERTEX_SHADER, glAttachShader, glBindAttribLocation, glBindBuffer, glBufferData,
+    glBufferSubData, glCreateProgram, glDeleteBuffers, glDeleteProgram, glDeleteShader,
+    glDisableVertexAttribArray, glDrawElementsInstanced, glEnableVertexAttribArray, glGenBuffers,
+    glGetProgramInfoLog, glGetProgramiv, glLinkProgram, glUseProgram, glVertexAttribDivisor,
+    glVertexAttribPointer
+)
+import crop_field
+import events
+from profiler import profiler
+from mesh import Mesh, build_sphere, VERTEX_STRIDE, NORMAL_OFFSET
+
+
+# Per-instance layout: offset (3) + scale (3) + color (3)
+INSTANCE_COMPONENTS = 9
+INSTANCE_STRIDE = INSTANCE_COMPONENTS * 4
+SCALE_OFFSET = 3 * 4
+COLOR_OFFSET = 6 * 4
+
+# Attribute locations bound before linking
+ATTRIB_POSITION = 0
+ATTRIB_NORMAL = 1
+ATTRIB_OFFSET = 2
+ATTRIB_SCALE = 3
+ATTRIB_COLOR = 4
+
+
+# --------------------
+# Stage buckets (pure numpy, safe to use headless)
+# --------------------
+class StageBuckets:
+    """Crop instances packed into one array per growth stage.
+
+    Mirrors a CropField: every live crop owns one row in the bucket of its
+    stage. sync() applies the field's dirty slots, moving crops between
+    buckets (swap-remove + append) and rewriting rows in place, and records
+    the range of rows per bucket that a renderer has to re-upload.
+    """
+
+    def __init__(self, field=None, stage_count=crop_field.MAX_STAGE + 1, footprint=(1.0, 1.0)):
+        self.field = field if field is not None else crop_field.default_field
+        self.stage_count = stage_count
+        self.footprint = footprint      # X/Z scale (Crop's default width and depth)
+        self.generation = None
+        self.version = 0                # bumped whenever any bucket changes
+        self.reset()
+
+    def reset(self):
+        self.version += 1
+        self.data = [np.zeros((64, INSTANCE_COMPONENTS), dtype=np.float32) for _ in range(self.stage_count)]
+        self.members = [np.zeros(64, dtype=np.intp) for _ in range(self.stage_count)]  # row -> field slot
+        self.counts = [0] * self.stage_count
+        self.dirty_ranges = [None] * self.stage_count   # (first, end) rows to upload
+        self.slot_of = np.full(self.field.capacity, -1, dtype=np.intp)    # field slot -> row
+        self.stage_of = np.full(self.field.capacity, -1, dtype=np.int8)   # field slot -> bucket
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def instances(self, stage):
+        """Packed instance rows currently drawn for a stage."""
+        return self.data[stage][:self.counts[stage]]
+
+    def mark_rows(self, stage, first, end):
+        if end <= first:
+            return
+        current = self.dirty_ranges[stage]
+        if current is not None:
+            first, end = min(first, current[0]), max(end, current[1])
+        self.dirty_ranges[stage] = (first, end)
+
+    def take_dirty_ranges(self):
+        """{stage: (first, end)} rows changed since the last call."""
+        ranges = {stage: r for stage, r in enumerate(self.dirty_ranges) if r is not None}
+        self.dirty_ranges = [None] * self.stage_count
+        return ranges
+
+    def reserve(self, stage, needed):
+        capacity = len(self.members[stage])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        data = np.zeros((capacity, INSTANCE_COMPONENTS), dtype=np.float32)
+        members = np.zeros(capacity, dtype=np.intp)
+        count = self.counts[stage]
+        data[:count] = self.data[stage][:count]
+        members[:count] = self.members[stage][:count]
+        self.data[stage] = data
+        self.members[stage] = members
+
+    def fill_rows(self, rows, slots):
+        """Write offset/scale/color for field slots into instance rows."""
+        field = self.field
+        rows[:, 0:3] = field.positions[slots]
+        rows[:, 3] = self.footprint[0]
+        rows[:, 4] = field.heights[slots]
+        rows[:, 5] = self.footprint[1]
+        rows[:, 6:9] = field.colors[slots]
+
+    def sync(self):
+        """Bring the buckets up to date with the field; returns the slots applied."""
+        field = self.field
+        if self.generation != field.generation:
+            self.generation = field.generation
+            self.reset()
+            field.dirty[:field.count] = True
+            field.any_dirty = True
+        if len(self.slot_of) < field.capacity:
+            grown = field.capacity - len(self.slot_of)
+            self.slot_of = np.concatenate([self.slot_of, np.full(grown, -1, dtype=np.intp)])
+            self.stage_of = np.concatenate([self.stage_of, np.full(grown, -1, dtype=np.int8)])
+
+        slots = field.take_dirty()
+        if len(slots) == 0:
+            return slots
+        self.version += 1
+
+        old = self.stage_of[slots]
+        new = np.where(field.alive[slots], field.stages[slots], -1).astype(np.int8)
+
+        for stage in range(self.stage_count):
+            # Rows that stay in this bucket are rewritten in place
+            staying = slots[(old == stage) & (new == stage)]
+            if len(staying):
+                rows = self.slot_of[staying]
+                block = np.empty((len(staying), INSTANCE_COMPONENTS), dtype=np.float32)
+                self.fill_rows(block, staying)
+                self.data[stage][rows] = block
+                self.mark_rows(stage, int(rows.min()), int(rows.max()) + 1)
+
+            leaving = slots[(old == stage) & (new != stage)]
+            if len(leaving):
+                self.remove_rows(stage, self.slot_of[leaving])
+                self.slot_of[leaving] = -1
+                self.stage_of[leaving] = -1
+
+        for stage in range(self.stage_count):
+            entering = slots[(new == stage) & (old != stage)]
+            if len(entering):
+                start = self.counts[stage]
+                end = start + len(entering)
+                self.reserve(stage, end)
+                self.fill_rows(self.data[stage][start:end], entering)
+                self.members[stage][start:end] = entering
+                self.slot_of[entering] = np.arange(start, end)
+                self.stage_of[entering] = stage
+                self.counts[stage] = end
+                self.mark_rows(stage, start, end)
+        return slots
+
+    def remove_rows(self, stage, rows):
+        """Vectorized swap-remove: rows past the new end fill the holes."""
+        count = self.counts[stage]
+        new_count = count - len(rows)
+        removed = np.zeros(count, dtype=bool)
+        removed[rows] = True
+        holes = np.flatnonzero(removed[:new_count])
+        fillers = new_count + np.flatnonzero(~removed[new_count:count])
+        data, members = self.data[stage], self.members[stage]
+        data[holes] = data[fillers]
+        members[holes] = members[fillers]
+        self.slot_of[members[holes]] = holes
+        self.counts[stage] = new_count
+        if len(holes):
+            self.mark_rows(stage, int(holes[0]), int(holes[-1]) + 1)
+
+
+# --------------------
+# GPU renderer
+# --------------------
+VERTEX_SHADER = """
+#version 120
+attribute vec3 a_position;
+attribute vec3 a_normal;
+attribute vec3 i_offset;
+attribute vec3 i_scale;
+attribute vec3 i_color;
+varying vec3 v_color;
+
+void main() {
+    vec4 world = vec4(a_position * i_scale + i_offset, 1.0);
+    vec4 eye = gl_ModelViewMatrix * world;
+    gl_Position = gl_ProjectionMatrix * eye;
+
+    // Same terms as fixed-function lighting with GL_COLOR_MATERIAL
+    vec3 normal = normalize(gl_NormalMatrix * (a_normal / i_scale));
+    vec3 to_light = normalize(gl_LightSource[0].position.xyz - eye.xyz);
+    float diffuse = max(dot(normal, to_light), 0.0);
+    vec3 light = gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb
+               + gl_LightSource[0].diffuse.rgb * diffuse;
+    v_color = i_color * light;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_color;
+
+void main() {
+    gl_FragColor = vec4(v_color, 1.0);
+}
+"""
+
+
+class InstancedCropRenderer:
+    """Draws every crop of a field with one instanced call per growth stage.
+
+    Each stage mesh is uploaded once; per-instance offset/scale/color rows
+    come from StageBuckets and only the changed row range is re-uploaded.
+    If instancing or shaders are unavailable, `available` is False and the
+    caller should fall back to drawing crops one by one.
+
+    Given a frustum (and optionally a LodPolicy), instances are culled and
+    split by level of detail; the visible rows are re-packed into stream
+    buffers only when the view or the buckets changed since the last frame.
+    """
+    radius = 0.3    # unscaled crop sphere radius, for culling
+
+    def __init__(self, field=None, stage_meshes=None, lod_meshes=None):
+        self.buckets = StageBuckets(field)
+        if stage_meshes is None:
+            sphere = build_sphere(self.radius, 5, 5)  # the same sphere Crop.render draws at LOD 0
+            stage_meshes = [sphere] * self.buckets.stage_count
+        if lod_meshes is None:
+            lod_meshes = [build_sphere(self.radius, 4, 2), build_sphere(self.radius, 3, 2)]
+        self.meshes = [Mesh(data) for data in stage_meshes]
+        self.lod_meshes = [Mesh(data) for data in lod_meshes]   # shared by all stages
+        self.program = None
+        self.buffers = [None] * self.buckets.stage_count
+        self.buffer_capacity = [0] * self.buckets.stage_count
+        self.streams = {}       # (stage, level) -> [buffer, instance count]
+        self.view_key = None
+        self.available = None   # unknown until the first draw with a GL context
+        self.draw_calls = 0     # instanced draw calls issued last frame
+        self.visible_count = 0
+        self.culled_count = 0
+        self.lod_counts = []
+
+    def initialize(self):
+        from OpenGL.GL import shaders   # only needed once, keep it off the startup path
+        try:
+            if not bool(glDrawElementsInstanced) or not bool(glVertexAttribDivisor):
+                raise RuntimeError("instanced drawing not supported")
+            vertex = shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER)
+            fragment = shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER)
+            program = glCreateProgram()
+            glAttachShader(program, vertex)
+            glAttachShader(program, fragment)
+            for location, name in ((ATTRIB_POSITION, 'a_position'), (ATTRIB_NORMAL, 'a_normal'),
+                                   (ATTRIB_OFFSET, 'i_offset'), (ATTRIB_SCALE, 'i_scale'),
+                                   (ATTRIB_COLOR, 'i_color')):
+                glBindAttribLocation(program, location, name)
+            glLinkProgram(program)
+            if not glGetProgramiv(program, GL_LINK_STATUS):
+                raise RuntimeError(glGetProgramInfoLog(program))
+            glDeleteShader(vertex)
+            glDeleteShader(fragment)
+            self.program = program
+            self.available = True
+        except Exception as error:
+            events.bus.log(f"Instanced crop rendering disabled: {error}", events.WARNING)
+            self.available = False
+        return self.available
+
+    def upload(self):
+        """Sync the buckets and re-upload the changed instance rows."""
+        buckets = self.buckets
+        buckets.sync()
+        if self.view_key is not None:
+            # Coming back from culled drawing: the stage buffers missed updates
+            self.view_key = None
+            buckets.take_dirty_ranges()
+            self.buffer_capacity = [0] * buckets.stage_count
+            for stage in range(buckets.stage_count):
+                buckets.mark_rows(stage, 0, buckets.counts[stage])
+        for stage, (first, end) in buckets.take_dirty_ranges().items():
+            data = buckets.data[stage]
+            if self.buffers[stage] is None:
+                self.buffers[stage] = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[stage])
+            if self.buffer_capacity[stage] < len(data):
+                # Bucket grew: reallocate and send everything in use
+                glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
+                self.buffer_capacity[stage] = len(data)
+            else:
+                rows = data[first:end]
+                glBufferSubData(GL_ARRAY_BUFFER, first * INSTANCE_STRIDE, rows.nbytes, rows)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.visible_count = len(buckets)
+        self.culled_count = 0
+        self.lod_counts = [len(buckets)]
+        return [(self.meshes[stage], self.buffers[stage], buckets.counts[stage])
+                for stage in range(buckets.stage_count)]
+
+    def select_visible(self, frustum, lod=None):
+        """Per (stage, level), the packed rows of instances inside the frustum."""
+        buckets = self.buckets
+        level_count = lod.level_count if lod is not None else 1
+        selections = {}
+        self.lod_counts = [0] * level_count
+        self.visible_count = 0
+        self.culled_count = 0
+        for stage in range(buckets.stage_count):
+            rows = buckets.instances(stage)
+            centers = rows[:, 0:3]
+            inside = frustum.test_spheres(centers, self.radius * rows[:, 3:6].max(axis=1))
+            if lod is not None:
+                levels = lod.levels(centers, frustum.eye)
+            else:
+                levels = np.zeros(len(rows), dtype=np.intp)
+            for level in range(level_count):
+                selected = rows[inside & (levels == level)]
+                selections[(stage, level)] = selected
+                self.lod_counts[level] += len(selected)
+            visible = int(inside.sum())
+            self.visible_count += visible
+            self.culled_count += len(rows) - visible
+        return selections
+
+    def upload_visible(self, frustum, lod=None):
+        """Re-pack and upload visible instances if the view or buckets changed."""
+        buckets = self.buckets
+        buckets.sync()
+        buckets.take_dirty_ranges()     # stage buffers are refreshed when culling stops
+        key = (frustum.key, None if lod is None else lod.distances.tobytes(), buckets.version)
+        if key != self.view_key:
+            self.view_key = key
+            for stream_key, rows in self.select_visible(frustum, lod).items():
+                stream = self.streams.get(stream_key)
+                if stream is None:
+                    stream = self.streams[stream_key] = [glGenBuffers(1), 0]
+                stream[1] = len(rows)
+                if len(rows):
+                    glBindBuffer(GL_ARRAY_BUFFER, stream[0])
+                    glBufferData(GL_ARRAY_BUFFER, rows.nbytes, rows, GL_STREAM_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        batches = []
+        for (stage, level), (buffer, count) in self.streams.items():
+            mesh = self.meshes[stage] if level == 0 else self.lod_meshes[min(level, len(self.lod_meshes)) - 1]
+            batches.append((mesh, buffer, count))
+        return batches
+
+    def draw(self, frustum=None, lod=None):
+        """Draw the whole field. Returns False if the caller must fall back."""
+        if self.available is None:
+            self.initialize()
+        if not self.available:
+            return False
+
+        if frustum is None:
+            batches = self.upload()
+        else:
+            batches = self.upload_visible(frustum, lod)
+        self.draw_calls = 0
+        glUseProgram(self.program)
+        for attrib in (ATTRIB_POSITION, ATTRIB_NORMAL, ATTRIB_OFFSET, ATTRIB_SCALE, ATTRIB_COLOR):
+            glEnableVertexAttribArray(attrib)
+        for attrib in (ATTRIB_OFFSET, ATTRIB_SCALE, ATTRIB_COLOR):
+            glVertexAttribDivisor(attrib, 1)
+
+        for mesh, buffer, count in batches:
+            if count == 0:
+                continue
+            if mesh.vbo is None:
+                mesh.upload()
+
+            glBindBuffer(GL_ARRAY_BUFFER, mesh.vbo)
+            glVertexAttribPointer(ATTRIB_POSITION, 3, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, ctypes.c_void_p(0))
+            glVertexAttribPointer(ATTRIB_NORMAL, 3, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, ctypes.c_void_p(NORMAL_OFFSET))
+
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glVertexAttribPointer(ATTRIB_OFFSET, 3, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(0))
+            glVertexAttribPointer(ATTRIB_SCALE, 3, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(SCALE_OFFSET))
+            glVertexAttribPointer(ATTRIB_COLOR, 3, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(COLOR_OFFSET))
+
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, mesh.ibo)
+            glDrawElementsInstanced(GL_TRIANGLES, mesh.data.element_count, GL_UNSIGNED_INT,
+                                    ctypes.c_void_p(0), count)
+            self.draw_calls += 1
+            profiler.count('draw_calls')
+            profiler.count('vertices', mesh.data.element_count * count)
+
+        for attrib in (ATTRIB_OFFSET, ATTRIB_SCALE, ATTRIB_COLOR):
+            glVertexAttribDivisor(attrib, 0)
+        for attrib in (ATTRIB_POSITION, ATTRIB_NORMAL, ATTRIB_OFFSET, ATTRIB_SCALE, ATTRIB_COLOR):
+            glDisableVertexAttribArray(attrib)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+        return True
+
+    def release(self):
+        """Free the instance buffers, stage meshes and shader program."""
+        buffers = [b for b in self.buffers if b is not None]
+        buffers += [stream[0] for stream in self.streams.values()]
+        if buffers:
+            glDeleteBuffers(len(buffers), buffers)
+        self.buffers = [None] * self.buckets.stage_count
+        self.buffer_capacity = [0] * self.buckets.stage_count
+        self.streams = {}
+        self.view_key = None
+        for mesh in self.meshes + self.lod_meshes:
+            mesh.release()
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
+        self.available = None
+        self.buckets.generation = None  # full re-upload on next draw
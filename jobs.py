@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+import events
+
+
+# Priorities: lower runs first
+HIGH = 0
+NORMAL = 10
+LOW = 20
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+
+
+class Job:
+    """A unit of work submitted to a JobSystem; also its future.
+
+    `state` goes pending -> running -> done, or to cancelled. result()
+    blocks until the job is done and returns its value or raises its error.
+    """
+    __slots__ = ('system', 'function', 'args', 'priority', 'on_complete', 'state', 'value', 'error',
+                 'finished')
+
+    def __init__(self, system, function, args, priority, on_complete):
+        self.system = system
+        self.function = function
+        self.args = args
+        self.priority = priority
+        self.on_complete = on_complete
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.finished = threading.Event()
+
+    def done(self):
+        return self.state == DONE
+
+    def cancel(self):
+        return self.system.cancel(self)
+
+    def cancelled(self):
+        return self.state == CANCELLED
+
+    def result(self, timeout=None):
+        if not self.finished.wait(timeout):
+            raise TimeoutError("job did not finish in time")
+        if self.state == CANCELLED:
+            raise RuntimeError("job was cancelled")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        return f"Job({getattr(self.function, '__name__', self.function)}, {self.state}, priority={self.priority})"
+
+
+class JobSystem:
+    """Thread pool for work that must stay off the GLUT loop.
+
+    submit() queues a function by priority and returns its Job. Worker
+    threads only run the function; its on_complete(job) callback is queued
+    and runs on the thread that owns the system (the main thread) when it
+    calls run_completed(), once per frame, so callbacks are where GL calls
+    and game objects are touched. cancel() on a pending job keeps it from
+    running at all; on a running job, it drops the result and callback.
+
+    With workers=0 jobs run inside submit() and their callbacks right after,
+    for tools that want everything on one thread.
+    """
+
+    def __init__(self, workers=2, name='jobs'):
+        self.workers = workers
+        self.name = name
+        self.owner = threading.current_thread()
+        self.queue = []                 # (priority, sequence, job)
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.completed = deque()        # finished jobs waiting for their callback
+        self.threads = []
+        self.running = 0
+        self.stopping = False
+        self.submitted = 0
+        self.finished = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def on_owner_thread(self):
+        return threading.current_thread() is self.owner
+
+    # --------------------
+    # Any thread
+    # --------------------
+    def submit(self, function, *args, priority=NORMAL, on_complete=None):
+        """Queue function(*args); returns its Job."""
+        job = Job(self, function, args, priority, on_complete)
+        if self.workers <= 0:
+            self.submitted += 1
+            self.run_job(job)
+            self.run_completed()
+            return job
+        with self.lock:
+            if self.stopping:
+                raise RuntimeError(f"{self.name}: job system is shut down")
+            self.submitted += 1
+            heapq.heappush(self.queue, (priority, next(self.sequence), job))
+            if len(self.threads) < self.workers and len(self.threads) < len(self.queue) + self.running:
+                self.start_thread()
+            self.wakeup.notify()
+        return job
+
+    def cancel(self, job):
+        """Cancel a job; returns False if it already finished."""
+        with self.lock:
+            if job.state in (DONE, CANCELLED):
+                return False
+            job.state = CANCELLED
+            self.cancelled += 1
+        job.finished.set()
+        return True
+
+    # --------------------
+    # Worker threads
+    # --------------------
+    def start_thread(self):
+        thread = threading.Thread(target=self.run_worker, name=f"{self.name}-{len(self.threads)}", daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def run_worker(self):
+        while True:
+            with self.lock:
+                while not self.queue and not self.stopping:
+                    self.wakeup.wait()
+                if not self.queue:
+                    return
+                _, _, job = heapq.heappop(self.queue)
+                if job.state != PENDING:
+                    continue    # cancelled while queued
+                job.state = RUNNING
+                self.running += 1
+            self.run_job(job)
+            with self.lock:
+                self.running -= 1
+
+    def run_job(self, job):
+        if job.state == PENDING:
+            job.state = RUNNING
+        try:
+            job.value = job.function(*job.args)
+        except Exception as error:
+            job.error = error
+        with self.lock:
+            if job.state == CANCELLED:
+                return
+            job.state = DONE
+            self.finished += 1
+            if job.error is not None:
+                self.failed += 1
+            self.completed.append(job)
+        job.finished.set()
+
+    # --------------------
+    # Owner (main) thread
+    # --------------------
+    def run_completed(self, limit=None, budget=None):
+        """Run callbacks of finished jobs, at most `limit` of them or for `budget` seconds.
+
+        Returns how many ran. Only the owner thread may call this.
+        """
+        if not self.on_owner_thread():
+            raise RuntimeError(f"{self.name}: completions must run on {self.owner.name}")
+        deadline = time.perf_counter() + budget if budget is not None else None
+        ran = 0
+        while self.completed and (limit is None or ran < limit):
+            job = self.completed.popleft()
+            ran += 1
+            if job.on_complete is not None:
+                job.on_complete(job)
+            elif job.error is not None:
+                events.bus.log(f"Job {job!r} failed: {job.error}", events.ERROR)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return ran
+
+    def wait(self, jobs, timeout=None):
+        """Block until every job in `jobs` has finished, then run the completions."""
+        for job in list(jobs):
+            job.finished.wait(timeout)
+        self.run_completed()
+
+    def shutdown(self, cancel_pending=True):
+        """Stop the workers once the running jobs are done; queued ones are cancelled."""
+        with self.lock:
+            self.stopping = True
+            if cancel_pending:
+                for _, _, job in self.queue:
+                    if job.state == PENDING:
+                        job.state = CANCELLED
+                        self.cancelled += 1
+                        job.finished.set()
+                self.queue = []
+            self.wakeup.notify_all()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def stats(self):
+        with self.lock:
+            queued = sum(1 for _, _, job in self.queue if job.state == PENDING)
+            running = self.running
+        return {
+            'threads': len(self.threads),
+            'queued': queued,
+            'running': running,
+            'awaiting_callback': len(self.completed),
+            'submitted': self.submitted,
+            'finished': self.finished,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+        }
+
+
+# Shared by the game's loaders; completions are run by main.game_loop
+job_system = JobSystem(workers=2)
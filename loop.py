@@ -0,0 +1,76 @@
+import time
+
+
+class FixedTimestepLoop:
+    """Accumulator-based scheduler that steps the simulation at a fixed rate.
+
+    Rendering calls frame() once per displayed frame; the loop runs as many
+    fixed steps as real time demands (up to max_steps_per_frame) and exposes
+    `alpha`, the fraction of a step left in the accumulator, for
+    interpolating render state between the last two simulation states.
+    The loop never touches GL, so it can run headless.
+    """
+
+    def __init__(self, step, tick_rate=60, max_steps_per_frame=5, max_fps=None,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.step = step                      # callable(delta_time)
+        self.delta_time = 1.0 / tick_rate
+        self.max_steps_per_frame = max_steps_per_frame
+        self.max_fps = max_fps                # None = render as fast as possible
+        self.clock = clock
+        self.sleep = sleep
+
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.tick = 0                         # simulation steps run so far
+        self.sim_time = 0.0                   # simulated seconds
+        self.dropped_time = 0.0               # real time skipped by the catch-up cap
+        self.last_time = None
+        self.frame_start = None
+
+    def advance(self, elapsed):
+        """Feed `elapsed` real seconds and run the fixed steps that are due."""
+        self.accumulator += max(0.0, elapsed)
+
+        steps = 0
+        while self.accumulator >= self.delta_time and steps < self.max_steps_per_frame:
+            self.run_step()
+            self.accumulator -= self.delta_time
+            steps += 1
+
+        # Too far behind: give up on the backlog instead of spiralling
+        if self.accumulator >= self.delta_time:
+            backlog = self.accumulator - (self.accumulator % self.delta_time)
+            self.dropped_time += backlog
+            self.accumulator -= backlog
+
+        self.alpha = self.accumulator / self.delta_time
+        return steps
+
+    def frame(self):
+        """Advance by the real time since the previous frame. Returns steps run."""
+        now = self.clock()
+        self.frame_start = now
+        if self.last_time is None:
+            self.last_time = now
+        elapsed = now - self.last_time
+        self.last_time = now
+        return self.advance(elapsed)
+
+    def run_step(self):
+        self.step(self.delta_time)
+        self.tick += 1
+        self.sim_time += self.delta_time
+
+    def run(self, ticks):
+        """Run `ticks` fixed steps back to back, ignoring real time (headless)."""
+        for _ in range(ticks):
+            self.run_step()
+
+    def wait_for_next_frame(self):
+        """Sleep off the rest of the frame budget when max_fps is set."""
+        if not self.max_fps or self.frame_start is None:
+            return
+        remaining = 1.0 / self.max_fps - (self.clock() - self.frame_start)
+        if remaining > 0:
+            self.sleep(remaining)
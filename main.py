@@ -1,23 +1,74 @@
 import sys
+import os
 import math
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
-from ui import *
-from floor import *
-from crop import *
-from building import *
+import argparse
+import time
+from OpenGL.GL import (
+    GL_AMBIENT, GL_COLOR_BUFFER_BIT, GL_COLOR_MATERIAL, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST,
+    GL_DIFFUSE, GL_LIGHT0, GL_LIGHTING, GL_MODELVIEW, GL_POSITION, GL_PROJECTION, GL_SPECULAR,
+    glClear, glClearColor, glEnable, glLightfv, glLoadIdentity, glMatrixMode
+)
+from OpenGL.GLU import gluLookAt, gluPerspective
+from OpenGL.GLUT import (
+    GLUT_ACTION_GLUTMAINLOOP_RETURNS, GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_CURSOR_LEFT_ARROW,
+    GLUT_CURSOR_NONE, GLUT_DEPTH, GLUT_DOUBLE, GLUT_RGB, glutCreateWindow, glutDisplayFunc,
+    glutIdleFunc, glutInit, glutInitDisplayMode, glutInitWindowPosition, glutInitWindowSize,
+    glutKeyboardFunc, glutKeyboardUpFunc, glutMainLoop, glutMotionFunc, glutPassiveMotionFunc,
+    glutSetCursor, glutSetOption, glutSwapBuffers, glutWarpPointer
+)
+from ui import HealthBar, EnergyBar, HouseIcon, CropGrowthBar, ProfilerOverlay
+from floor import Floor, draw_sun
+from crop import Crop
+from building import Building
 from player import Player
 from physics_object import Vector3
-import time
+from loop import FixedTimestepLoop
+from systems import (
+    Registry, EntityList, GrowthSystem, PhysicsSystem, ShardedSimulationSystem, create_default_systems,
+    SIMULATION, RENDER
+)
+from spatial import SpatialHash
+from collision import CollisionSystem
+from instancing import InstancedCropRenderer
+from culling import Frustum, LodPolicy
+from hud import HudLayer, preload_default_atlas
+from profiler import profiler
+from texture import texture_manager
+from chunks import ChunkManager, ChunkStore, ChunkData, chunk_key
+import crop_field
+import events
+import jobs
+import physics_world
+import replay
+import savefile
 
 # Global game state
 game_state = {
     'ui_entities': [],
     'world_entities': [],
+    'spatial_index': None,
+    'collision_system': None,
+    'crop_renderer': None,
+    'frustum': None,
+    'lod_policy': LodPolicy(distances=(25.0, 50.0)),
+    'render_stats': {},
+    'hud_layer': None,
+    'chunks': None,
+    'chunk_metrics': {},
+    'sharding': None,
+    'save_job': None,
+    'profiler_overlay': None,
+    'first_frame_ms': None,
     'systems': [],
+    'registry': None,
+    'pending_actions': [],
     'player': None,
+    'loop': None,
+    'tick': 0,
+    'recorder': None,
+    'replayer': None,
     'elapsed_sec': 0,
+    'render_alpha': 0.0,
     'camera_position': [5.0, 5.0, 15.0],
     'camera_target': [0.0, 0.0, 0.0],
     'camera_up': [0.0, 1.0, 0.0],
@@ -28,8 +79,26 @@ game_state = {
 }
 
 
-DELTA_TIME = 1.0 / 60.0  # 60 FPS
-start_time = time.time()
+TICK_RATE = 60  # Simulation steps per second
+DELTA_TIME = 1.0 / TICK_RATE
+MAX_STEPS_PER_FRAME = 5  # Catch-up cap after slow frames
+MAX_FPS = 120  # Frame limiter (None = uncapped)
+
+# Perspective used for the projection matrix and for frustum culling
+FIELD_OF_VIEW = 45.0
+ASPECT_RATIO = 800.0 / 600.0
+NEAR_PLANE = 0.5
+FAR_PLANE = 100.0
+
+# World streaming (enabled with --chunks DIR)
+CHUNK_SIZE = 32.0
+CHUNK_LOAD_RADIUS = 2
+CHUNK_MEMORY_BUDGET = 64 * 1024 * 1024
+
+SAVE_PATH = "farm.sav"  # quick save written with the 'k' key
+PROFILE_TRACE_PATH = "profile.json"  # Chrome trace written with the 'o' key
+JOB_FRAME_BUDGET = 0.004  # seconds per frame for finished background jobs (texture uploads, chunks)
+start_time = time.perf_counter()  # after imports; see headless.py --startup
 
 
 def setup_lighting():
@@ -55,7 +124,7 @@ def setup_projection():
     """Configure OpenGL projection matrix."""
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(45.0, 800.0 / 600.0, 0.5, 100.0)
+    gluPerspective(FIELD_OF_VIEW, ASPECT_RATIO, NEAR_PLANE, FAR_PLANE)
     glMatrixMode(GL_MODELVIEW)
 
 
@@ -67,6 +136,27 @@ def setup_opengl():
     setup_projection()
 
 
+def interpolate_camera():
+    """Place the camera behind the player's position blended between sim steps."""
+    player = game_state['player']
+    if player:
+        player.update_camera(
+            game_state['camera_position'],
+            game_state['camera_target'],
+            player.interpolated_position(game_state['render_alpha'])
+        )
+
+
+def update_frustum():
+    """Rebuild the culling frustum from the current camera."""
+    game_state['frustum'] = Frustum.from_camera(
+        game_state['camera_position'],
+        game_state['camera_target'],
+        game_state['camera_up'],
+        FIELD_OF_VIEW, ASPECT_RATIO, NEAR_PLANE, FAR_PLANE
+    )
+
+
 def set_camera_view():
     """Set up the camera view matrix."""
     gluLookAt(
@@ -83,16 +173,18 @@ def render_scene():
 
     glLoadIdentity()
     
+    interpolate_camera()
+    update_frustum()
     set_camera_view()
     
-    for entity in game_state['ui_entities']:
-        entity.draw()
-    for entity in game_state['world_entities']:
-        entity.draw()
-    
-    draw_sun(game_state)
+    with profiler.scope('render'):
+        game_state['systems'].run(RENDER, game_state, game_state['render_alpha'])
+
+    with profiler.scope('draw_sun'):
+        draw_sun(game_state)
 
-    glutSwapBuffers()
+    with profiler.scope('swap_buffers'):
+        glutSwapBuffers()
 
 
 
@@ -110,25 +202,43 @@ def handle_special_events():
     # harvest update
     # etc
 
-def update_player(delta_time):
-    """Update player movement and state."""
-    player = game_state['player']
-    if player:
-        player.update_movement(
-            delta_time,
-            game_state['camera_position'],
-            game_state['camera_target'],
-            game_state['camera_up']
-        )
-
-
 def update_game(delta_time):
     """Update all game systems."""
     global game_state
     
     handle_special_events()
-    update_player(delta_time)
-    
+    game_state['systems'].run(SIMULATION, game_state, delta_time)
+
+
+def step_simulation(delta_time):
+    """Run one fixed simulation step (no GL calls, safe to run headless)."""
+    tick = game_state['tick']
+    if game_state['replayer'] is not None:
+        game_state['replayer'].feed(tick, game_state)
+        if game_state['replayer'].finished:
+            finish_replay()
+    if game_state['recorder'] is not None:
+        game_state['recorder'].checkpoint(tick, game_state)
+    player = game_state['player']
+    if player:
+        player.save_previous_state()
+    update_game(delta_time)
+    game_state['elapsed_sec'] += delta_time
+    game_state['tick'] += 1
+
+
+def create_simulation_loop(max_fps=MAX_FPS):
+    """Create the fixed-timestep scheduler driving step_simulation."""
+    return FixedTimestepLoop(
+        step_simulation,
+        tick_rate=TICK_RATE,
+        max_steps_per_frame=MAX_STEPS_PER_FRAME,
+        max_fps=max_fps
+    )
+
+
+def update_cursor():
+    """Show or hide the mouse cursor depending on mouse-look mode."""
     if(game_state['mouse_initialized']):
         glutSetCursor(GLUT_CURSOR_NONE)
     else:
@@ -137,9 +247,43 @@ def update_game(delta_time):
 
 def game_loop():
     """Main game loop called by GLUT idle function."""
-    update_game(DELTA_TIME)
+    loop = game_state['loop']
+    profiler.begin_frame()
+    with profiler.scope('update_game'):
+        loop.frame()
+    game_state['render_alpha'] = loop.alpha
+    update_cursor()
+    with profiler.scope('jobs'):
+        jobs.job_system.run_completed(budget=JOB_FRAME_BUDGET)
+    if game_state['profiler_overlay'] is not None:
+        game_state['profiler_overlay'].update()
     render_scene()
     update_timer()
+    events.bus.flush()
+    profiler.end_frame()
+    if game_state['first_frame_ms'] is None:
+        game_state['first_frame_ms'] = 1000.0 * (time.perf_counter() - start_time)
+        events.bus.log(f"First frame {game_state['first_frame_ms']:.0f} ms after startup")
+    loop.wait_for_next_frame()
+
+
+def toggle_profiler_overlay():
+    """Show or hide the profiler overlay on the HUD."""
+    overlay = game_state['profiler_overlay']
+    hud_layer = game_state['hud_layer']
+    if overlay is None:
+        overlay = ProfilerOverlay(profiler)
+        game_state['profiler_overlay'] = overlay
+        hud_layer.add(overlay)
+    else:
+        game_state['profiler_overlay'] = None
+        hud_layer.remove(overlay)
+
+
+def export_profile(path=PROFILE_TRACE_PATH):
+    """Write the buffered profiler frames as a Chrome trace."""
+    profiler.export_chrome_trace(path)
+    events.bus.log(f"Wrote profile trace to {path}")
 
 
 def handle_keyboard_down(key, x, y):
@@ -151,15 +295,24 @@ def handle_keyboard_down(key, x, y):
         game_state['mouse_initialized'] = not game_state['mouse_initialized']
     
     if key == b't':
-        print(game_state['elapsed_sec'])
+        events.bus.log(f"Elapsed: {game_state['elapsed_sec']} s")
+
+    if key == b'k':  # Quick save
+        save_game()
+
+    if key == b'p':  # Profiler overlay
+        toggle_profiler_overlay()
+
+    if key == b'o':  # Profiler trace
+        export_profile()
 
     # Movement keys
     if key in [b'w', b'a', b's', b'd'] and player:
         player.set_key_state(key, True)
     
-    # Action keys
+    # Action keys (run by the interaction system on the next tick)
     elif key in [b'e', b'r', b'f'] and player:
-        player.action(key, game_state['world_entities'])
+        game_state['pending_actions'].append(key)
 
 
 def handle_keyboard_up(key, x, y):
@@ -205,6 +358,33 @@ def handle_mouse_movement(x, y):
     # recenter_mouse_if_needed(x, y)
 
 
+def accept_live_input(kind, a=0, b=0):
+    """Whether a live input event should run: not during a replay. Records it when recording."""
+    if game_state['replayer'] is not None:
+        return False
+    if game_state['recorder'] is not None:
+        game_state['recorder'].record(game_state['tick'], kind, a, b)
+    return True
+
+
+def on_keyboard_down(key, x, y):
+    """GLUT keyboard callback."""
+    if accept_live_input(replay.KEY_DOWN, key[0]):
+        handle_keyboard_down(key, x, y)
+
+
+def on_keyboard_up(key, x, y):
+    """GLUT keyboard-up callback."""
+    if accept_live_input(replay.KEY_UP, key[0]):
+        handle_keyboard_up(key, x, y)
+
+
+def on_mouse_movement(x, y):
+    """GLUT motion callback."""
+    if accept_live_input(replay.MOUSE_MOVE, x, y):
+        handle_mouse_movement(x, y)
+
+
 def create_player():
     """Create and return the player entity."""
     return Player(
@@ -214,20 +394,263 @@ def create_player():
     )
 
 
-def create_world_entities():
-    """Create and return world entities."""
+def create_world_entities(load_textures=True):
+    """Create and return world entities (textures are skipped when headless)."""
     floor = Floor(
         position=Vector3(0.0, -1.0, 0.0),
         width=100.0, height=100.0, depth=1.0,
-        texture_file= "assets/terrain.jpg",
+        texture_file= "assets/terrain.jpg" if load_textures else None,
         texture_repeat= 30
     )
     crop = Crop(Vector3(0, -1, 0))
-    building = Building(Vector3(4, 0, 0), wall_texture="assets/wall.jpg",roof_texture="assets/roof.png")
+    building = Building(
+        Vector3(4, 0, 0),
+        wall_texture="assets/wall.jpg" if load_textures else None,
+        roof_texture="assets/roof.png" if load_textures else None
+    )
     
     return [floor, crop, building]
 
 
+def attach_entities(entities):
+    """Add streamed-in entities to the world and its indexes."""
+    game_state['world_entities'].extend(entities)
+    for entity in entities:
+        game_state['spatial_index'].insert(entity)
+        game_state['collision_system'].add(entity)
+
+
+def detach_entities(entities):
+    """Remove streamed-out entities from the world and free their resources."""
+    game_state['world_entities'].remove_many(entities)
+    game_state['collision_system'].remove_many(entities)
+    for entity in entities:
+        game_state['spatial_index'].remove(entity)
+        entity.release()
+
+
+def generate_starter_chunk(key):
+    """Chunks never saved before are empty, except the one holding the starting farm."""
+    if key != chunk_key(0.0, 0.0, CHUNK_SIZE):
+        return None
+    return ChunkData(
+        crop_positions=[(0.0, -1.0, 0.0)],
+        crop_elapsed=[0.0],
+        crop_last_stage_update=[0],
+        crop_stages=[0],
+        crop_thresholds=[5.0],
+        building_positions=[(4.0, 0.0, 0.0)],
+        building_sizes=[(5.0, 5.0, 5.0)],
+        building_wall_textures=["assets/wall.jpg"],
+        building_roof_textures=["assets/roof.png"],
+    )
+
+
+def enable_chunk_streaming(directory, load_textures=True):
+    """Stream crops and buildings from chunk files in `directory` around the player."""
+    game_state['chunks'] = ChunkManager(
+        ChunkStore(directory),
+        attach_entities,
+        detach_entities,
+        game_state['spatial_index'],
+        chunk_size=CHUNK_SIZE,
+        load_radius=CHUNK_LOAD_RADIUS,
+        memory_budget=CHUNK_MEMORY_BUDGET,
+        generator=generate_starter_chunk,
+        load_textures=load_textures
+    )
+    return game_state['chunks']
+
+
+def enable_sharding(workers):
+    """Step crop growth and physics in `workers` processes, one X region each.
+
+    Keeps serial stepping, and returns None, when sharding.serial_fallback
+    says the processes would not pay off for the loaded world.
+    """
+    from sharding import ShardedSimulation, serial_fallback
+    field, world = crop_field.default_field, physics_world.default_world
+    reason = serial_fallback(workers, field, world)
+    if reason is not None:
+        events.bus.log(f"Not sharding, stepping serially: {reason}", events.WARNING)
+        return None
+    simulation = ShardedSimulation(field, world, workers)
+    systems = game_state['systems']
+    systems[:] = [system for system in systems if not isinstance(system, GrowthSystem)]
+    physics = next(i for i, system in enumerate(systems) if isinstance(system, PhysicsSystem))
+    systems[physics] = ShardedSimulationSystem(simulation)
+    game_state['sharding'] = simulation
+    return simulation
+
+
+def generate_farm(crop_count, seed=0, load_textures=True):
+    """Add a procedural farm of `crop_count` crops around the origin (worldgen.py).
+
+    The crops go straight into the crop field in bulk, so the instanced
+    renderer draws them and they grow and save like any other, but they
+    are not Crop entities and cannot be harvested. Farmhouses and props
+    become Building entities. With chunk streaming on, chunks that have no
+    file yet are generated instead and the farm has no edge.
+    """
+    from worldgen import FarmGenerator, add_to_field
+    generator = FarmGenerator(seed)
+    chunks = game_state['chunks']
+    if chunks is not None:
+        chunks.generator = generator.chunk_generator(chunks.chunk_size)
+        return None
+    farm = generator.farm(crop_count)
+    add_to_field(crop_field.default_field, farm)
+    _, buildings = farm.take(slice(0, 0), slice(None)).create_entities(load_textures)
+    attach_entities(buildings)
+    return farm
+
+
+def world_options(args):
+    """The command-line options that shape the starting world, as stored in input logs."""
+    return {'farm': args.farm, 'load': args.load}
+
+
+def apply_world_options(options, load_textures=True, offline_growth=True):
+    """Add the generated farm and the save named by `options` to the world."""
+    if options.get('farm') is not None:
+        generate_farm(options['farm'], load_textures=load_textures)
+    if options.get('load') is not None:
+        load_game(options['load'], load_textures, offline_growth)
+
+
+def start_recording(path, options=None):
+    """Record live input, stamped with simulation ticks, to an input log at `path`."""
+    metadata = {
+        'world': options or {},
+        'mouse_initialized': game_state['mouse_initialized'],
+        'last_mouse': [game_state['last_mouse_x'], game_state['last_mouse_y']],
+    }
+    game_state['recorder'] = replay.InputRecorder(path, game_state['tick'], TICK_RATE, metadata)
+    return game_state['recorder']
+
+
+def stop_recording():
+    recorder = game_state['recorder']
+    if recorder is not None:
+        recorder.close(game_state['tick'], game_state)
+        game_state['recorder'] = None
+        events.bus.log(f"Recorded {recorder.events} input events to {recorder.path}")
+
+
+def start_replay(log):
+    """Feed an InputLog's input to the simulation instead of live input, from the next step on.
+
+    The world must start as it did when the log was recorded (see
+    apply_world_options). Replays are tick-exact except with chunk
+    streaming, whose loads finish whenever their jobs do.
+    """
+    if log.tick_rate != TICK_RATE:
+        events.bus.log(f"Input log runs at {log.tick_rate} ticks/s, the game at {TICK_RATE}", events.WARNING)
+    game_state['mouse_initialized'] = log.metadata.get('mouse_initialized', game_state['mouse_initialized'])
+    game_state['last_mouse_x'], game_state['last_mouse_y'] = log.metadata.get(
+        'last_mouse', [game_state['last_mouse_x'], game_state['last_mouse_y']])
+    handlers = {
+        replay.KEY_DOWN: handle_keyboard_down,
+        replay.KEY_UP: handle_keyboard_up,
+        replay.MOUSE_MOVE: handle_mouse_movement,
+    }
+    game_state['replayer'] = replay.InputReplayer(log, handlers, game_state['tick'])
+    return game_state['replayer']
+
+
+def finish_replay():
+    """Hand input back to the player and report whether the run matched the recording."""
+    replayer = game_state['replayer']
+    game_state['replayer'] = None
+    summary = replayer.summary()
+    if replayer.matches():
+        events.bus.log(f"Replay finished after {summary['ticks']} ticks; "
+                       f"{summary['digests_checked']} state digests match the recording")
+    else:
+        events.bus.log(f"Replay diverged from the recording at tick {summary['first_mismatch']}", events.WARNING)
+    return summary
+
+
+def save_game(path=SAVE_PATH):
+    """Snapshot crops, buildings, timers and player stats; the file is written by a job."""
+    previous = game_state['save_job']
+    if previous is not None:
+        jobs.job_system.wait([previous])     # one writer per save file
+    data, metadata, chunk_size = savefile.snapshot_world(game_state, crop_field.default_field)
+    game_state['save_job'] = jobs.job_system.submit(
+        savefile.write_save, path, data, metadata, chunk_size, priority=jobs.LOW,
+        on_complete=lambda job: finish_save(path, job))
+    return game_state['save_job']
+
+
+def finish_save(path, job):
+    game_state['save_job'] = None
+    if job.error is not None:
+        events.bus.log(f"Saving {path} failed: {job.error}", events.ERROR)
+    else:
+        events.bus.emit(events.GameSaved(path))
+
+
+def catch_up_growth(seconds, emit_events=False):
+    """Grow every crop by `seconds` of simulated time without running frames."""
+    growth = next((system for system in game_state['systems'] if isinstance(system, GrowthSystem)), None)
+    if growth is None:
+        return crop_field.default_field.catch_up(seconds)
+    return growth.catch_up(seconds, emit_events)
+
+
+def load_game(path=SAVE_PATH, load_textures=True, offline_growth=True):
+    """Replace the world's crops and buildings (and player stats) with a save.
+
+    With offline_growth, crops grow by the real time passed since the save
+    was written, resolved in one pass rather than frame by frame.
+
+    With chunk streaming on, the save only seeds chunks that have no file in
+    the chunk directory yet; use an empty directory to start from the save.
+    Streamed crops are restored as saved, without offline growth.
+    """
+    save = savefile.SaveFile(path)
+    player = game_state['player']
+    if player and 'player' in save.metadata:
+        savefile.restore_player(player, save.metadata['player'])
+    game_state['elapsed_sec'] = save.metadata.get('elapsed_sec', 0)
+
+    chunks = game_state['chunks']
+    if chunks is not None:
+        chunks.generator = save.chunk   # chunks are read lazily as the player nears them
+        return save
+
+    registry = game_state['registry']
+    old = registry.component('crop').values + registry.component('building').values
+    detach_entities(old)
+    crops, buildings = save.world().create_entities(load_textures)
+    attach_entities(crops + buildings)
+    saved_at = save.metadata.get('saved_at')
+    if offline_growth and saved_at is not None:
+        catch_up_growth(max(0.0, time.time() - saved_at))
+    save.close()
+    return save
+
+
+def build_spatial_index(entities):
+    """Create the XZ proximity index used for interactions."""
+    index = SpatialHash(cell_size=4.0)
+    for entity in entities:
+        index.insert(entity)
+    return index
+
+
+def build_collision_system(player, entities):
+    """Collision system over the player and every collidable world entity."""
+    # Resolve on the ground plane only; vertical placement is up to gravity
+    collision_system = CollisionSystem(axes=(0, 2))
+    if player:
+        collision_system.add(player)
+    for entity in entities:
+        collision_system.add(entity)
+    return collision_system
+
+
 def create_ui_entities():
     """Create and return UI entities."""
     return [
@@ -242,25 +665,47 @@ def create_ui_entities():
 ###########################################################################################
 ###########################################################################################
 
-def initialize_entities():
-    """Initialize all game entities."""
-    game_state['player'] = create_player()
-    
-    ui_entities = create_ui_entities()
-    world_entities = create_world_entities()
-    
+def setup_world(player, world_entities, ui_entities):
+    """Register entities and build the indexes and systems that run the world."""
+    registry = Registry()
+    for entity in ui_entities:
+        registry.spawn(entity, hud=True)
+
+    game_state['player'] = player
+    game_state['registry'] = registry
     game_state['ui_entities'] = ui_entities
-    game_state['world_entities'] = world_entities
+    game_state['hud_layer'] = HudLayer(ui_entities)
+    game_state['world_entities'] = EntityList(registry, world_entities)
+    game_state['spatial_index'] = build_spatial_index(world_entities)
+    game_state['collision_system'] = build_collision_system(player, world_entities)
+    if game_state['crop_renderer'] is None:
+        game_state['crop_renderer'] = InstancedCropRenderer()
+    game_state['pending_actions'] = []
+    game_state['systems'] = create_default_systems()
+
+
+def initialize_entities(chunk_directory=None, load_textures=True):
+    """Initialize all game entities."""
+    world_entities = create_world_entities(load_textures)
+    if chunk_directory:
+        # Only the floor is global; crops and buildings come from the chunks
+        world_entities = [entity for entity in world_entities if isinstance(entity, Floor)]
+    setup_world(create_player(), world_entities, create_ui_entities())
+    if chunk_directory:
+        enable_chunk_streaming(chunk_directory, load_textures)
+    game_state['loop'] = create_simulation_loop()
 
 
 def setup_glut_window():
     """Initialize GLUT window and settings."""
     global game_state
-    glutInit(sys.argv)
     glutInitDisplayMode(GLUT_RGB | GLUT_DOUBLE | GLUT_DEPTH)
     glutInitWindowSize(800, 600)
     glutInitWindowPosition(1,-1)
     glutCreateWindow(b"Farming Game")
+    if bool(glutSetOption):
+        # freeglut: return from glutMainLoop on close so chunks get saved
+        glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
     glutSetCursor(GLUT_CURSOR_NONE)
     
 
@@ -269,26 +714,81 @@ def register_callbacks():
     global game_state
     glutDisplayFunc(render_scene)
     glutIdleFunc(game_loop)
-    glutKeyboardFunc(handle_keyboard_down)
-    glutKeyboardUpFunc(handle_keyboard_up)
-    glutPassiveMotionFunc(handle_mouse_movement)
-    glutMotionFunc(handle_mouse_movement)
+    glutKeyboardFunc(on_keyboard_down)
+    glutKeyboardUpFunc(on_keyboard_up)
+    glutPassiveMotionFunc(on_mouse_movement)
+    glutMotionFunc(on_mouse_movement)
 
 
-def initialize_game():
+def initialize_game(chunk_directory=None):
     """Initialize the complete game."""
     global game_state
+    preload_default_atlas()     # renders the HUD font while the window and world are set up
     setup_glut_window()
     setup_opengl()
-    initialize_entities()
+    initialize_entities(chunk_directory)
     register_callbacks()
     game_state['mouse_initialized'] = True
 
+def shutdown():
+    """Write streamed chunks back to disk and stop worker processes before exiting."""
+    stop_recording()
+    if game_state['chunks'] is not None:
+        game_state['chunks'].shutdown()
+        game_state['chunks'] = None
+    if game_state['sharding'] is not None:
+        game_state['sharding'].close()
+        game_state['sharding'] = None
+    if game_state['save_job'] is not None:
+        jobs.job_system.wait([game_state['save_job']])
+    texture_manager.shutdown()
+    jobs.job_system.shutdown()
+    events.bus.close()
+
+
+def non_negative(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"expected a count of 0 or more, got {value}")
+    return value
+
+
+def parse_arguments(argv):
+    """Game options from `argv`, without the program name and the options GLUT took."""
+    parser = argparse.ArgumentParser(prog='main.py', description="3D farming game.")
+    parser.add_argument('--chunks', metavar='DIR', help='stream crops and buildings from chunk files in DIR')
+    parser.add_argument('--load', metavar='SAVE', help='start from a save file')
+    parser.add_argument('--farm', type=non_negative, metavar='CROPS',
+                        help='add a procedural farm with this many crops (endless with --chunks)')
+    parser.add_argument('--workers', type=non_negative, metavar='N',
+                        help='step crop growth and physics in N processes (serial if that would not pay off)')
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--record', metavar='LOG', help='record input to an input log')
+    recording.add_argument('--replay', metavar='LOG', help='play an input log back instead of live input')
+    return parser.parse_args(argv)
+
+
 def main():
     """Main entry point for the game."""
     global game_state
-    initialize_game()
-    glutMainLoop()
+    # GLUT removes its own options (-display, -geometry, ...) first
+    args = parse_arguments([os.fsdecode(arg) for arg in glutInit(sys.argv)[1:]])
+    log = replay.InputLog(args.replay) if args.replay else None
+    initialize_game(args.chunks)
+    options = log.metadata.get('world', {}) if log is not None else world_options(args)
+    # Offline growth depends on the wall clock, so recorded runs skip it
+    recorded = log is not None or args.record is not None
+    apply_world_options(options, offline_growth=not recorded)
+    if args.workers is not None:
+        enable_sharding(args.workers)
+    if log is not None:
+        start_replay(log)
+    if args.record:
+        start_recording(args.record, options)
+    try:
+        glutMainLoop()
+    finally:
+        shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,246 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import (
+    GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER, GL_FLOAT, GL_LINES, GL_LINE_LOOP, GL_NORMAL_ARRAY,
+    GL_STATIC_DRAW, GL_TEXTURE_COORD_ARRAY, GL_TRIANGLES, GL_UNSIGNED_INT, GL_VERTEX_ARRAY,
+    glBindBuffer, glBufferData, glDeleteBuffers, glDisableClientState, glDrawArrays,
+    glDrawElements, glEnableClientState, glGenBuffers, glNormalPointer, glTexCoordPointer,
+    glVertexPointer
+)
+from profiler import profiler
+
+
+# Interleaved vertex layout: position (3) + normal (3) + texcoord (2)
+VERTEX_COMPONENTS = 8
+FLOAT_SIZE = 4
+VERTEX_STRIDE = VERTEX_COMPONENTS * FLOAT_SIZE
+NORMAL_OFFSET = 3 * FLOAT_SIZE
+TEXCOORD_OFFSET = 6 * FLOAT_SIZE
+
+
+class MeshData:
+    """CPU-side mesh: interleaved float32 vertices and optional uint32 indices."""
+
+    def __init__(self, vertices, indices=None, primitive='triangles'):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, VERTEX_COMPONENTS)
+        self.indices = None
+        if indices is not None:
+            self.indices = np.ascontiguousarray(indices, dtype=np.uint32).ravel()
+        self.primitive = primitive
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def element_count(self):
+        if self.indices is not None:
+            return len(self.indices)
+        return len(self.vertices)
+
+    @property
+    def positions(self):
+        return self.vertices[:, 0:3]
+
+    @property
+    def normals(self):
+        return self.vertices[:, 3:6]
+
+    @property
+    def texcoords(self):
+        return self.vertices[:, 6:8]
+
+
+def _quads_to_triangles(quad_count):
+    """Index buffer splitting each run of 4 vertices into two triangles."""
+    base = np.arange(quad_count, dtype=np.uint32)[:, None] * 4
+    return (base + np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)).ravel()
+
+
+def _interleave(positions, normals, texcoords):
+    return np.hstack([
+        np.asarray(positions, dtype=np.float32),
+        np.asarray(normals, dtype=np.float32),
+        np.asarray(texcoords, dtype=np.float32),
+    ])
+
+
+# --------------------
+# Mesh builders (no GL calls, safe to use headless)
+# --------------------
+def build_box(width, height, depth):
+    """Textured box centered on the origin, one texture per face."""
+    w, h, d = width / 2, height / 2, depth / 2
+    faces = [
+        # (normal, [(u, v, x, y, z) x 4])
+        ((0, 0, 1), [(0, 0, -w, -h, d), (1, 0, w, -h, d), (1, 1, w, h, d), (0, 1, -w, h, d)]),      # Front
+        ((0, 0, -1), [(1, 0, -w, -h, -d), (1, 1, -w, h, -d), (0, 1, w, h, -d), (0, 0, w, -h, -d)]),  # Back
+        ((0, 1, 0), [(0, 1, -w, h, -d), (0, 0, -w, h, d), (1, 0, w, h, d), (1, 1, w, h, -d)]),      # Top
+        ((0, -1, 0), [(1, 1, -w, -h, -d), (0, 1, w, -h, -d), (0, 0, w, -h, d), (1, 0, -w, -h, d)]),  # Bottom
+        ((1, 0, 0), [(1, 0, w, -h, -d), (1, 1, w, h, -d), (0, 1, w, h, d), (0, 0, w, -h, d)]),      # Right
+        ((-1, 0, 0), [(0, 0, -w, -h, -d), (1, 0, -w, -h, d), (1, 1, -w, h, d), (0, 1, -w, h, -d)]),  # Left
+    ]
+    positions, normals, texcoords = [], [], []
+    for normal, corners in faces:
+        for u, v, x, y, z in corners:
+            positions.append((x, y, z))
+            normals.append(normal)
+            texcoords.append((u, v))
+    return MeshData(_interleave(positions, normals, texcoords), _quads_to_triangles(len(faces)))
+
+
+def build_roof(width, height, depth, base_y=0.0):
+    """Triangular prism roof; its base sits at base_y and its ridge runs along Z."""
+    w, d = width / 2, depth / 2
+    top = base_y + height
+    b = base_y
+
+    slope = np.array([height, w, 0.0])
+    slope /= np.linalg.norm(slope)
+    left_normal = (-slope[0], slope[1], 0.0)
+    right_normal = (slope[0], slope[1], 0.0)
+
+    positions = [
+        # Front triangle
+        (-w, b, d), (w, b, d), (0, top, d),
+        # Back triangle
+        (-w, b, -d), (w, b, -d), (0, top, -d),
+        # Left side
+        (-w, b, -d), (-w, b, d), (0, top, d), (0, top, -d),
+        # Right side
+        (w, b, -d), (w, b, d), (0, top, d), (0, top, -d),
+        # Bottom
+        (-w, b, -d), (-w, b, d), (w, b, d), (w, b, -d),
+    ]
+    normals = [(0, 0, 1)] * 3 + [(0, 0, -1)] * 3 + [left_normal] * 4 + [right_normal] * 4 + [(0, -1, 0)] * 4
+    texcoords = [(0, 0), (1, 0), (0.5, 1)] * 2 + [(0, 0), (1, 0), (1, 1), (0, 1)] * 3
+
+    indices = np.concatenate([
+        np.array([0, 1, 2, 3, 4, 5], dtype=np.uint32),
+        _quads_to_triangles(3) + 6,
+    ])
+    return MeshData(_interleave(positions, normals, texcoords), indices)
+
+
+def build_ground_quad(width, depth, texture_repeat=1.0):
+    """Flat upward-facing quad on the XZ plane with a repeating texture."""
+    w, d = width / 2, depth / 2
+    r = texture_repeat
+    positions = [(-w, 0, d), (w, 0, d), (w, 0, -d), (-w, 0, -d)]
+    normals = [(0, 1, 0)] * 4
+    texcoords = [(0, 0), (r, 0), (r, r), (0, r)]
+    return MeshData(_interleave(positions, normals, texcoords), _quads_to_triangles(1))
+
+
+def build_sphere(radius, slices, stacks):
+    """UV sphere around the Y axis (same tessellation parameters as glutSolidSphere)."""
+    rings = np.linspace(0.0, np.pi, stacks + 1)           # polar angle, top to bottom
+    segments = np.linspace(0.0, 2.0 * np.pi, slices + 1)  # azimuth, seam duplicated for UVs
+    phi, theta = np.meshgrid(rings, segments, indexing='ij')
+
+    normals = np.stack([
+        np.sin(phi) * np.cos(theta),
+        np.cos(phi),
+        np.sin(phi) * np.sin(theta),
+    ], axis=-1).reshape(-1, 3)
+    texcoords = np.stack([
+        theta / (2.0 * np.pi),
+        1.0 - phi / np.pi,
+    ], axis=-1).reshape(-1, 2)
+
+    columns = slices + 1
+    row = np.arange(stacks)[:, None] * columns
+    col = np.arange(slices)[None, :]
+    a = (row + col).ravel()
+    b = a + columns
+    indices = np.stack([a, b, a + 1, a + 1, b, b + 1], axis=-1).ravel()
+    return MeshData(_interleave(normals * radius, normals, texcoords), indices)
+
+
+# --------------------
+# GPU meshes
+# --------------------
+PRIMITIVES = {
+    'triangles': GL_TRIANGLES,
+    'lines': GL_LINES,
+    'line_loop': GL_LINE_LOOP,
+}
+
+
+class Mesh:
+    """MeshData uploaded to vertex buffer objects and drawn in a single call."""
+
+    def __init__(self, data):
+        self.data = data
+        self.vbo = None
+        self.ibo = None
+
+    def upload(self):
+        """Copy the vertex (and index) arrays into GPU buffers."""
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.data.vertices.nbytes, self.data.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        if self.data.indices is not None:
+            self.ibo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.data.indices.nbytes, self.data.indices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        """Draw the whole mesh with the current color, texture and matrices."""
+        if self.vbo is None:
+            self.upload()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(NORMAL_OFFSET))
+        glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(TEXCOORD_OFFSET))
+
+        mode = PRIMITIVES[self.data.primitive]
+        profiler.count('draw_calls')
+        profiler.count('vertices', self.data.element_count if self.ibo is not None else self.data.vertex_count)
+        if self.ibo is not None:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+            glDrawElements(mode, self.data.element_count, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        else:
+            glDrawArrays(mode, 0, self.data.vertex_count)
+
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """Free the GPU buffers."""
+        buffers = [b for b in (self.vbo, self.ibo) if b is not None]
+        if buffers:
+            glDeleteBuffers(len(buffers), buffers)
+        self.vbo = None
+        self.ibo = None
+
+
+# Meshes are shared between entities with identical geometry
+_mesh_cache = {}
+
+
+def get_mesh(builder, *args):
+    """Return a cached Mesh for builder(*args), building it on first use."""
+    key = (builder.__name__,) + args
+    mesh = _mesh_cache.get(key)
+    if mesh is None:
+        mesh = Mesh(builder(*args))
+        _mesh_cache[key] = mesh
+    return mesh
+
+
+def release_all_meshes():
+    """Free every cached mesh (call before the GL context goes away)."""
+    for mesh in _mesh_cache.values():
+        mesh.release()
+    _mesh_cache.clear()
@@ -1,45 +1,39 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
+from OpenGL.GL import glColor3f, glPopMatrix, glPushMatrix, glRotatef, glTranslatef
+from OpenGL.GLUT import glutSolidCube
 import math
 import numpy as np
-from PIL import Image
-
+import physics_world
+from texture import texture_manager
 
 
 def load_texture(filename):
-    """Load texture from image file."""
-    try:
-        image = Image.open(filename)
-        image = image.convert('RGB')
-        image_data = np.array(image, dtype=np.uint8)
-        
-        texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
-        
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        
-        height, width = image_data.shape[:2]
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                    GL_RGB, GL_UNSIGNED_BYTE, image_data)
-        
-        return texture_id
-    except:
-        return None
+    """Load texture from image file (shared through the texture cache)."""
+    return texture_manager.acquire(filename)
+
+
+def release_texture(texture_id):
+    """Give back a texture obtained from load_texture."""
+    if texture_id is not None:
+        texture_manager.release(texture_id)
 
 
 # Vector3 Class
 class Vector3:
-    """A 3D vector class to represent positions, velocities, etc."""
+    """A 3D vector class to represent positions, velocities, etc.
+
+    The operators return new vectors; the in-place forms (+=, -=, *=,
+    add_scaled, normalize_ip, set) modify the vector without allocating.
+    """
+    __slots__ = ('x', 'y', 'z')
     
     def __init__(self, x=0.0, y=0.0, z=0.0):
         self.x = x
         self.y = y
         self.z = z
 
+    def __repr__(self):
+        return f"Vector3({self.x}, {self.y}, {self.z})"
+
     def __add__(self, other):
         return Vector3(self.x + other.x, self.y + other.y, self.z + other.z)
 
@@ -49,6 +43,62 @@ class Vector3:
     def __mul__(self, scalar):
         return Vector3(self.x * scalar, self.y * scalar, self.z * scalar)
 
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
+
+    def __imul__(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        self.z *= scalar
+        return self
+
+    def set(self, other):
+        """Copy another vector's components into this one."""
+        self.x = other.x
+        self.y = other.y
+        self.z = other.z
+        return self
+
+    def copy(self):
+        return Vector3(self.x, self.y, self.z)
+
+    def add_scaled(self, other, scalar):
+        """In place: self += other * scalar (no temporary vector)."""
+        self.x += other.x * scalar
+        self.y += other.y * scalar
+        self.z += other.z * scalar
+        return self
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other):
+        return Vector3(
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x
+        )
+
+    def set_cross(self, a, b):
+        """In place: self = a x b (safe when self is a or b)."""
+        x = a.y * b.z - a.z * b.y
+        y = a.z * b.x - a.x * b.z
+        z = a.x * b.y - a.y * b.x
+        self.x, self.y, self.z = x, y, z
+        return self
+
+    def length_squared(self):
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
     def length(self):
         return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
 
@@ -58,82 +108,240 @@ class Vector3:
             return Vector3()
         return self * (1.0 / length)
 
+    def normalize_ip(self):
+        """Normalize in place (zero vectors are left unchanged)."""
+        length = self.length()
+        if length > 0:
+            self *= 1.0 / length
+        return self
+
+
+class Vector3Array:
+    """Batch of N vectors backed by an (N, 3) float array (a view, not a copy)."""
+
+    def __init__(self, data):
+        self.data = data if isinstance(data, np.ndarray) else np.asarray(data, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def zeros(cls, n):
+        return cls(np.zeros((n, 3), dtype=np.float64))
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        return cls(np.array([(v.x, v.y, v.z) for v in vectors], dtype=np.float64).reshape(-1, 3))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        x, y, z = self.data[i].tolist()
+        return Vector3(x, y, z)
+
+    def __setitem__(self, i, v):
+        self.data[i] = (v.x, v.y, v.z)
+
+    def _operand(self, other):
+        return other.data if isinstance(other, Vector3Array) else other
+
+    def __iadd__(self, other):
+        self.data += self._operand(other)
+        return self
+
+    def __isub__(self, other):
+        self.data -= self._operand(other)
+        return self
+
+    def __imul__(self, scalar):
+        self.data *= scalar
+        return self
+
+    def add_scaled(self, other, scalar):
+        """In place: self += other * scalar (scalar may be a per-row array)."""
+        scalar = np.asarray(scalar)
+        if scalar.ndim == 1:
+            scalar = scalar[:, None]
+        self.data += self._operand(other) * scalar
+        return self
+
+    def dot(self, other):
+        return np.einsum('ij,ij->i', self.data, self._operand(other))
+
+    def cross(self, other):
+        return Vector3Array(np.cross(self.data, self._operand(other)))
+
+    def length_squared(self):
+        return np.einsum('ij,ij->i', self.data, self.data)
+
+    def lengths(self):
+        return np.sqrt(self.length_squared())
+
+    def normalize_ip(self):
+        """Normalize every row in place (zero rows are left unchanged)."""
+        lengths = self.lengths()
+        nonzero = lengths > 0
+        self.data[nonzero] /= lengths[nonzero, None]
+        return self
+
+
+class BodyVector(Vector3):
+    """Vector3 that reads and writes one row of a PhysicsWorld array."""
+    __slots__ = ('world', 'array_name', 'index')
+
+    def __init__(self, world, array_name, index):
+        self.world = world
+        self.array_name = array_name
+        self.index = index
+
+    def _row(self):
+        return getattr(self.world, self.array_name)[self.index]
+
+    @property
+    def x(self):
+        return float(getattr(self.world, self.array_name)[self.index, 0])
+
+    @x.setter
+    def x(self, value):
+        getattr(self.world, self.array_name)[self.index, 0] = value
+
+    @property
+    def y(self):
+        return float(getattr(self.world, self.array_name)[self.index, 1])
+
+    @y.setter
+    def y(self, value):
+        getattr(self.world, self.array_name)[self.index, 1] = value
+
+    @property
+    def z(self):
+        return float(getattr(self.world, self.array_name)[self.index, 2])
+
+    @z.setter
+    def z(self, value):
+        getattr(self.world, self.array_name)[self.index, 2] = value
+
+    def __iadd__(self, other):
+        self._row()[:] += (other.x, other.y, other.z)
+        return self
+
+    def __isub__(self, other):
+        self._row()[:] -= (other.x, other.y, other.z)
+        return self
+
+    def __imul__(self, scalar):
+        self._row()[:] *= scalar
+        return self
+
+    def add_scaled(self, other, scalar):
+        row = self._row()
+        row[0] += other.x * scalar
+        row[1] += other.y * scalar
+        row[2] += other.z * scalar
+        return self
+
+    def set(self, other):
+        """Copy another vector's components into this row."""
+        self._row()[:] = (other.x, other.y, other.z)
+        return self
+
+
+def body_property(array_name, column=None, doc=None):
+    """Property reading/writing this object's slot in a PhysicsWorld array."""
+    if column is None:
+        def getter(self):
+            return getattr(self.physics_world, array_name)[self.body_index].item()
+
+        def setter(self, value):
+            getattr(self.physics_world, array_name)[self.body_index] = value
+    else:
+        def getter(self):
+            return float(getattr(self.physics_world, array_name)[self.body_index, column])
+
+        def setter(self, value):
+            getattr(self.physics_world, array_name)[self.body_index, column] = value
+    return property(getter, setter, doc=doc)
+
+
 # PhysicsObject Class
 class PhysicsObject:
-    """Base class for any object in the game world that has physics (3D)."""
+    """Base class for any object in the game world that has physics (3D).
+
+    The physics state lives in a PhysicsWorld (physics_world.default_world
+    unless another one is given); this object is a handle to its slot there.
+    """
+    lod_level = 0   # set by the renderer before draw(): 0 = full detail
     
-    def __init__(self, position, velocity, width, height, depth):
-        self.position = position  # 3D position (x, y, z)
-        self.velocity = velocity  # 3D velocity (vx, vy, vz)
+    def __init__(self, position, velocity, width, height, depth, world=None):
+        self.physics_world = world if world is not None else physics_world.default_world
+        self.body_index = self.physics_world.add(self, position, velocity, width, height, depth)
+        self._position = BodyVector(self.physics_world, 'positions', self.body_index)
+        self._velocity = BodyVector(self.physics_world, 'velocities', self.body_index)
+
         self.width = width
         self.height = height
         self.depth = depth
         self.collidable = True
+        self.static = False  # Static bodies are never pushed by collisions
         self.rotation = Vector3(0, 0, 0)  # Rotation around x, y, z
         self.color = (0.5, 0.5, 0.5)  # Default color (gray)
+        self._spatial_index = None  # SpatialHash tracking this object, if any
         
-        # Gravity settings
-        self.gravity_enabled = True  # Whether gravity affects this object
-        self.gravity_strength = -9.8  # Gravity acceleration (negative = downward)
-        self.on_ground = False  # Whether the object is touching the ground
-        self.ground_level = 0.0  # Ground level (floor Y position)
-        self.bounce_factor = 0.3  # How bouncy the object is (0.0 = no bounce, 1.0 = perfect bounce)
-        self.friction = 0.95  # Air resistance/friction (0.0 = stops immediately, 1.0 = no friction)
+        # Gravity settings (defaults are set by PhysicsWorld.add):
+        # gravity_enabled = True   whether gravity affects this object
+        # gravity_strength = -9.8  gravity acceleration (negative = downward)
+        # on_ground = False        whether the object is touching the ground
+        # ground_level = 0.0       ground level (floor Y position)
+        # bounce_factor = 0.3      0.0 = no bounce, 1.0 = perfect bounce
+        # friction = 0.95          0.0 = stops immediately, 1.0 = no friction
+        # dynamic = True           integrated by PhysicsWorld.step
+
+    @property
+    def position(self):
+        """3D position (x, y, z), backed by the physics world."""
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position.set(value)
+
+    @property
+    def velocity(self):
+        """3D velocity (vx, vy, vz), backed by the physics world."""
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value):
+        self._velocity.set(value)
+
+    width = body_property('sizes', 0)
+    height = body_property('sizes', 1)
+    depth = body_property('sizes', 2)
+    gravity_enabled = body_property('gravity_enabled')
+    gravity_strength = body_property('gravity_strength')
+    on_ground = body_property('on_ground')
+    ground_level = body_property('ground_level')
+    bounce_factor = body_property('bounce_factor')
+    friction = body_property('friction')
+    dynamic = body_property('dynamic')
+
+    @property
+    def spatial_index(self):
+        return self._spatial_index
+
+    @spatial_index.setter
+    def spatial_index(self, index):
+        # The world moves tracked bodies in the index after each step
+        self._spatial_index = index
+        if index is None:
+            self.physics_world.tracked.discard(self.body_index)
+        else:
+            self.physics_world.tracked.add(self.body_index)
 
     def update(self, delta_time):
-        """Update physics with gravity"""
-        if self.gravity_enabled:
-            self.apply_gravity(delta_time)
-        
-        # Apply movement
-        self.position += self.velocity * delta_time
-        
-        # Handle ground collision
-        self.handle_ground_collision()
+        """Update physics with gravity (single-body form of PhysicsWorld.step)."""
+        self.physics_world.step(delta_time, [self.body_index])
         
         # Handle other collisions
         self.handle_collision()
-        
-        # Apply friction
-        self.apply_friction()
-
-    def apply_gravity(self, delta_time):
-        """Apply gravity to the object"""
-        if not self.on_ground:
-            # Add gravity to Y velocity (downward acceleration)
-            self.velocity.y += self.gravity_strength * delta_time
-
-    def handle_ground_collision(self):
-        """Handle collision with the ground"""
-        # Calculate the bottom of the object
-        object_bottom = self.position.y - (self.height / 2)
-        
-        # Check if object hits the ground
-        if object_bottom <= self.ground_level:
-            # Place object on ground
-            self.position.y = self.ground_level + (self.height / 2)
-            
-            # Handle bouncing
-            if self.velocity.y < 0:  # Only bounce if moving downward
-                self.velocity.y = -self.velocity.y * self.bounce_factor
-                
-                # Stop tiny bounces
-                if abs(self.velocity.y) < 0.1:
-                    self.velocity.y = 0
-                    self.on_ground = True
-            else:
-                self.on_ground = True
-        else:
-            self.on_ground = False
-
-    def apply_friction(self):
-        """Apply air resistance/friction to all movement"""
-        self.velocity.x *= self.friction
-        self.velocity.z *= self.friction
-        
-        # Only apply Y friction if object is moving very slowly
-        if abs(self.velocity.y) < 0.1:
-            self.velocity.y *= self.friction
 
     def jump(self, force=5.0):
         """Make the object jump (add upward velocity)"""
@@ -153,8 +361,8 @@ class PhysicsObject:
         """Set the ground level for this object"""
         self.ground_level = y_level
 
-    def handle_collision(self):
-        """Logic to handle collision, currently no resolution."""
+    def handle_collision(self, other=None):
+        """Hook called by the collision system after a contact with `other` is resolved."""
         pass
 
     def check_collision(self, other):
@@ -166,6 +374,12 @@ class PhysicsObject:
                 self.position.z - self.depth/2 < other.position.z + other.depth/2 and
                 self.position.z + self.depth/2 > other.position.z - other.depth/2)
 
+    def release(self):
+        """Free resources (textures, buffers, physics slot) owned by this object."""
+        if self._spatial_index is not None:
+            self._spatial_index.remove(self)
+        self.physics_world.remove(self.body_index)
+
     def draw(self):
         """Draw the 3D object."""
         glPushMatrix()  # Save the current transformation matrix
@@ -0,0 +1,189 @@
+import numpy as np
+
+
+class PhysicsWorld:
+    """Structure-of-arrays storage and integration for physics bodies.
+
+    Each PhysicsObject owns one slot. step() integrates gravity, ground
+    collision with bounce, and friction for every dynamic body at once,
+    matching the per-object rules PhysicsObject used to apply itself.
+    Slots of removed bodies are recycled, so indices stay stable.
+    `revision` increases whenever a body is added or removed.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.free = []
+        self.owners = []        # index -> PhysicsObject (None when free)
+        self.tracked = set()    # indices of bodies that sit in a spatial index
+        self.revision = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.positions = np.zeros((capacity, 3), dtype=np.float64)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float64)
+        self.sizes = np.zeros((capacity, 3), dtype=np.float64)   # width, height, depth
+        self.gravity_enabled = np.zeros(capacity, dtype=bool)
+        self.gravity_strength = np.zeros(capacity, dtype=np.float64)
+        self.on_ground = np.zeros(capacity, dtype=bool)
+        self.ground_level = np.zeros(capacity, dtype=np.float64)
+        self.bounce_factor = np.zeros(capacity, dtype=np.float64)
+        self.friction = np.ones(capacity, dtype=np.float64)
+        self.dynamic = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    @staticmethod
+    def array_names():
+        return ('positions', 'velocities', 'sizes', 'gravity_enabled', 'gravity_strength',
+                'on_ground', 'ground_level', 'bounce_factor', 'friction', 'dynamic', 'alive')
+
+    def grow_capacity(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        old = {name: getattr(self, name) for name in self.array_names()}
+        self.allocate(capacity)
+        for name, array in old.items():
+            getattr(self, name)[:self.count] = array[:self.count]
+
+    def __len__(self):
+        return self.count - len(self.free)
+
+    def clear(self):
+        self.count = 0
+        self.free = []
+        self.owners = []
+        self.tracked = set()
+        self.alive[:] = False
+        self.revision += 1
+
+    def add(self, owner, position, velocity, width, height, depth):
+        """Allocate a body slot with PhysicsObject's default settings."""
+        if self.free:
+            index = self.free.pop()
+            self.owners[index] = owner
+        else:
+            self.grow_capacity(self.count + 1)
+            index = self.count
+            self.count += 1
+            self.owners.append(owner)
+
+        self.positions[index] = (position.x, position.y, position.z)
+        self.velocities[index] = (velocity.x, velocity.y, velocity.z)
+        self.sizes[index] = (width, height, depth)
+        self.gravity_enabled[index] = True
+        self.gravity_strength[index] = -9.8
+        self.on_ground[index] = False
+        self.ground_level[index] = 0.0
+        self.bounce_factor[index] = 0.3
+        self.friction[index] = 0.95
+        self.dynamic[index] = True
+        self.alive[index] = True
+        self.revision += 1
+        return index
+
+    def remove(self, index):
+        if self.alive[index]:
+            self.alive[index] = False
+            self.dynamic[index] = False
+            self.owners[index] = None
+            self.tracked.discard(index)
+            self.free.append(index)
+            self.revision += 1
+
+    def step(self, delta_time, indices=None):
+        """Integrate all dynamic bodies (or just `indices`) by delta_time."""
+        n = self.count
+        if indices is None and n:
+            active = np.flatnonzero(self.dynamic[:n])
+            if len(active) < n // 2:
+                # Mostly static world: gathering the few dynamic bodies is cheaper
+                indices = active
+        if indices is None:
+            if n == 0:
+                return
+            # Work in place on the used part of the arrays, masked by `dynamic`
+            on_ground = integrate(
+                self.positions[:n], self.velocities[:n], self.sizes[:n, 1],
+                self.gravity_enabled[:n], self.gravity_strength[:n], self.on_ground[:n],
+                self.ground_level[:n], self.bounce_factor[:n], self.friction[:n],
+                self.dynamic[:n], delta_time)
+            self.on_ground[:n] = on_ground
+        else:
+            active = np.asarray(indices, dtype=np.intp)
+            if len(active) == 0:
+                return
+            integrate_rows(self, active, delta_time)
+        self.sync_tracked(None if indices is None else active)
+
+    def sync_tracked(self, indices=None):
+        """Move bodies that sit in a spatial index (all dynamic ones, or just `indices`)."""
+        if not self.tracked:
+            return
+        if indices is None:
+            moved = [index for index in self.tracked if self.dynamic[index]]
+        else:
+            moved = self.tracked.intersection(np.asarray(indices).tolist())
+        for index in moved:
+            owner = self.owners[index]
+            owner.spatial_index.move(owner)
+
+
+def integrate(pos, vel, heights, gravity_enabled, gravity_strength, on_ground,
+              ground_level, bounce_factor, friction, mask, delta_time):
+    """Vectorized PhysicsObject rules: gravity, movement, ground bounce, friction.
+
+    Updates pos and vel in place and returns the new on_ground flags. Rows
+    where `mask` is False are left untouched (mask=None means all rows).
+    """
+    vx, vy, vz = vel[:, 0], vel[:, 1], vel[:, 2]
+    py = pos[:, 1]
+    if mask is None:
+        mask = np.ones(len(pos), dtype=bool)
+
+    # Gravity
+    falling = mask & gravity_enabled & ~on_ground
+    vy += gravity_strength * delta_time * falling
+
+    # Movement
+    pos += vel * (delta_time * mask)[:, None]
+
+    # Ground collision with bounce
+    half_height = heights * 0.5
+    hit = mask & (py - half_height <= ground_level)
+    np.copyto(py, ground_level + half_height, where=hit)
+    moving_down = hit & (vy < 0)
+    np.copyto(vy, -vy * bounce_factor, where=moving_down)
+    settled = moving_down & (np.abs(vy) < 0.1)
+    vy[settled] = 0.0
+    grounded = np.where(hit, np.where(moving_down, settled | on_ground, True), False)
+
+    # Friction (vertical only when nearly at rest)
+    friction = np.where(mask, friction, 1.0)
+    vx *= friction
+    vz *= friction
+    slow = np.abs(vy) < 0.1
+    np.copyto(vy, vy * friction, where=slow)
+
+    return np.where(mask, grounded, on_ground)
+
+
+def integrate_rows(arrays, rows, delta_time):
+    """integrate() over the given rows of a PhysicsWorld (or anything with its arrays)."""
+    pos = arrays.positions[rows]
+    vel = arrays.velocities[rows]
+    on_ground = integrate(
+        pos, vel, arrays.sizes[rows, 1],
+        arrays.gravity_enabled[rows], arrays.gravity_strength[rows], arrays.on_ground[rows],
+        arrays.ground_level[rows], arrays.bounce_factor[rows], arrays.friction[rows],
+        None, delta_time)
+    arrays.positions[rows] = pos
+    arrays.velocities[rows] = vel
+    arrays.on_ground[rows] = on_ground
+
+
+# World that PhysicsObjects register with unless given another one
+default_world = PhysicsWorld()
@@ -1,5 +1,6 @@
 
 import math
+import events
 from crop import Crop
 from physics_object import Vector3
 
@@ -27,6 +28,30 @@ class Player:
         self.crop_count = 0
         self.energy = 100
 
+        # Scratch vectors reused by update_movement every tick
+        self._forward = Vector3()
+        self._right = Vector3()
+        self._up = Vector3()
+        self._move = Vector3()
+
+        # Position at the previous simulation step, for render interpolation
+        self.previous_position = Vector3(position.x, position.y, position.z)
+
+    def save_previous_state(self):
+        """Remember the current position before a simulation step."""
+        self.previous_position.x = self.position.x
+        self.previous_position.y = self.position.y
+        self.previous_position.z = self.position.z
+
+    def interpolated_position(self, alpha):
+        """Position blended between the last two simulation steps."""
+        prev = self.previous_position
+        return Vector3(
+            prev.x + (self.position.x - prev.x) * alpha,
+            prev.y + (self.position.y - prev.y) * alpha,
+            prev.z + (self.position.z - prev.z) * alpha
+        )
+
     def set_key_state(self, key, pressed):
         """Set the state of movement keys"""
         if key == b'w':
@@ -40,67 +65,54 @@ class Player:
 
     def update_movement(self, delta_time, camera_position, camera_target, camera_up):
         """Update player movement based on currently pressed keys"""
+        forward, right, up, move = self._forward, self._right, self._up, self._move
+
         # Calculate camera forward vector (normalized)
-        forward_x = camera_target[0] - camera_position[0]
-        forward_y = camera_target[1] - camera_position[1]
-        forward_z = camera_target[2] - camera_position[2]
-        
-        # Normalize the forward vector
-        forward_length = math.sqrt(forward_x**2 + forward_y**2 + forward_z**2)
-        if forward_length > 0:
-            forward_x /= forward_length
-            forward_y /= forward_length
-            forward_z /= forward_length
-        
-        # Calculate right vector (cross product of forward and up)
-        right_x = forward_z * camera_up[1] - forward_y * camera_up[2]
-        right_y = forward_x * camera_up[2] - forward_z * camera_up[0]
-        right_z = forward_y * camera_up[0] - forward_x * camera_up[1]
+        forward.x = camera_target[0] - camera_position[0]
+        forward.y = camera_target[1] - camera_position[1]
+        forward.z = camera_target[2] - camera_position[2]
+        forward.normalize_ip()
         
-        # Normalize the right vector
-        right_length = math.sqrt(right_x**2 + right_y**2 + right_z**2)
-        if right_length > 0:
-            right_x /= right_length
-            right_y /= right_length
-            right_z /= right_length
+        # Calculate right vector (up x forward), normalized
+        up.x, up.y, up.z = camera_up
+        right.set_cross(up, forward).normalize_ip()
         
         # Calculate movement direction based on keys
-        move_x, move_y, move_z = 0.0, 0.0, 0.0
+        move.x = move.y = move.z = 0.0
+        step = self.move_speed * delta_time
         
         if self.keys['w']:  # Forward
-            move_x += forward_x * self.move_speed * delta_time
-            move_z += forward_z * self.move_speed * delta_time
+            move.add_scaled(forward, step)
         if self.keys['s']:  # Backward
-            move_x -= forward_x * self.move_speed * delta_time
-            move_z -= forward_z * self.move_speed * delta_time
+            move.add_scaled(forward, -step)
         if self.keys['a']:  # Left (strafe)
-            move_x += right_x * self.move_speed * delta_time
-            move_z += right_z * self.move_speed * delta_time
+            move.add_scaled(right, step)
         if self.keys['d']:  # Right (strafe)
-            move_x -= right_x * self.move_speed * delta_time
-            move_z -= right_z * self.move_speed * delta_time
+            move.add_scaled(right, -step)
         
         # Update player position (ignore Y movement for ground-based movement)
-        self.position.x += move_x
-        self.position.z += move_z
+        self.position.x += move.x
+        self.position.z += move.z
         
         # Update camera to follow player
         self.update_camera(camera_position, camera_target)
         
-    def update_camera(self, camera_position, camera_target):
+    def update_camera(self, camera_position, camera_target, position=None):
         """Update camera position and target based on player position and rotation"""
         camera_distance = 3.5
         base_height = 2.5
+        if position is None:
+            position = self.position
         
         # Calculate camera position behind the player using both yaw and pitch
-        camera_position[0] = self.position.x - camera_distance * math.cos(self.yaw) * math.cos(self.pitch)
-        camera_position[1] = self.position.y + base_height - camera_distance * math.sin(self.pitch)
-        camera_position[2] = self.position.z - camera_distance * math.sin(self.yaw) * math.cos(self.pitch)
+        camera_position[0] = position.x - camera_distance * math.cos(self.yaw) * math.cos(self.pitch)
+        camera_position[1] = position.y + base_height - camera_distance * math.sin(self.pitch)
+        camera_position[2] = position.z - camera_distance * math.sin(self.yaw) * math.cos(self.pitch)
         
         # Camera looks at the player
-        camera_target[0] = self.position.x
-        camera_target[1] = self.position.y 
-        camera_target[2] = self.position.z + 1
+        camera_target[0] = position.x
+        camera_target[1] = position.y 
+        camera_target[2] = position.z + 1
 
 
     def mouse_look(self, dx, dy, camera_position, camera_target, camera_up):
@@ -114,35 +126,58 @@ class Player:
         # Update camera based on new angles
         self.update_camera(camera_position, camera_target)
 
-    def action(self, key, entities):
-        """Handle action keys: collect crops, plant crops, interact with buildings"""
+    def action(self, key, entities, spatial_index=None):
+        """Handle action keys: collect crops, plant crops, interact with buildings.
+
+        When a spatial index is given, nearby entities are looked up through it
+        instead of scanning the whole entity list. `entities` is normally the
+        game's EntityList, whose remove() is O(1), so harvesting costs the
+        same however many crops there are.
+        """
         
         if key == b'e':  # Collect/harvest nearby crops
-            for entity in entities[:]:  # Use slice to avoid modification during iteration
-                if hasattr(entity, 'crop_type'):  # It's a crop
-                    distance = math.sqrt((entity.position.x - self.position.x)**2 + 
-                                       (entity.position.z - self.position.z)**2)
-                    if distance < 3.0:  # Within range
-                        if hasattr(entity, 'is_mature') and entity.is_mature():
-                            self.crop_count += 1
-                            entities.remove(entity)
-                            print(f"Harvested crop! Total: {self.crop_count}")
-                            break
+            entity = self.find_nearby(entities, spatial_index, 3.0, is_harvestable)
+            if entity is not None:
+                self.crop_count += 1
+                entities.remove(entity)
+                if spatial_index is not None:
+                    spatial_index.remove(entity)
+                entity.release()
+                events.bus.emit(events.Harvested((entity.position.x, entity.position.z), self.crop_count))
                             
         elif key == b'r':  # Plant/throw crop
             if self.crop_count > 0:
                 # Create new crop at player position
                 new_crop = Crop(Vector3(self.position.x + 2, 0, self.position.z))
                 entities.append(new_crop)
+                if spatial_index is not None:
+                    spatial_index.insert(new_crop)
                 self.crop_count -= 1
-                print(f"Planted crop! Remaining: {self.crop_count}")
+                events.bus.emit(events.Planted((new_crop.position.x, new_crop.position.z), self.crop_count))
                 
         elif key == b'f':  # Interact with buildings
-            for entity in entities:
-                if hasattr(entity, 'building_type'):  # It's a building
-                    distance = math.sqrt((entity.position.x - self.position.x)**2 + 
-                                       (entity.position.z - self.position.z)**2)
-                    if distance < 4.0:  # Within range
-                        self.energy = min(100, self.energy + 20)
-                        print(f"Used building! Energy: {self.energy}")
-                        break
+            entity = self.find_nearby(entities, spatial_index, 4.0, is_building)
+            if entity is not None:
+                self.energy = min(100, self.energy + 20)
+                events.bus.emit(events.BuildingUsed(self.energy))
+
+    def find_nearby(self, entities, spatial_index, radius, predicate):
+        """Closest entity within radius (XZ plane) matching predicate, or None."""
+        if spatial_index is not None:
+            return spatial_index.nearest(self.position.x, self.position.z, radius, predicate)
+
+        for entity in entities:
+            if predicate(entity):
+                distance = math.sqrt((entity.position.x - self.position.x)**2 + 
+                                   (entity.position.z - self.position.z)**2)
+                if distance < radius:  # Within range
+                    return entity
+        return None
+
+
+def is_harvestable(entity):
+    return hasattr(entity, 'crop_type') and hasattr(entity, 'is_mature') and entity.is_mature()
+
+
+def is_building(entity):
+    return hasattr(entity, 'building_type')
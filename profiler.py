@@ -0,0 +1,196 @@
+import json
+import time
+from collections import deque
+import numpy as np
+
+
+class FrameSample:
+    """Timings and counters recorded between begin_frame() and end_frame()."""
+    __slots__ = ('index', 'start', 'duration', 'scopes', 'counters')
+
+    def __init__(self, index, start):
+        self.index = index
+        self.start = start
+        self.duration = 0.0
+        self.scopes = []        # (name, start, duration, depth)
+        self.counters = {}
+
+
+class _Scope:
+    """Context manager returned by Profiler.scope()."""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler.depth += 1
+        self.start = profiler.clock()
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.profiler
+        end = profiler.clock()
+        profiler.depth -= 1
+        profiler.record(self.name, self.start, end - self.start)
+
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class Profiler:
+    """Scoped timers and counters, kept per frame in a ring buffer.
+
+    Wrap work in `with profiler.scope('name'):` (nesting is fine) or hand
+    in timings measured elsewhere with record(); count('draw_calls', n)
+    accumulates per-frame counters. end_frame() files the frame into a
+    buffer of the last `capacity` frames, which feeds the summary methods
+    and export_chrome_trace(). While disabled, scope() returns a shared
+    no-op object and count()/record() return immediately.
+    """
+
+    def __init__(self, capacity=300, enabled=True, clock=time.perf_counter):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.clock = clock
+        self.frames = deque(maxlen=capacity)
+        self.current = None
+        self.depth = 0
+        self.frame_index = 0
+        self.origin = clock()   # trace timestamps are relative to this
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.current = None
+            self.depth = 0
+
+    def clear(self):
+        self.frames.clear()
+        self.current = None
+
+    # --------------------
+    # Recording
+    # --------------------
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current = FrameSample(self.frame_index, self.clock())
+        self.depth = 0
+        self.frame_index += 1
+
+    def end_frame(self):
+        frame = self.current
+        if frame is None:
+            return None
+        frame.duration = self.clock() - frame.start
+        self.frames.append(frame)
+        self.current = None
+        return frame
+
+    def scope(self, name):
+        if self.current is None:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def record(self, name, start, duration):
+        """Add a scope timed by the caller (clock() seconds)."""
+        frame = self.current
+        if frame is not None:
+            frame.scopes.append((name, start, duration, self.depth))
+
+    def count(self, name, amount=1):
+        frame = self.current
+        if frame is not None:
+            counters = frame.counters
+            counters[name] = counters.get(name, 0) + amount
+
+    # --------------------
+    # Summaries
+    # --------------------
+    def frame_times_ms(self):
+        return np.array([frame.duration for frame in self.frames], dtype=np.float64) * 1000.0
+
+    def fps(self):
+        """Frames per second over the buffered frames (wall time, first to last)."""
+        if len(self.frames) < 2:
+            return 0.0
+        first, last = self.frames[0], self.frames[-1]
+        span = last.start + last.duration - first.start
+        return len(self.frames) / span if span > 0 else 0.0
+
+    def percentiles(self, percents=(50, 95, 99)):
+        """Frame time in ms at each percentile."""
+        times = self.frame_times_ms()
+        if len(times) == 0:
+            return {p: 0.0 for p in percents}
+        return dict(zip(percents, np.percentile(times, percents).tolist()))
+
+    def scope_totals(self):
+        """name -> average ms per frame spent in the scope (inclusive)."""
+        totals = {}
+        for frame in self.frames:
+            for name, _, duration, _ in frame.scopes:
+                totals[name] = totals.get(name, 0.0) + duration
+        frames = max(1, len(self.frames))
+        return {name: 1000.0 * total / frames for name, total in totals.items()}
+
+    def top_scopes(self, n=5):
+        """The n scopes with the highest average ms per frame, as (name, ms)."""
+        return sorted(self.scope_totals().items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def counter_averages(self):
+        totals = {}
+        for frame in self.frames:
+            for name, value in frame.counters.items():
+                totals[name] = totals.get(name, 0) + value
+        frames = max(1, len(self.frames))
+        return {name: total / frames for name, total in totals.items()}
+
+    def summary(self, top=5):
+        return {
+            'frames': len(self.frames),
+            'fps': self.fps(),
+            'frame_ms': self.percentiles(),
+            'top_scopes': self.top_scopes(top),
+            'counters': self.counter_averages(),
+        }
+
+    # --------------------
+    # Export
+    # --------------------
+    def chrome_trace(self, pid=1, tid=1):
+        """Buffered frames in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        events = []
+        for frame in self.frames:
+            events.append({'name': 'frame', 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (frame.start - self.origin) * 1e6, 'dur': frame.duration * 1e6,
+                           'args': {'index': frame.index}})
+            for name, start, duration, _ in frame.scopes:
+                events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                               'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6})
+            if frame.counters:
+                events.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'tid': tid,
+                               'ts': (frame.start - self.origin) * 1e6, 'args': dict(frame.counters)})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+# Profiler used by the game; frames are recorded by main.game_loop
+profiler = Profiler()
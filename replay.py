@@ -0,0 +1,203 @@
+import hashlib
+import json
+import struct
+import numpy as np
+import crop_field
+import physics_world
+
+
+# File layout:
+#   header   MAGIC, version (u32), tick rate (u32), metadata length (u32), UTF-8 JSON metadata
+#   records  RECORD each, in tick order; CHECKPOINT and END records are followed by a digest
+#
+# Ticks count simulation steps since recording started. Input recorded at
+# tick T arrived before step T ran, so a replay feeds it right before step T.
+MAGIC = b'FARMINPT'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIII')
+RECORD = struct.Struct('<IBhh')     # tick, kind, key code or mouse x, mouse y
+DIGEST_SIZE = 16
+CHECKPOINT_INTERVAL = 60            # ticks between recorded state digests (0 = end only)
+FLUSH_BYTES = 64 * 1024
+
+# Record kinds
+KEY_DOWN = 0
+KEY_UP = 1
+MOUSE_MOVE = 2
+CHECKPOINT = 3
+END = 4
+
+
+class InputLogError(ValueError):
+    """The file is not an input log, or comes from a newer version."""
+
+
+# --------------------
+# Simulation state digest
+# --------------------
+CROP_ARRAYS = ('positions', 'planted_at', 'last_stage_update', 'stages', 'thresholds', 'alive')
+BODY_ARRAYS = ('positions', 'velocities', 'on_ground', 'alive')
+
+
+def simulation_digest(state, field=None, world=None):
+    """Hash of everything the simulation steps: crops, bodies, player stats and game time.
+
+    Render-side state (dirty flags, camera, HUD) is left out, so a windowed
+    run and a headless replay of it hash the same.
+    """
+    field = field if field is not None else crop_field.default_field
+    world = world if world is not None else physics_world.default_world
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    h.update(struct.pack('<qqd', field.count, world.count, field.time))
+    for name in CROP_ARRAYS:
+        h.update(np.ascontiguousarray(getattr(field, name)[:field.count]).tobytes())
+    for name in BODY_ARRAYS:
+        h.update(np.ascontiguousarray(getattr(world, name)[:world.count]).tobytes())
+    player = state.get('player')
+    if player is not None:
+        position = player.position
+        h.update(struct.pack('<5dqd', position.x, position.y, position.z, player.yaw, player.pitch,
+                             player.crop_count, player.energy))
+    h.update(struct.pack('<dq', state['elapsed_sec'], len(state['pending_actions'])))
+    return h.digest()
+
+
+# --------------------
+# Recording
+# --------------------
+class InputRecorder:
+    """Writes input events, stamped with the simulation tick, to an input log.
+
+    record() is called from the input callbacks; checkpoint() once per step,
+    before the step runs, stores a simulation_digest() every
+    `checkpoint_interval` ticks; close() writes the END record with the
+    final digest. Records are buffered and written FLUSH_BYTES at a time.
+    """
+
+    def __init__(self, path, start_tick=0, tick_rate=60, metadata=None,
+                 checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.start_tick = start_tick
+        self.checkpoint_interval = checkpoint_interval
+        self.buffer = bytearray()
+        self.events = 0
+        self.checkpoints = 0
+        self.file = open(path, 'wb')
+        encoded = json.dumps(metadata or {}).encode('utf-8')
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, tick_rate, len(encoded)) + encoded)
+
+    def record(self, tick, kind, a=0, b=0):
+        self.buffer += RECORD.pack(tick - self.start_tick, kind, a, b)
+        self.events += 1
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.flush()
+
+    def checkpoint(self, tick, state):
+        tick -= self.start_tick
+        if self.checkpoint_interval and tick % self.checkpoint_interval == 0:
+            self.buffer += RECORD.pack(tick, CHECKPOINT, 0, 0) + simulation_digest(state)
+            self.checkpoints += 1
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer = bytearray()
+
+    def close(self, tick, state):
+        """Finish the log at `tick` with the digest of the state there."""
+        self.buffer += RECORD.pack(tick - self.start_tick, END, 0, 0) + simulation_digest(state)
+        self.flush()
+        self.file.close()
+
+
+# --------------------
+# Reading and replaying
+# --------------------
+class InputLog:
+    """A whole input log in memory: events, checkpoint digests and the end."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if len(raw) < HEADER.size:
+            raise InputLogError(f"{path}: file too short")
+        magic, version, self.tick_rate, length = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise InputLogError(f"{path}: not an input log")
+        if version > FORMAT_VERSION:
+            raise InputLogError(f"{path}: log version {version} is newer than {FORMAT_VERSION}")
+        self.path = path
+        self.metadata = json.loads(raw[HEADER.size:HEADER.size + length].decode('utf-8'))
+        self.events = []            # (tick, kind, a, b)
+        self.checkpoints = {}       # tick -> digest
+        self.end_tick = None
+        self.final_digest = None
+
+        offset = HEADER.size + length
+        last_tick = 0
+        while offset + RECORD.size <= len(raw):
+            tick, kind, a, b = RECORD.unpack_from(raw, offset)
+            offset += RECORD.size
+            last_tick = tick
+            if kind in (CHECKPOINT, END):
+                digest = raw[offset:offset + DIGEST_SIZE]
+                offset += DIGEST_SIZE
+                if kind == CHECKPOINT:
+                    self.checkpoints[tick] = digest
+                else:
+                    self.end_tick, self.final_digest = tick, digest
+                    break
+            else:
+                self.events.append((tick, kind, a, b))
+        if self.end_tick is None:
+            self.end_tick = last_tick   # recording was cut short; replay what is there
+
+
+class InputReplayer:
+    """Feeds an InputLog back through the input handlers, tick by tick.
+
+    `handlers` maps KEY_DOWN and KEY_UP to handler(key, x, y) and
+    MOUSE_MOVE to handler(x, y), the same functions the GLUT callbacks
+    reach. feed() runs once per step before the step, like the recorder's
+    checkpoint(), and compares the state with every recorded digest; at
+    the end tick it compares the final digest and sets `finished`.
+    """
+
+    def __init__(self, log, handlers, start_tick=0):
+        self.log = log
+        self.handlers = handlers
+        self.start_tick = start_tick
+        self.position = 0
+        self.checked = 0
+        self.mismatches = []        # ticks whose digest differed from the recording
+        self.finished = False
+
+    def feed(self, tick, state):
+        tick -= self.start_tick
+        events = self.log.events
+        while self.position < len(events) and events[self.position][0] <= tick:
+            _, kind, a, b = events[self.position]
+            self.position += 1
+            if kind == MOUSE_MOVE:
+                self.handlers[kind](a, b)
+            else:
+                self.handlers[kind](bytes([a]), 0, 0)
+        expected = self.log.checkpoints.get(tick)
+        if tick >= self.log.end_tick:
+            expected = self.log.final_digest
+            self.finished = True
+        if expected is not None:
+            self.checked += 1
+            if simulation_digest(state) != expected:
+                self.mismatches.append(tick)
+
+    def matches(self):
+        return not self.mismatches
+
+    def summary(self):
+        return {
+            'ticks': self.log.end_tick,
+            'events': len(self.log.events),
+            'digests_checked': self.checked,
+            'first_mismatch': self.mismatches[0] if self.mismatches else None,
+            'matches_recording': self.matches(),
+        }
@@ -0,0 +1,262 @@
+import json
+import os
+import struct
+import time
+import numpy as np
+from chunks import ChunkData
+
+
+# File layout:
+#   header     MAGIC, version (u32), flags (u32), directory offset (u64), directory length (u64)
+#   sections   raw little-endian arrays, each starting on a SECTION_ALIGNMENT boundary
+#   directory  UTF-8 JSON: {"sections": {name: {dtype, shape, offset}}, "metadata": {...}}
+#
+# Crop and building rows are sorted by chunk, and the chunk_* sections index
+# them, so a single chunk can be read without touching the rest of the file.
+MAGIC = b'FARMSAVE'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIQQ')
+SECTION_ALIGNMENT = 64
+DEFAULT_CHUNK_SIZE = 32.0
+
+
+class SaveFormatError(ValueError):
+    """The file is not a save, is truncated, or comes from a newer version."""
+
+
+def _align(offset):
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+
+def _chunk_index(positions, chunk_size):
+    """(N, 2) chunk keys of XZ positions."""
+    if len(positions) == 0:
+        return np.empty((0, 2), dtype=np.int32)
+    return np.floor(np.asarray(positions)[:, [0, 2]] / chunk_size).astype(np.int32)
+
+
+def _flat_keys(keys):
+    """Chunk (x, z) pairs packed into one int64 each, for sorting and searching."""
+    keys = np.asarray(keys, dtype=np.int64).reshape(-1, 2)
+    return keys[:, 0] << 32 | (keys[:, 1] & 0xffffffff)
+
+
+def _sort_by_chunk(positions, chunk_size):
+    """Row order grouping positions by chunk, and the sorted chunk keys."""
+    keys = _chunk_index(positions, chunk_size)
+    order = np.argsort(_flat_keys(keys), kind='stable')
+    return order, keys[order]
+
+
+def _chunk_table(crop_keys, building_keys):
+    """Chunk ids (sorted packed keys) and the [start, end) crop/building rows of each.
+
+    Both key arrays must already be grouped by _sort_by_chunk.
+    """
+    crop_flat = _flat_keys(crop_keys)
+    building_flat = _flat_keys(building_keys)
+    ids = np.unique(np.concatenate([crop_flat, building_flat]))
+    return (ids,
+            np.searchsorted(crop_flat, ids, side='left'), np.searchsorted(crop_flat, ids, side='right'),
+            np.searchsorted(building_flat, ids, side='left'), np.searchsorted(building_flat, ids, side='right'))
+
+
+def write_save(path, data, metadata=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write ChunkData for the whole world plus a JSON-able metadata dict."""
+    crop_order, crop_keys = _sort_by_chunk(data.crop_positions, chunk_size)
+    building_order, building_keys = _sort_by_chunk(data.building_positions, chunk_size)
+    data = data.take(crop_order, building_order)
+    ids, crop_start, crop_end, building_start, building_end = _chunk_table(crop_keys, building_keys)
+
+    sections = dict(data.columns())
+    sections['chunk_ids'] = ids
+    sections['chunk_keys'] = np.column_stack([ids >> 32, (ids & 0xffffffff).astype(np.uint32).view(np.int32)]).astype(np.int32)
+    sections['chunk_crop_start'] = crop_start.astype(np.int64)
+    sections['chunk_crop_end'] = crop_end.astype(np.int64)
+    sections['chunk_building_start'] = building_start.astype(np.int64)
+    sections['chunk_building_end'] = building_end.astype(np.int64)
+
+    metadata = dict(metadata or {})
+    metadata['chunk_size'] = chunk_size
+    directory = {'sections': {}, 'metadata': metadata}
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        offset = HEADER.size
+        for name, array in sections.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype.byteorder == '>':
+                array = array.astype(array.dtype.newbyteorder('<'))
+            aligned = _align(offset)
+            f.write(b'\0' * (aligned - offset))
+            array.tofile(f)
+            directory['sections'][name] = {
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'offset': aligned,
+            }
+            offset = aligned + array.nbytes
+
+        encoded = json.dumps(directory).encode('utf-8')
+        f.write(encoded)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, offset, len(encoded)))
+    os.replace(temporary, path)
+
+
+class SaveFile:
+    """A save opened through one read-only memory map.
+
+    Opening only parses the header and the JSON directory; arrays are views
+    into the map, so nothing is read from disk until it is used. chunk()
+    copies out just one chunk's rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise SaveFormatError(f"{path}: file too short")
+            magic, version, self.flags, directory_offset, directory_length = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise SaveFormatError(f"{path}: not a save file")
+            if version > FORMAT_VERSION:
+                raise SaveFormatError(f"{path}: save version {version} is newer than {FORMAT_VERSION}")
+            f.seek(directory_offset)
+            encoded = f.read(directory_length)
+            if len(encoded) < directory_length:
+                raise SaveFormatError(f"{path}: truncated directory")
+        self.version = version
+        directory = json.loads(encoded.decode('utf-8'))
+        self.sections = directory['sections']
+        self.metadata = directory['metadata']
+        self.chunk_size = self.metadata.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        self.raw = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.raw = None
+
+    def array(self, name):
+        """Zero-copy view of a section."""
+        section = self.sections[name]
+        dtype = np.dtype(section['dtype'])
+        shape = tuple(section['shape'])
+        count = int(np.prod(shape)) if shape else 1
+        start = section['offset']
+        view = self.raw[start:start + count * dtype.itemsize].view(dtype)
+        return view.reshape(shape)
+
+    @property
+    def crop_count(self):
+        return self.sections['crop_positions']['shape'][0]
+
+    @property
+    def building_count(self):
+        return self.sections['building_positions']['shape'][0]
+
+    def world(self):
+        """ChunkData over the whole world (columns are memory-mapped views)."""
+        return ChunkData(**{name: self.array(name) for name in ChunkData().column_names()})
+
+    def chunk_keys(self):
+        return [tuple(key) for key in self.array('chunk_keys').tolist()]
+
+    def chunk_rows(self, key):
+        """(crop start, crop end, building start, building end) of a chunk, or None.
+
+        Binary search over the sorted chunk ids, so only a few pages of the
+        chunk table are touched.
+        """
+        ids = self.array('chunk_ids')
+        wanted = _flat_keys([key])[0]
+        i = int(np.searchsorted(ids, wanted))
+        if i >= len(ids) or ids[i] != wanted:
+            return None
+        return (int(self.array('chunk_crop_start')[i]), int(self.array('chunk_crop_end')[i]),
+                int(self.array('chunk_building_start')[i]), int(self.array('chunk_building_end')[i]))
+
+    def chunk(self, key):
+        """ChunkData for one chunk (copied out of the map), or None if it is empty.
+
+        Matches the ChunkManager generator signature, so a save can seed
+        chunk streaming directly.
+        """
+        rows = self.chunk_rows(key)
+        if rows is None:
+            return None
+        crop_start, crop_end, building_start, building_end = rows
+        columns = {name: np.array(self.array(name)[crop_start:crop_end]) for name in ChunkData.CROP_COLUMNS}
+        columns.update({name: np.array(self.array(name)[building_start:building_end])
+                        for name in ChunkData.BUILDING_COLUMNS})
+        return ChunkData(**columns)
+
+
+# --------------------
+# Game state <-> save
+# --------------------
+def snapshot_field(field):
+    """Crop columns for every live slot of a CropField, without touching Crop objects."""
+    alive = np.flatnonzero(field.alive[:field.count])
+    return ChunkData(
+        crop_positions=field.positions[alive],
+        crop_elapsed=field.elapsed_of(alive),
+        crop_last_stage_update=field.last_stage_update[alive],
+        crop_stages=field.stages[alive],
+        crop_thresholds=field.thresholds[alive],
+    )
+
+
+def snapshot_player(player):
+    return {
+        'position': [player.position.x, player.position.y, player.position.z],
+        'yaw': player.yaw,
+        'pitch': player.pitch,
+        'crop_count': player.crop_count,
+        'energy': player.energy,
+    }
+
+
+def restore_player(player, saved):
+    player.position.x, player.position.y, player.position.z = saved['position']
+    player.previous_position.set(player.position)
+    player.yaw = saved['yaw']
+    player.pitch = saved['pitch']
+    player.crop_count = saved['crop_count']
+    player.energy = saved['energy']
+
+
+def snapshot_world(state, field):
+    """(ChunkData, metadata, chunk size) of live crops, buildings and player stats.
+
+    The arrays are copies, so write_save() can run on another thread while
+    the game goes on. With chunk streaming on, chunks that are not resident
+    are read back from the chunk store so the save covers the whole world.
+    """
+    buildings = [building for _, building in state['registry'].query('building')]
+    parts = [snapshot_field(field), ChunkData.from_entities([], buildings)]
+    chunks = state.get('chunks')
+    chunk_size = DEFAULT_CHUNK_SIZE
+    if chunks is not None:
+        chunk_size = chunks.chunk_size
+        chunks.wait_saves()     # let queued chunk writes land first
+        for key in chunks.store.keys():
+            if key not in chunks.resident:
+                parts.append(chunks.store.load(key))
+
+    metadata = {'elapsed_sec': state['elapsed_sec'], 'saved_at': time.time()}
+    if state.get('player'):
+        metadata['player'] = snapshot_player(state['player'])
+    return ChunkData.concatenate(parts), metadata, chunk_size
+
+
+def save_world(path, state, field):
+    """Save live crops, buildings and player stats from a game_state."""
+    write_save(path, *snapshot_world(state, field))
@@ -0,0 +1,336 @@
+import multiprocessing
+import os
+import time
+import types
+from multiprocessing import shared_memory
+import numpy as np
+import crop_field
+import physics_world
+
+
+# Arrays in a shared block start on this boundary
+ALIGNMENT = 64
+# Below this many live crops plus bodies per region, the per-step pipe round
+# trips cost more than the stepping the workers take off the main process
+MIN_WORK_PER_REGION = 50000
+
+
+# --------------------
+# Shared-memory arrays
+# --------------------
+def share_arrays(owner):
+    """Move a CropField's or PhysicsWorld's arrays into one shared memory block.
+
+    Each array attribute is copied into the block and replaced by a view of
+    it, so the owner keeps working unchanged. Returns the block and its
+    layout: (name, dtype, shape, offset) per array, enough to attach_arrays().
+    """
+    layout, size = [], 0
+    for name in owner.array_names():
+        array = getattr(owner, name)
+        size = (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        layout.append((name, array.dtype.str, array.shape, size))
+        size += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, view in views_of(block, layout).items():
+        view[...] = getattr(owner, name)
+        setattr(owner, name, view)
+    return block, layout
+
+
+def views_of(block, layout):
+    return {name: np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+            for name, dtype, shape, offset in layout}
+
+
+def attach_arrays(name, layout):
+    """Open a block created by share_arrays() in another process; returns (block, views)."""
+    block = shared_memory.SharedMemory(name=name)
+    return block, views_of(block, layout)
+
+
+def release_block(block):
+    """Close a block, leaving it mapped if some array still views it."""
+    try:
+        block.close()
+    except BufferError:
+        pass
+
+
+# --------------------
+# One region
+# --------------------
+class Shard:
+    """The slice of the world between two region bounds along X.
+
+    Owns the growth schedule of the crops in the region (a private
+    CropField over the shared arrays, so step() runs the same timing wheel)
+    and the bodies currently in it. Crop rows are rebuilt from positions
+    whenever the field's revision changes. Body rows come from the caller:
+    the full set when bodies were added or removed, otherwise the bodies
+    handed over by other regions. Bodies that end a step outside the region
+    are handed back to the caller, which passes them on to the shard they
+    moved into.
+    """
+
+    def __init__(self, region, bounds):
+        self.region = region
+        self.bounds = np.asarray(bounds, dtype=np.float64)   # inner region boundaries
+        self.crops = crop_field.CropField(capacity=1)
+        self.bodies = types.SimpleNamespace()
+        self.body_rows = np.empty(0, dtype=np.intp)
+        self.crop_revision = None
+
+    def attach(self, crop_arrays, body_arrays):
+        for name, array in crop_arrays.items():
+            setattr(self.crops, name, array)
+        self.crops.capacity = len(self.crops.alive)
+        for name, array in body_arrays.items():
+            setattr(self.bodies, name, array)
+        self.crop_revision = None
+
+    def region_of(self, x):
+        return np.searchsorted(self.bounds, x, side='right')
+
+    def step(self, delta_time, crop_time, crop_count, crop_revision, body_rows, replace_bodies):
+        """Grow and integrate the region; returns (grown crops, leaving bodies, their new regions)."""
+        crops = self.crops
+        crops.count = crop_count
+        crops.time = crop_time
+        if crop_revision != self.crop_revision:
+            rows = np.flatnonzero(crops.alive[:crop_count])
+            crops.buckets, crops.bucket_heap = {}, []
+            crops.schedule(rows[self.region_of(crops.positions[rows, 0]) == self.region])
+            self.crop_revision = crop_revision
+        changed = crops.step(delta_time)
+
+        bodies = self.bodies
+        if replace_bodies:
+            self.body_rows = body_rows
+        elif len(body_rows):
+            self.body_rows = np.concatenate([self.body_rows, body_rows])
+        rows = self.body_rows
+        moving = np.flatnonzero(bodies.dynamic[rows])
+        if len(moving) == 0:
+            return changed, moving, moving
+        active = rows[moving]
+        physics_world.integrate_rows(bodies, active, delta_time)
+        regions = self.region_of(bodies.positions[active, 0])
+        leaving = regions != self.region
+        if leaving.any():
+            keep = np.ones(len(rows), dtype=bool)
+            keep[moving[leaving]] = False
+            self.body_rows = rows[keep]
+        return changed, active[leaving], regions[leaving]
+
+
+def run_worker(connection, region, bounds):
+    """Worker process loop: ('attach', ...), ('step', ...) and ('stop',) commands."""
+    shard = Shard(region, bounds)
+    blocks = []
+    while True:
+        command = connection.recv()
+        kind = command[0]
+        if kind == 'step':
+            start = time.perf_counter()
+            result = shard.step(*command[1:])
+            connection.send(result + (time.perf_counter() - start,))
+        elif kind == 'attach':
+            shard.attach({}, {})
+            for block in blocks:
+                release_block(block)
+            crop_block, crop_views = attach_arrays(*command[1])
+            body_block, body_views = attach_arrays(*command[2])
+            blocks = [crop_block, body_block]
+            shard.attach(crop_views, body_views)
+        else:
+            shard = None
+            for block in blocks:
+                release_block(block)
+            connection.close()
+            return
+
+
+# --------------------
+# Main process
+# --------------------
+def serial_fallback(workers, field, world, cpus=None):
+    """Why stepping this world in `workers` processes would not pay off, or None.
+
+    More workers than CPUs only time-slice one core, and regions with too
+    little work (MIN_WORK_PER_REGION) spend their time waiting on pipes.
+    workers=0 already runs in-process and never falls back.
+    """
+    if workers == 0:
+        return None
+    cpus = cpus if cpus is not None else os.cpu_count() or 1
+    if workers > cpus:
+        return f"{workers} workers but {cpus} CPU{'s' if cpus != 1 else ''}"
+    work = (int(np.count_nonzero(field.alive[:field.count])) +
+            int(np.count_nonzero(world.alive[:world.count])))
+    if work < MIN_WORK_PER_REGION * workers:
+        return f"{work} crops and bodies is under {MIN_WORK_PER_REGION} per region"
+    return None
+
+
+class ShardedSimulation:
+    """Crop growth and body integration split into X regions across processes.
+
+    The field's and world's arrays move into shared memory (share_arrays),
+    and each of `workers` processes steps one region of them: the crops
+    planted there and the bodies currently inside. step() sends every
+    worker the tick and waits for all of them, so between steps the main
+    process owns the arrays outright. That is where everything crossing a
+    region border happens: planting and harvesting (they write the arrays
+    and bump the field's revision, which makes the workers rebuild their
+    rows), collision resolution, and body handoff (a body that ends a step
+    in another region is integrated by that region's worker from the next
+    step on, so no body is stepped twice or skipped).
+
+    Region bounds default to quantiles of the crop and body X positions,
+    so every region starts with a similar load. workers=0 runs a single
+    region in this process, without shared memory. Arrays that outgrow
+    their capacity are re-shared before the next step. close() copies the
+    arrays back into private memory and rebuilds the field's own schedule.
+    """
+
+    def __init__(self, field, world, workers=2, bounds=None):
+        self.field = field
+        self.world = world
+        self.workers = workers
+        regions = max(1, workers)
+        self.bounds = np.asarray(bounds if bounds is not None else self.default_bounds(regions),
+                                 dtype=np.float64)
+        self.blocks = {}        # 'crops' / 'bodies' -> SharedMemory
+        self.views = {}         # 'crops' / 'bodies' -> {name: array} the regions step
+        self.incoming = [[] for _ in range(regions)]    # bodies handed to each region
+        self.body_revision = None
+        self.handoffs = 0
+        self.steps = 0
+        self.busy = np.zeros(regions)   # seconds each region spent stepping
+        self.shard = None
+        self.processes = []
+        self.connections = []
+        if workers == 0:
+            self.shard = Shard(0, self.bounds)
+        else:
+            context = multiprocessing.get_context('spawn')  # no forking GL or loader threads
+            for region in range(workers):
+                parent, child = context.Pipe()
+                process = context.Process(target=run_worker, args=(child, region, self.bounds),
+                                          name=f"shard-{region}", daemon=True)
+                process.start()
+                child.close()
+                self.processes.append(process)
+                self.connections.append(parent)
+        self.attach()
+
+    def default_bounds(self, regions):
+        field, world = self.field, self.world
+        x = np.concatenate([field.positions[:field.count, 0][field.alive[:field.count]],
+                            world.positions[:world.count, 0][world.alive[:world.count]]])
+        if regions == 1 or len(x) == 0:
+            return np.zeros(regions - 1)
+        return np.quantile(x, np.arange(1, regions) / regions)
+
+    def attach(self):
+        """(Re-)share the arrays and point every region at them."""
+        if self.shard is not None:
+            self.views = {'crops': {name: getattr(self.field, name) for name in self.field.array_names()},
+                          'bodies': {name: getattr(self.world, name) for name in self.world.array_names()}}
+            self.shard.attach(self.views['crops'], self.views['bodies'])
+            self.body_revision = None
+            return
+        old = list(self.blocks.values())
+        layouts = {}
+        for key, owner in (('crops', self.field), ('bodies', self.world)):
+            block, layout = share_arrays(owner)
+            self.blocks[key] = block
+            self.views[key] = {name: getattr(owner, name) for name in owner.array_names()}
+            layouts[key] = (block.name, layout)
+        for connection in self.connections:
+            connection.send(('attach', layouts['crops'], layouts['bodies']))
+        for block in old:
+            release_block(block)
+            block.unlink()
+        self.body_revision = None
+
+    def reallocated(self):
+        """Whether the field or world replaced its arrays (grew) since attach()."""
+        return (self.field.alive is not self.views['crops']['alive'] or
+                self.world.alive is not self.views['bodies']['alive'])
+
+    def step(self, delta_time):
+        """Advance every region by delta_time; returns the crop indices that changed stage."""
+        field, world = self.field, self.world
+        if self.reallocated():
+            self.attach()
+        # The regions keep the growth schedule while sharded; drop what the field filed meanwhile
+        field.buckets, field.bucket_heap = {}, []
+        replace = world.revision != self.body_revision
+        if replace:
+            # Bodies were added or removed: split them up again here, before anything moves
+            rows = np.flatnonzero(world.alive[:world.count])
+            regions = np.searchsorted(self.bounds, world.positions[rows, 0], side='right')
+            body_rows = [rows[regions == region] for region in range(len(self.incoming))]
+            self.body_revision = world.revision
+        else:
+            body_rows = [np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+                         for parts in self.incoming]
+        self.incoming = [[] for _ in body_rows]
+        tick = (delta_time, field.time, field.count, field.revision)
+
+        if self.shard is not None:
+            start = time.perf_counter()
+            results = [self.shard.step(*tick, body_rows[0], replace) + (time.perf_counter() - start,)]
+        else:
+            for connection, rows in zip(self.connections, body_rows):
+                connection.send(('step',) + tick + (rows, replace))
+            results = [connection.recv() for connection in self.connections]
+        field.time += delta_time
+        self.steps += 1
+
+        changed = []
+        for region, (grown, leaving, regions, busy) in enumerate(results):
+            self.busy[region] += busy
+            if len(grown):
+                changed.append(grown)
+            if len(leaving):
+                self.handoffs += len(leaving)
+                for target in np.unique(regions).tolist():
+                    self.incoming[target].append(leaving[regions == target])
+        world.sync_tracked()
+        if not changed:
+            return np.empty(0, dtype=np.intp)
+        changed = np.concatenate(changed) if len(changed) > 1 else changed[0]
+        field.any_dirty = True
+        return changed
+
+    def close(self):
+        """Stop the workers and give the field and world private arrays again."""
+        for connection in self.connections:
+            connection.send(('stop',))
+        for process in self.processes:
+            process.join()
+        for connection in self.connections:
+            connection.close()
+        self.processes, self.connections = [], []
+        for owner in (self.field, self.world):
+            for name in owner.array_names():
+                setattr(owner, name, np.array(getattr(owner, name)))
+        self.views = {}
+        for block in self.blocks.values():
+            release_block(block)
+            block.unlink()
+        self.blocks = {}
+        field = self.field
+        field.buckets, field.bucket_heap = {}, []
+        field.schedule(np.flatnonzero(field.alive[:field.count]))
+
+    def metrics(self):
+        return {
+            'workers': self.workers,
+            'steps': self.steps,
+            'handoffs': self.handoffs,
+            'busy_ms_per_step': (1000.0 * self.busy / max(1, self.steps)).tolist(),
+        }
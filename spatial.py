@@ -0,0 +1,127 @@
+import math
+
+
+class SpatialHash:
+    """Uniform grid over the XZ plane for proximity queries.
+
+    Entities are bucketed by their center point. Inserting sets
+    `entity.spatial_index` so objects can report their own moves through
+    move(); removal is O(1). Entities whose bounding sphere is wider than a
+    cell are also listed in `oversized`, since their cell says little about
+    where they reach (see culling.cull_entities). `version` changes whenever
+    the set of tracked entities does (not on moves).
+    """
+
+    def __init__(self, cell_size=4.0):
+        self.cell_size = cell_size
+        self.cells = {}         # (cell_x, cell_z) -> set of entities
+        self.entity_cells = {}  # entity -> (cell_x, cell_z)
+        self.oversized = set()
+        self.version = 0
+
+    def __len__(self):
+        return len(self.entity_cells)
+
+    def __contains__(self, entity):
+        return entity in self.entity_cells
+
+    def cell_of(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def is_oversized(self, entity):
+        size = (getattr(entity, 'width', 0.0), getattr(entity, 'height', 0.0), getattr(entity, 'depth', 0.0))
+        return 0.5 * math.hypot(*size) > self.cell_size
+
+    def insert(self, entity):
+        """Start tracking an entity."""
+        if entity in self.entity_cells:
+            self.move(entity)
+            return
+        key = self.cell_of(entity.position.x, entity.position.z)
+        self.cells.setdefault(key, set()).add(entity)
+        self.entity_cells[entity] = key
+        if self.is_oversized(entity):
+            self.oversized.add(entity)
+        entity.spatial_index = self
+        self.version += 1
+
+    def remove(self, entity):
+        """Stop tracking an entity."""
+        key = self.entity_cells.pop(entity, None)
+        if key is None:
+            return
+        bucket = self.cells[key]
+        bucket.discard(entity)
+        if not bucket:
+            del self.cells[key]
+        self.oversized.discard(entity)
+        entity.spatial_index = None
+        self.version += 1
+
+    def move(self, entity):
+        """Re-bucket an entity after its position changed."""
+        old_key = self.entity_cells.get(entity)
+        if old_key is None:
+            return
+        key = self.cell_of(entity.position.x, entity.position.z)
+        if key == old_key:
+            return
+        bucket = self.cells[old_key]
+        bucket.discard(entity)
+        if not bucket:
+            del self.cells[old_key]
+        self.cells.setdefault(key, set()).add(entity)
+        self.entity_cells[entity] = key
+
+    def clear(self):
+        for entity in self.entity_cells:
+            entity.spatial_index = None
+        self.cells.clear()
+        self.entity_cells.clear()
+        self.oversized.clear()
+        self.version += 1
+
+    def _cells_in_rect(self, min_x, min_z, max_x, max_z):
+        cx0, cz0 = self.cell_of(min_x, min_z)
+        cx1, cz1 = self.cell_of(max_x, max_z)
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cz in range(cz0, cz1 + 1):
+                bucket = cells.get((cx, cz))
+                if bucket:
+                    yield bucket
+
+    def query_aabb(self, min_x, min_z, max_x, max_z, predicate=None):
+        """Entities whose center lies inside the XZ rectangle."""
+        found = []
+        for bucket in self._cells_in_rect(min_x, min_z, max_x, max_z):
+            for entity in bucket:
+                x, z = entity.position.x, entity.position.z
+                if min_x <= x <= max_x and min_z <= z <= max_z:
+                    if predicate is None or predicate(entity):
+                        found.append(entity)
+        return found
+
+    def query_radius(self, x, z, radius, predicate=None):
+        """Entities whose center is strictly within `radius` of (x, z) on the XZ plane."""
+        found = []
+        radius_sq = radius * radius
+        for bucket in self._cells_in_rect(x - radius, z - radius, x + radius, z + radius):
+            for entity in bucket:
+                dx = entity.position.x - x
+                dz = entity.position.z - z
+                if dx * dx + dz * dz < radius_sq:
+                    if predicate is None or predicate(entity):
+                        found.append(entity)
+        return found
+
+    def nearest(self, x, z, radius, predicate=None):
+        """Closest entity within radius matching predicate, or None."""
+        best, best_sq = None, radius * radius
+        for entity in self.query_radius(x, z, radius, predicate):
+            dx = entity.position.x - x
+            dz = entity.position.z - z
+            dist_sq = dx * dx + dz * dz
+            if dist_sq < best_sq:
+                best, best_sq = entity, dist_sq
+        return best
@@ -0,0 +1,464 @@
+import time
+import numpy as np
+import crop_field
+import culling
+import events
+import physics_world
+from profiler import profiler
+
+
+# --------------------
+# Entity-component storage
+# --------------------
+class ComponentStore:
+    """Dense storage for one component type.
+
+    Values are kept packed in a list (with a parallel list of entity ids) so
+    systems iterate them without gaps; removal swaps the last entry in.
+    """
+
+    def __init__(self, name, bit):
+        self.name = name
+        self.bit = bit
+        self.entities = []
+        self.values = []
+        self.dense_index = {}   # entity -> position in the dense lists
+        self.version = 0        # bumped when an entity is added or removed
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, entity):
+        return entity in self.dense_index
+
+    def add(self, entity, value):
+        index = self.dense_index.get(entity)
+        if index is not None:
+            self.values[index] = value
+            return
+        self.dense_index[entity] = len(self.values)
+        self.entities.append(entity)
+        self.values.append(value)
+        self.version += 1
+
+    def remove(self, entity):
+        index = self.dense_index.pop(entity, None)
+        if index is None:
+            return
+        last = len(self.values) - 1
+        if index != last:
+            moved = self.entities[last]
+            self.entities[index] = moved
+            self.values[index] = self.values[last]
+            self.dense_index[moved] = index
+        self.entities.pop()
+        self.values.pop()
+        self.version += 1
+
+    def get(self, entity, default=None):
+        index = self.dense_index.get(entity)
+        return default if index is None else self.values[index]
+
+
+class Registry:
+    """Entity ids, per-entity component bitmasks and the component stores."""
+
+    def __init__(self, capacity=256):
+        self.stores = {}
+        self.masks = np.zeros(capacity, dtype=np.uint64)
+        self.next_id = 0
+        self.free_ids = []
+        self.entity_of = {}     # game object -> entity id (see spawn)
+
+    def component(self, name):
+        """Store for a component type, registering it on first use."""
+        store = self.stores.get(name)
+        if store is None:
+            if len(self.stores) >= 64:
+                raise ValueError("Registry supports at most 64 component types")
+            store = ComponentStore(name, np.uint64(1 << len(self.stores)))
+            self.stores[name] = store
+        return store
+
+    def mask_of(self, *names):
+        mask = np.uint64(0)
+        for name in names:
+            mask |= self.component(name).bit
+        return mask
+
+    def create_entity(self):
+        if self.free_ids:
+            return self.free_ids.pop()
+        entity = self.next_id
+        self.next_id += 1
+        if entity >= len(self.masks):
+            self.masks = np.concatenate([self.masks, np.zeros(len(self.masks), dtype=np.uint64)])
+        return entity
+
+    def destroy_entity(self, entity):
+        for store in self.stores.values():
+            if self.masks[entity] & store.bit:
+                store.remove(entity)
+        self.masks[entity] = 0
+        self.free_ids.append(entity)
+
+    def add_component(self, entity, name, value):
+        store = self.component(name)
+        store.add(entity, value)
+        self.masks[entity] |= store.bit
+
+    def remove_component(self, entity, name):
+        store = self.component(name)
+        store.remove(entity)
+        self.masks[entity] &= ~store.bit
+
+    def get(self, entity, name, default=None):
+        return self.component(name).get(entity, default)
+
+    def query(self, *names):
+        """Yield (entity, value, ...) for entities having all named components.
+
+        Walks the smallest of the stores and tests each entity's bitmask
+        against the others, so the cost follows the rarest component.
+        """
+        stores = [self.component(name) for name in names]
+        if len(stores) == 1:
+            yield from zip(stores[0].entities, stores[0].values)
+            return
+        required = self.mask_of(*names)
+        masks = self.masks
+        smallest = min(stores, key=len)
+        for entity in list(smallest.entities):
+            if (masks[entity] & required) == required:
+                yield (entity,) + tuple(store.get(entity) for store in stores)
+
+    # Bridge from the existing entity classes
+    def spawn(self, obj, hud=False):
+        """Register a game object as an entity with components derived from it."""
+        entity = self.create_entity()
+        self.entity_of[obj] = entity
+        self.add_component(entity, 'object', obj)
+        if hud:
+            self.add_component(entity, 'hud', obj)
+            return entity
+        if hasattr(obj, 'crop_type'):
+            # Crops are drawn a whole field at a time (see RenderSystem)
+            self.add_component(entity, 'crop', obj)
+        elif hasattr(obj, 'draw'):
+            self.add_component(entity, 'drawable', obj)
+        if hasattr(obj, 'body_index'):
+            self.add_component(entity, 'body', obj.body_index)
+        if hasattr(obj, 'building_type'):
+            self.add_component(entity, 'building', obj)
+        return entity
+
+    def despawn(self, obj):
+        entity = self.entity_of.pop(obj, None)
+        if entity is not None:
+            self.destroy_entity(entity)
+
+
+class EntityList:
+    """The world entities, kept in sync with a Registry.
+
+    Wraps a list rather than subclassing it, so append/extend/remove and
+    remove_many are the only ways in or out and none can skip the registry.
+    Reading works as on a list: iteration, len(), `in` and indexing. Each
+    entity's slot in the list is tracked, so remove() swaps the last entity
+    into the hole instead of searching and shifting; order is not kept.
+    """
+
+    def __init__(self, registry, entities=()):
+        self.registry = registry
+        self.items = []
+        self.slot = {}      # entity -> index in items
+        self.extend(entities)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __contains__(self, obj):
+        return obj in self.slot
+
+    def append(self, obj):
+        self.slot[obj] = len(self.items)
+        self.items.append(obj)
+        self.registry.spawn(obj)
+
+    def extend(self, objs):
+        for obj in objs:
+            self.append(obj)
+
+    def remove(self, obj):
+        index = self.slot.pop(obj)      # KeyError, like list.remove's ValueError
+        last = self.items.pop()
+        if last is not obj:
+            self.items[index] = last
+            self.slot[last] = index
+        self.registry.despawn(obj)
+
+    def remove_many(self, objs):
+        """Remove several objects; ones not in the list are skipped."""
+        for obj in set(objs):
+            if obj in self.slot:
+                self.remove(obj)
+
+
+# --------------------
+# Systems
+# --------------------
+SIMULATION = 'simulation'
+RENDER = 'render'
+
+
+class System:
+    """A unit of per-tick work. `phase` decides which runner pass it belongs to."""
+    name = 'system'
+    phase = SIMULATION
+
+    def update(self, state, delta_time):
+        pass
+
+
+class ChunkSystem(System):
+    """Streams world chunks around the player when chunk streaming is enabled."""
+    name = 'chunks'
+
+    def update(self, state, delta_time):
+        chunks = state.get('chunks')
+        player = state['player']
+        if chunks is None or not player:
+            return
+        chunks.update(player.position)
+        state['chunk_metrics'] = chunks.metrics()
+
+
+class GrowthSystem(System):
+    """Advances every crop's growth timer in one vectorized step."""
+    name = 'growth'
+
+    def __init__(self, field=None):
+        self.field = field
+
+    def update(self, state, delta_time):
+        field = self.field if self.field is not None else crop_field.default_field
+        changed = field.step(delta_time)
+        profiler.count('crops_grown', len(changed))
+        if len(changed) and events.bus.wants(events.CropStageChanged):
+            events.bus.emit(events.CropStageChanged(changed, field.stages[changed], field.time))
+
+    def catch_up(self, seconds, emit_events=False):
+        """Resolve `seconds` of growth at once (time away, fast-forward).
+
+        With emit_events, every stage change is emitted as a CropStageChanged
+        event, one per distinct simulated time, in time order.
+        """
+        field = self.field if self.field is not None else crop_field.default_field
+        if not emit_events or not events.bus.wants(events.CropStageChanged):
+            return field.catch_up(seconds)
+        changed, (times, indices, stages) = field.catch_up(seconds, replay=True)
+        if len(times):
+            cuts = np.flatnonzero(np.diff(times)) + 1
+            starts = np.concatenate([[0], cuts])
+            for at, group, group_stages in zip(times[starts].tolist(), np.split(indices, cuts),
+                                               np.split(stages, cuts)):
+                events.bus.emit(events.CropStageChanged(group, group_stages, at))
+        return changed
+
+
+class PlayerSystem(System):
+    """Moves the player from the held movement keys."""
+    name = 'player'
+
+    def update(self, state, delta_time):
+        player = state['player']
+        if player:
+            player.update_movement(
+                delta_time,
+                state['camera_position'],
+                state['camera_target'],
+                state['camera_up']
+            )
+
+
+class PhysicsSystem(System):
+    """Integrates all dynamic bodies, then resolves collisions."""
+    name = 'physics'
+
+    def __init__(self, world=None):
+        self.world = world
+
+    def update(self, state, delta_time):
+        world = self.world if self.world is not None else physics_world.default_world
+        world.step(delta_time)
+        profiler.count('bodies_updated', len(world))
+        collision_system = state.get('collision_system')
+        if collision_system:
+            collision_system.step()
+
+
+class ShardedSimulationSystem(System):
+    """Growth and body integration stepped by a sharding.ShardedSimulation.
+
+    Takes the place of GrowthSystem and PhysicsSystem. Collisions still
+    resolve here in the main process, once every region has stepped.
+    """
+    name = 'simulation'
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def update(self, state, delta_time):
+        simulation = self.simulation
+        field = simulation.field
+        changed = simulation.step(delta_time)
+        profiler.count('crops_grown', len(changed))
+        profiler.count('bodies_updated', len(simulation.world))
+        if len(changed) and events.bus.wants(events.CropStageChanged):
+            events.bus.emit(events.CropStageChanged(changed, field.stages[changed], field.time))
+        collision_system = state.get('collision_system')
+        if collision_system:
+            collision_system.step()
+
+
+class InteractionSystem(System):
+    """Runs the player's queued action keys (harvest, plant, use building)."""
+    name = 'interaction'
+
+    def update(self, state, delta_time):
+        actions = state['pending_actions']
+        player = state['player']
+        if not actions or not player:
+            return
+        for key in actions:
+            player.action(key, state['world_entities'], state['spatial_index'])
+        actions.clear()
+
+
+class RenderSystem(System):
+    """Draws HUD and world entities straight from the registry's dense stores.
+
+    Crops go through state['crop_renderer'] (one instanced call per growth
+    stage) and are only drawn one by one when that renderer is unavailable.
+    With state['frustum'] set, entities outside the view are skipped, the
+    rest get a level of detail from state['lod_policy'], and the counts are
+    stored in state['render_stats']. The HUD is drawn last, in one 2D pass
+    through state['hud_layer'] when there is one.
+    """
+    name = 'render'
+    phase = RENDER
+
+    def __init__(self):
+        self.grid_key = None
+        self.grid_drawables = None      # (set of drawables, those not in the grid)
+
+    def update(self, state, delta_time):
+        registry = state['registry']
+        frustum = state.get('frustum')
+        lod = state.get('lod_policy')
+        stats = {'visible': 0, 'culled': 0, 'lod': [0] * (lod.level_count if lod else 1)}
+
+        grid = state.get('spatial_index')
+        if frustum is not None and grid is not None:
+            drawables, ungridded = self.drawables_for_grid(registry, grid)
+            self.draw_entities(drawables, state, stats, ungridded)
+        else:
+            self.draw_entities([obj for _, obj in registry.query('drawable')], state, stats)
+
+        crop_renderer = state.get('crop_renderer')
+        if crop_renderer is not None and crop_renderer.draw(frustum, lod):
+            stats['visible'] += crop_renderer.visible_count
+            stats['culled'] += crop_renderer.culled_count
+            for level, count in enumerate(crop_renderer.lod_counts):
+                stats['lod'][level] += count
+        else:
+            self.draw_entities([crop for _, crop in registry.query('crop')], state, stats)
+        state['render_stats'] = stats
+
+        hud_layer = state.get('hud_layer')
+        if hud_layer is not None:
+            hud_layer.draw()
+        else:
+            for _, hud in registry.query('hud'):
+                hud.draw()
+
+    def drawables_for_grid(self, registry, grid):
+        """The drawables as a set, and the ones the grid does not hold.
+
+        Both only change when entities come or go, so they are rebuilt when
+        the store's or the grid's version moves rather than every frame.
+        """
+        store = registry.component('drawable')
+        key = (store, store.version, grid, grid.version)
+        if key != self.grid_key:
+            drawables = set(store.values)
+            self.grid_drawables = (drawables, drawables.difference(grid.entity_cells))
+            self.grid_key = key
+        return self.grid_drawables
+
+    @staticmethod
+    def draw_entities(entities, state, stats, ungridded=None):
+        frustum = state.get('frustum')
+        if frustum is None:
+            for entity in entities:
+                entity.draw()
+            stats['visible'] += len(entities)
+            stats['lod'][0] += len(entities)
+            profiler.count('entities_drawn', len(entities))
+            return
+
+        visible, levels, culled = culling.cull_entities(
+            entities, frustum, state.get('lod_policy'), state.get('spatial_index'), ungridded)
+        for entity, level in zip(visible, levels.tolist()):
+            entity.lod_level = level
+            entity.draw()
+            stats['lod'][level] += 1
+        stats['visible'] += len(visible)
+        stats['culled'] += culled
+        profiler.count('entities_drawn', len(visible))
+
+
+class SystemRunner(list):
+    """Ordered list of systems, run phase by phase with per-system timing."""
+
+    def __init__(self, systems=()):
+        super().__init__(systems)
+        self.timings = {}   # name -> {'last_ms', 'total_ms', 'calls'}
+
+    def run(self, phase, state, delta_time):
+        clock = time.perf_counter
+        timings = self.timings
+        for system in self:
+            if system.phase != phase:
+                continue
+            start = clock()
+            system.update(state, delta_time)
+            elapsed_ms = (clock() - start) * 1000.0
+            timing = timings.get(system.name)
+            if timing is None:
+                timing = timings[system.name] = {'last_ms': 0.0, 'total_ms': 0.0, 'calls': 0}
+            timing['last_ms'] = elapsed_ms
+            timing['total_ms'] += elapsed_ms
+            timing['calls'] += 1
+            profiler.record(system.name, start, elapsed_ms / 1000.0)
+
+    def reset_timings(self):
+        self.timings = {}
+
+
+def create_default_systems():
+    """Systems in execution order: chunks, growth, player, physics, interaction, render."""
+    return SystemRunner([
+        ChunkSystem(),
+        GrowthSystem(),
+        PlayerSystem(),
+        PhysicsSystem(),
+        InteractionSystem(),
+        RenderSystem(),
+    ])
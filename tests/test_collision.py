@@ -0,0 +1,88 @@
+import random
+import numpy as np
+import physics_world
+from collision import CollisionSystem, sweep_and_prune
+from physics_object import PhysicsObject, Vector3
+
+
+class Box:
+    def __init__(self, x, y, z, width, height, depth, static=False):
+        self.position = Vector3(x, y, z)
+        self.width, self.height, self.depth = width, height, depth
+        self.static = static
+
+
+def brute_pairs(mins, maxs):
+    pairs = set()
+    for a in range(len(mins)):
+        for b in range(a + 1, len(mins)):
+            if np.all(mins[a] < maxs[b]) and np.all(maxs[a] > mins[b]):
+                pairs.add((a, b))
+    return pairs
+
+
+def unordered(i, j):
+    return {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())}
+
+
+def test_sweep_and_prune_finds_exactly_the_overlapping_pairs():
+    rng = np.random.default_rng(0)
+    for count in (0, 1, 2, 50, 400):
+        mins = rng.uniform(-20, 20, (count, 3))
+        maxs = mins + rng.uniform(0.2, 4.0, (count, 3))
+        i, j = sweep_and_prune(mins, maxs)
+        assert len(unordered(i, j)) == len(i)      # no pair reported twice
+        assert unordered(i, j) == brute_pairs(mins, maxs)
+
+
+def test_sweep_and_prune_with_equal_starts_and_touching_faces():
+    mins = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0], [0, 1, 0], [0.5, 0.5, 0.5]], dtype=np.float64)
+    maxs = mins + 1.0
+    i, j = sweep_and_prune(mins, maxs)
+    # boxes that only touch (2 and 3 against 0/1) do not overlap
+    assert unordered(i, j) == brute_pairs(mins, maxs) == {(0, 1), (0, 4), (1, 4), (2, 4), (3, 4)}
+
+
+def test_find_pairs_mixes_world_bodies_and_plain_boxes():
+    rng = random.Random(1)
+    world = physics_world.PhysicsWorld(capacity=8)
+    bodies = [PhysicsObject(Vector3(rng.uniform(-10, 10), rng.uniform(0, 3), rng.uniform(-10, 10)),
+                            Vector3(0.0, 0.0, 0.0), 1.5, 1.5, 1.5, world=world) for _ in range(150)]
+    boxes = [Box(rng.uniform(-10, 10), rng.uniform(0, 3), rng.uniform(-10, 10), 2.0, 1.0, 2.0,
+                 static=rng.random() < 0.5) for _ in range(150)]
+    system = CollisionSystem()
+    for body in bodies + boxes:
+        system.add(body)
+
+    def expected():
+        everything = system.bodies
+        mins = np.array([(b.position.x - b.width / 2, b.position.y - b.height / 2, b.position.z - b.depth / 2)
+                         for b in everything])
+        maxs = np.array([(b.position.x + b.width / 2, b.position.y + b.height / 2, b.position.z + b.depth / 2)
+                         for b in everything])
+        return {(a, b) for a, b in brute_pairs(mins, maxs)
+                if not (getattr(everything[a], 'static', False) and getattr(everything[b], 'static', False))}
+
+    def found():
+        index = {id(body): n for n, body in enumerate(system.bodies)}
+        return {tuple(sorted((index[id(a)], index[id(b)]))) for a, b in system.find_pairs()}
+
+    assert found() == expected()
+    # bodies move through the world arrays: the cached layout must see it
+    for body in bodies:
+        body.position.x += rng.uniform(-3, 3)
+    assert found() == expected()
+    system.remove_many(bodies[:50])
+    assert found() == expected()
+
+
+def test_step_separates_a_dynamic_box_from_a_static_one():
+    wall = Box(0.0, 0.0, 0.0, 2.0, 2.0, 2.0, static=True)
+    crate = Box(1.5, 0.0, 0.2, 2.0, 2.0, 2.0)
+    system = CollisionSystem()
+    system.add(wall)
+    system.add(crate)
+    assert len(system.step()) == 1
+    assert wall.position.x == 0.0
+    assert crate.position.x >= 2.0            # pushed out along X, the shallowest axis
+    assert system.step() == []
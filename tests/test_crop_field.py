@@ -0,0 +1,132 @@
+import numpy as np
+from crop_field import CropField, MAX_STAGE, STAGE_COLORS, STAGE_HEIGHTS
+from physics_object import Vector3
+
+
+def planted(seed, count=400, low=1.0, high=6.0):
+    rng = np.random.default_rng(seed)
+    field = CropField(capacity=16)
+    field.add_many(rng.uniform(-50, 50, (count, 3)), rng.uniform(low, high, count))
+    return field
+
+
+def assert_same_growth(a, b):
+    n = a.count
+    assert b.count == n
+    assert np.array_equal(a.alive[:n], b.alive[:n])
+    alive = a.alive[:n]
+    assert np.array_equal(a.stages[:n][alive], b.stages[:n][alive])
+    assert np.array_equal(a.last_stage_update[:n][alive], b.last_stage_update[:n][alive])
+
+
+# --------------------
+# Bulk growth
+# --------------------
+def test_one_stage_per_threshold():
+    field = CropField(capacity=2)       # grows its arrays as crops are added
+    field.add_many(np.zeros((3, 3)), [1.0, 2.0, 4.0])
+    history = []
+    for _ in range(8):
+        field.step(1.0)
+        history.append(field.stages[:3].tolist())
+    assert history[0] == [1, 0, 0]
+    assert history[3] == [2, 2, 1]
+    assert history[7] == [2, 2, 2]
+    assert np.array_equal(field.colors[:3], STAGE_COLORS[field.stages[:3]])
+    assert np.array_equal(field.heights[:3], STAGE_HEIGHTS[field.stages[:3]])
+    assert field.pending_events() == 0       # mature crops leave the schedule
+
+
+def test_removed_crops_never_grow():
+    field = planted(2, count=50)
+    field.step(0.5)
+    for index in range(0, 50, 2):
+        field.remove(index)
+    for _ in range(100):
+        field.step(0.5)
+    assert np.all(field.stages[0:50:2] == 0)
+    assert np.all(field.stages[1:50:2] == MAX_STAGE)
+
+
+
+
+# --------------------
+# Timing wheel against polling every crop
+# --------------------
+def test_step_matches_polling_with_removals_and_replanting():
+    rng = np.random.default_rng(1)
+    wheel, polled = planted(1), planted(1)
+    for tick in range(1200):
+        if tick % 50 == 25:
+            # Harvest some crops and replant into the freed slots
+            live = np.flatnonzero(wheel.alive[:wheel.count])
+            for index in rng.choice(live, 20, replace=False).tolist():
+                wheel.remove(index)
+                polled.remove(index)
+            for _ in range(10):
+                position, threshold = Vector3(*rng.uniform(-50, 50, 3)), float(rng.uniform(1, 6))
+                assert wheel.add(position, threshold) == polled.add(position, threshold)
+        before = polled.stages[:polled.count].copy()
+        changed = wheel.step(1 / 60)
+        polled.step_polling(1 / 60)
+        grown = np.flatnonzero(polled.stages[:polled.count] != before)
+        assert sorted(changed.tolist()) == grown.tolist()
+        assert_same_growth(wheel, polled)
+    assert wheel.stages[:wheel.count][wheel.alive[:wheel.count]].max() == MAX_STAGE
+
+
+def test_wheel_ignores_stale_entries_of_reused_slots():
+    field = CropField(capacity=4)
+    first = field.add(Vector3(0, 0, 0), threshold=2)
+    field.step(1.0)
+    assert field.pending_events() == 1
+    field.remove(first)
+    assert field.pending_events() == 0
+    replanted = field.add(Vector3(1, 0, 0), threshold=10)
+    assert replanted == first                   # the freed slot, still filed for t=2
+    for _ in range(8):                          # up to t=9: the old entry must not fire
+        assert len(field.step(1.0)) == 0
+    assert field.stages[replanted] == 0
+    assert field.step(1.0).tolist() == []       # t=10: planted at t=1, due at t=11
+    assert field.step(1.0).tolist() == [replanted]
+
+
+# --------------------
+# Closed-form catch-up against stepping
+# --------------------
+def staggered(seed):
+    """Crops planted at different times (multiples of the step), some already grown."""
+    field = planted(seed, count=300, low=1.0, high=40.0)
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        field.step(0.25)
+    field.add_many(rng.uniform(-50, 50, (100, 3)), rng.uniform(1.0, 40.0, 100))
+    return field
+
+
+def test_catch_up_matches_fine_stepping():
+    for seconds in (0.75, 13.0, 250.0):
+        stepped, caught_up = staggered(3), staggered(3)
+        for _ in range(int(seconds / 0.25)):
+            stepped.step(0.25)
+        caught_up.catch_up(seconds)
+        assert caught_up.time == stepped.time
+        assert_same_growth(stepped, caught_up)
+        # and both keep growing the same way afterwards
+        for _ in range(40):
+            stepped.step(0.25)
+            caught_up.step(0.25)
+        assert_same_growth(stepped, caught_up)
+
+
+def test_catch_up_replay_lists_every_change_in_order():
+    stepped, caught_up = staggered(4), staggered(4)
+    expected = []
+    for _ in range(400):
+        changed = stepped.step(0.25)
+        expected.extend((stepped.time, index, int(stepped.stages[index])) for index in sorted(changed.tolist()))
+
+    changed, (times, indices, stages) = caught_up.catch_up(100.0, replay=True)
+    assert list(zip(times.tolist(), indices.tolist(), stages.tolist())) == expected
+    assert set(changed.tolist()) == {index for _, index, _ in expected}
+    assert_same_growth(stepped, caught_up)
@@ -0,0 +1,117 @@
+import random
+import numpy as np
+from culling import Frustum, LodPolicy, cull_entities, visible_cells
+from physics_object import Vector3
+from spatial import SpatialHash
+
+
+class Box:
+    """Just the attributes culling and the spatial hash read."""
+
+    def __init__(self, x, y, z, size=1.0):
+        self.position = Vector3(x, y, z)
+        self.width = self.height = self.depth = size
+        self.spatial_index = None
+
+
+def looking_down_negative_z():
+    return Frustum.from_camera(eye=(0.0, 0.0, 0.0), target=(0.0, 0.0, -1.0), up=(0.0, 1.0, 0.0),
+                               fov_y=90.0, aspect=1.0, near=0.5, far=100.0)
+
+
+def test_spheres_inside_outside_and_straddling():
+    frustum = looking_down_negative_z()
+    centers = [
+        (0.0, 0.0, -10.0),      # straight ahead
+        (0.0, 0.0, 10.0),       # behind
+        (0.0, 0.0, -200.0),     # past the far plane
+        (30.0, 0.0, -10.0),     # off to the right
+        (11.0, 0.0, -10.0),     # just outside the right plane, but its sphere reaches in
+        (0.0, 0.0, -0.1),       # before the near plane, sphere reaches past it
+    ]
+    radii = [1.0, 1.0, 1.0, 1.0, 2.0, 1.0]
+    assert frustum.test_spheres(centers, radii).tolist() == [True, False, False, False, True, True]
+
+
+def test_aabbs_match_the_corners():
+    frustum = looking_down_negative_z()
+    mins = [(-1.0, -1.0, -11.0), (-1.0, -1.0, 5.0), (40.0, -1.0, -11.0), (-50.0, -1.0, -11.0)]
+    maxs = [(1.0, 1.0, -9.0), (1.0, 1.0, 7.0), (42.0, 1.0, -9.0), (50.0, 1.0, -9.0)]
+    assert frustum.test_aabbs(mins, maxs).tolist() == [True, False, False, True]
+
+
+def test_aabbs_never_reject_a_box_with_a_corner_inside():
+    frustum = looking_down_negative_z()
+    rng = np.random.default_rng(0)
+    mins = rng.uniform(-60, 60, (500, 3))
+    maxs = mins + rng.uniform(0.1, 10, (500, 3))
+    corners = np.stack([np.where([(i >> k) & 1 for k in range(3)], maxs, mins) for i in range(8)], axis=1)
+    any_inside = np.all(frustum.distances(corners.reshape(-1, 3)) >= 0, axis=1).reshape(500, 8).any(axis=1)
+    assert np.all(frustum.test_aabbs(mins, maxs)[any_inside])
+
+
+def test_visible_cells_keeps_cells_in_view_only():
+    grid = SpatialHash(cell_size=4.0)
+    ahead, behind, aside = Box(0.0, 0.0, -20.0), Box(0.0, 0.0, 20.0), Box(80.0, 0.0, -20.0)
+    for box in (ahead, behind, aside):
+        grid.insert(box)
+    cells = visible_cells(grid, looking_down_negative_z())
+    assert grid.entity_cells[ahead] in cells
+    assert grid.entity_cells[behind] not in cells
+    assert grid.entity_cells[aside] not in cells
+
+
+def test_grid_culling_matches_the_plain_sphere_test():
+    rng = random.Random(1)
+    grid = SpatialHash(cell_size=4.0)
+    boxes = [Box(rng.uniform(-80, 80), rng.uniform(-2, 2), rng.uniform(-80, 80)) for _ in range(2000)]
+    boxes.append(Box(0.0, -1.0, 40.0, size=100.0))     # the floor: larger than a cell, centred behind
+    for box in boxes:
+        grid.insert(box)
+    loose = Box(0.0, 0.0, -30.0)                        # drawn but not in the grid
+    frustum = looking_down_negative_z()
+
+    visible, levels, culled = cull_entities(boxes + [loose], frustum, LodPolicy(), grid)
+    expected, _, expected_culled = cull_entities(boxes + [loose], frustum, LodPolicy())
+    assert set(visible) == set(expected)
+    assert culled == expected_culled
+    assert boxes[-1] in visible and loose in visible
+    assert len(levels) == len(visible)
+
+
+class Drawable(Box):
+    def draw(self):
+        self.drawn = True
+
+
+def test_render_system_reuses_grid_sets_until_entities_change():
+    from systems import Registry, RenderSystem
+    rng = random.Random(2)
+    registry, grid = Registry(), SpatialHash(cell_size=4.0)
+    boxes = [Drawable(rng.uniform(-40, 40), 0.0, rng.uniform(-40, 40)) for _ in range(300)]
+    for box in boxes:
+        registry.spawn(box)
+        grid.insert(box)
+    loose = Drawable(0.0, 0.0, -10.0)
+    registry.spawn(loose)
+    state = {'registry': registry, 'frustum': looking_down_negative_z(), 'spatial_index': grid}
+    render = RenderSystem()
+
+    render.update(state, 0.0)
+    cached = render.grid_drawables
+    assert cached[1] == {loose}
+    expected, _, culled = cull_entities(boxes + [loose], state['frustum'])
+    assert state['render_stats']['visible'] == len(expected)
+    assert state['render_stats']['culled'] == culled
+
+    boxes[0].position.x += 50.0     # moves do not invalidate
+    grid.move(boxes[0])
+    render.update(state, 0.0)
+    assert render.grid_drawables is cached
+
+    grid.insert(loose)
+    render.update(state, 0.0)
+    assert render.grid_drawables is not cached and render.grid_drawables[1] == set()
+    registry.despawn(boxes[1])
+    render.update(state, 0.0)
+    assert boxes[1] not in render.grid_drawables[0]
@@ -0,0 +1,51 @@
+import numpy as np
+import crop_field
+import events
+from systems import GrowthSystem
+
+
+def test_subscribers_get_events_below_the_log_level(monkeypatch):
+    bus = events.EventBus()                 # default level: INFO
+    sink = bus.add_sink(events.MemorySink(level=events.DEBUG))
+    monkeypatch.setattr(events, 'bus', bus)
+    received = []
+    bus.subscribe(events.CropStageChanged, received.append)
+
+    field = crop_field.CropField(capacity=8)
+    field.add_many(np.zeros((8, 3)), thresholds=1.0)
+    growth = GrowthSystem(field)
+    for _ in range(3):
+        growth.update({}, 0.5)
+
+    assert len(received) == 1
+    assert sorted(received[0].indices.tolist()) == list(range(8))
+    assert received[0].stages.tolist() == [1] * 8
+    # Below the bus level: delivered, but not logged
+    bus.flush()
+    assert sink.events == []
+    assert len(bus.recent) == 0
+
+
+def test_wants_follows_level_and_subscriptions():
+    bus = events.EventBus()
+    assert bus.wants(events.Harvested)
+    assert not bus.wants(events.CropStageChanged)
+    callback = lambda event: None
+    bus.subscribe(events.Event, callback)   # a base type counts for its subclasses
+    assert bus.wants(events.CropStageChanged)
+    bus.unsubscribe(events.Event, callback)
+    assert not bus.wants(events.CropStageChanged)
+    bus.set_level(events.DEBUG)
+    assert bus.wants(events.CropStageChanged)
+
+
+def test_logged_events_reach_sinks_in_batches():
+    bus = events.EventBus(batch_size=4)
+    sink = bus.add_sink(events.MemorySink())
+    for total in range(6):
+        bus.emit(events.Harvested((0.0, 0.0), total))
+    bus.emit(events.CropReset(0))           # DEBUG: dropped
+    assert sink.flushes == 1 and len(sink.events) == 4
+    bus.flush()
+    assert [event.total for event in sink.events] == list(range(6))
+    assert bus.emitted == 6 and bus.dropped == 1
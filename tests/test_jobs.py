@@ -0,0 +1,96 @@
+import threading
+import pytest
+from jobs import HIGH, LOW, NORMAL, JobSystem
+
+
+def blocked_system():
+    """A one-worker system whose worker is busy until the returned event is set."""
+    system = JobSystem(workers=1, name='test')
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+    system.submit(block)
+    assert started.wait(5)
+    return system, release
+
+
+def test_queued_jobs_run_by_priority_then_submission_order():
+    system, release = blocked_system()
+    order = []
+    jobs = [system.submit(order.append, name, priority=priority)
+            for name, priority in (('low', LOW), ('normal-1', NORMAL), ('high', HIGH), ('normal-2', NORMAL))]
+    release.set()
+    system.wait(jobs, timeout=5)
+    assert order == ['high', 'normal-1', 'normal-2', 'low']
+    system.shutdown()
+
+
+def test_callbacks_run_only_in_run_completed_on_the_owner_thread():
+    system = JobSystem(workers=2, name='test')
+    seen = []
+    job = system.submit(lambda: 42, on_complete=lambda job: seen.append((job.result(), threading.current_thread())))
+    assert job.result(timeout=5) == 42
+    assert seen == []                       # finished, but the callback waits for the owner
+    assert system.run_completed() == 1
+    assert seen == [(42, threading.current_thread())]
+
+    errors = []
+    other = threading.Thread(target=lambda: errors.append(pytest.raises(RuntimeError, system.run_completed)))
+    other.start()
+    other.join()
+    assert len(errors) == 1
+    system.shutdown()
+
+
+def test_cancelled_jobs_never_run_or_call_back():
+    system, release = blocked_system()
+    ran, called = [], []
+    job = system.submit(ran.append, 'x', on_complete=called.append)
+    assert job.cancel() and job.cancelled()
+    assert not job.cancel()                 # already cancelled
+    with pytest.raises(RuntimeError):
+        job.result(timeout=1)
+    release.set()
+    done = system.submit(ran.append, 'y')
+    system.wait([done], timeout=5)
+    assert ran == ['y'] and called == []
+    assert not done.cancel()                # already finished
+    assert system.stats()['cancelled'] == 1
+    system.shutdown()
+
+
+def test_cancelling_a_running_job_drops_its_callback():
+    system = JobSystem(workers=1, name='test')
+    started, release = threading.Event(), threading.Event()
+    called = []
+
+    def work():
+        started.set()
+        release.wait(5)
+        return 'late'
+    job = system.submit(work, on_complete=called.append)
+    assert started.wait(5)
+    assert job.cancel()
+    release.set()
+    system.shutdown(cancel_pending=False)
+    assert system.run_completed() == 0 and called == []
+
+
+def test_shutdown_cancels_what_is_still_queued():
+    system, release = blocked_system()
+    queued = [system.submit(lambda: None) for _ in range(3)]
+    threading.Timer(0.05, release.set).start()  # lets shutdown() cancel first, then join
+    system.shutdown()
+    assert all(job.cancelled() for job in queued)
+    assert system.stats()['cancelled'] == 3
+    with pytest.raises(RuntimeError):
+        system.submit(lambda: None)
+
+
+def test_zero_workers_runs_inline():
+    system = JobSystem(workers=0)
+    called = []
+    job = system.submit(lambda a, b: a + b, 2, 3, on_complete=lambda job: called.append(job.value))
+    assert job.done() and called == [5] and system.threads == []
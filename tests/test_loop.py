@@ -0,0 +1,92 @@
+import pytest
+from loop import FixedTimestepLoop
+
+
+class FakeClock:
+    """Manual clock; sleep() advances it and remembers how long it slept."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_loop(clock, **options):
+    steps = []
+    loop = FixedTimestepLoop(steps.append, tick_rate=10, clock=clock, sleep=clock.sleep, **options)
+    return loop, steps
+
+
+def test_first_frame_runs_no_steps():
+    clock = FakeClock()
+    loop, steps = make_loop(clock)
+    assert loop.frame() == 0 and steps == []
+
+
+def test_steps_follow_elapsed_time_and_keep_the_remainder():
+    clock = FakeClock()
+    loop, steps = make_loop(clock)
+    loop.frame()
+    clock.now += 0.25                   # 2.5 steps at 10 Hz
+    assert loop.frame() == 2
+    assert steps == [0.1, 0.1]
+    assert loop.tick == 2 and loop.sim_time == pytest.approx(0.2)
+    assert loop.alpha == pytest.approx(0.5)
+    clock.now += 0.06                   # 0.05 + 0.06 carries into a third step
+    assert loop.frame() == 1
+    assert loop.alpha == pytest.approx(0.1)
+
+
+def test_catch_up_cap_drops_the_backlog():
+    clock = FakeClock()
+    loop, steps = make_loop(clock, max_steps_per_frame=3)
+    loop.frame()
+    clock.now += 1.05                   # 10.5 steps due
+    assert loop.frame() == 3
+    assert loop.dropped_time == pytest.approx(0.7)
+    assert loop.alpha == pytest.approx(0.5)     # the partial step is kept
+    clock.now += 0.06
+    assert loop.frame() == 1
+    assert loop.dropped_time == pytest.approx(0.7)
+
+
+def test_negative_elapsed_time_is_ignored():
+    clock = FakeClock()
+    loop, steps = make_loop(clock)
+    loop.advance(-5.0)
+    assert loop.accumulator == 0.0 and steps == []
+
+
+def test_frame_limiter_sleeps_off_the_rest_of_the_frame():
+    clock = FakeClock()
+    loop, _ = make_loop(clock, max_fps=20)     # 50 ms frames
+    loop.frame()
+    clock.now += 0.02
+    loop.wait_for_next_frame()
+    assert clock.slept == [pytest.approx(0.03)]
+    loop.frame()
+    clock.now += 0.08                           # slow frame: no sleep
+    loop.wait_for_next_frame()
+    assert len(clock.slept) == 1
+
+
+def test_uncapped_loop_never_sleeps():
+    clock = FakeClock()
+    loop, _ = make_loop(clock)
+    loop.wait_for_next_frame()                  # before the first frame
+    loop.frame()
+    loop.wait_for_next_frame()
+    assert clock.slept == []
+
+
+def test_run_ignores_real_time():
+    clock = FakeClock()
+    loop, steps = make_loop(clock)
+    loop.run(25)
+    assert len(steps) == 25 and loop.tick == 25 and loop.frame_start is None
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from mesh import (
+    MeshData, VERTEX_COMPONENTS, VERTEX_STRIDE, build_box, build_ground_quad, build_roof, build_sphere
+)
+
+BUILDERS = {
+    'box': (lambda: build_box(2.0, 3.0, 4.0), 24, 36),
+    'roof': (lambda: build_roof(5.0, 2.0, 5.0, base_y=2.5), 18, 24),
+    'ground': (lambda: build_ground_quad(100.0, 100.0), 4, 6),
+    'sphere': (lambda: build_sphere(0.3, 5, 5), 6 * 6, 5 * 5 * 6),
+}
+
+
+@pytest.fixture(params=sorted(BUILDERS))
+def built(request):
+    build, vertices, elements = BUILDERS[request.param]
+    return build(), vertices, elements
+
+
+def test_counts(built):
+    data, vertices, elements = built
+    assert data.vertex_count == vertices
+    assert data.element_count == elements
+    assert len(data.indices) % 3 == 0
+
+
+def test_interleaved_layout(built):
+    data, _, _ = built
+    assert data.vertices.dtype == np.float32 and data.vertices.flags['C_CONTIGUOUS']
+    assert data.vertices.shape[1] == VERTEX_COMPONENTS
+    assert data.vertices.strides[0] == VERTEX_STRIDE
+    # positions, normals and texcoords are views into the one buffer
+    assert np.shares_memory(data.positions, data.vertices)
+    assert np.shares_memory(data.texcoords, data.vertices)
+
+
+def test_unit_normals(built):
+    data, _, _ = built
+    assert np.allclose(np.linalg.norm(data.normals, axis=1), 1.0, atol=1e-6)
+
+
+def test_texcoords_in_unit_square(built):
+    data, _, _ = built
+    assert data.texcoords.min() >= 0.0 and data.texcoords.max() <= 1.0
+
+
+def test_indices_in_range(built):
+    data, _, _ = built
+    assert data.indices.dtype == np.uint32
+    assert data.indices.max() < data.vertex_count
+    # every vertex is used by some triangle
+    assert len(np.unique(data.indices)) == data.vertex_count
+
+
+def test_box_extent_and_outward_normals():
+    data = build_box(2.0, 3.0, 4.0)
+    assert np.allclose(data.positions.min(axis=0), [-1.0, -1.5, -2.0])
+    assert np.allclose(data.positions.max(axis=0), [1.0, 1.5, 2.0])
+    # each face's normal points away from the center
+    assert np.all(np.sum(data.positions * data.normals, axis=1) > 0)
+
+
+def test_roof_sits_on_its_base():
+    data = build_roof(5.0, 2.0, 5.0, base_y=2.5)
+    assert np.isclose(data.positions[:, 1].min(), 2.5)
+    assert np.isclose(data.positions[:, 1].max(), 4.5)
+
+
+def test_ground_quad_repeats_texture():
+    data = build_ground_quad(100.0, 100.0, texture_repeat=30)
+    assert np.all(data.positions[:, 1] == 0) and np.all(data.normals == [0, 1, 0])
+    assert data.texcoords.max() == 30
+
+
+def test_sphere_radius():
+    data = build_sphere(0.3, 8, 6)
+    assert np.allclose(np.linalg.norm(data.positions, axis=1), 0.3, atol=1e-6)
+
+
+def test_mesh_data_without_indices():
+    data = MeshData(np.zeros((6, VERTEX_COMPONENTS)), primitive='lines')
+    assert data.indices is None and data.element_count == 6
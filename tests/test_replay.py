@@ -0,0 +1,76 @@
+import pytest
+import headless
+import replay
+
+
+def record(path, ticks=200, crops=300):
+    return headless.run_recording(str(path), crops, ticks)
+
+
+def rewrite_records(path, change):
+    """Apply change(tick, kind, a, b) -> (a, b) to every input record of a log in place."""
+    raw = bytearray(path.read_bytes())
+    _, _, _, length = replay.HEADER.unpack_from(raw)
+    offset = replay.HEADER.size + length
+    while offset + replay.RECORD.size <= len(raw):
+        tick, kind, a, b = replay.RECORD.unpack_from(raw, offset)
+        if kind in (replay.CHECKPOINT, replay.END):
+            offset += replay.RECORD.size + replay.DIGEST_SIZE
+            continue
+        replay.RECORD.pack_into(raw, offset, tick, kind, *change(tick, kind, a, b))
+        offset += replay.RECORD.size
+    path.write_bytes(bytes(raw))
+
+
+def test_replay_reproduces_every_recorded_digest(tmp_path):
+    path = tmp_path / 'run.log'
+    recorded = record(path)
+    assert recorded['events'] > 0 and recorded['checkpoints'] > 0
+
+    first = headless.run_replay(str(path))
+    second = headless.run_replay(str(path))
+    assert first['matches_recording'] and second['matches_recording']
+    assert first['ticks'] == 200 and first['events'] == recorded['events']
+    assert first['digests_checked'] == recorded['checkpoints'] + 1    # plus the end digest
+
+
+def test_replay_notices_changed_input(tmp_path):
+    path = tmp_path / 'run.log'
+    record(path)
+    walk = ord('w')
+    rewrite_records(path, lambda tick, kind, a, b: (ord('x') if kind == replay.KEY_DOWN and a == walk else a, b))
+    result = headless.run_replay(str(path))
+    assert not result['matches_recording']
+    assert result['first_mismatch'] is not None
+
+
+def test_replay_notices_a_changed_final_state(tmp_path):
+    path = tmp_path / 'run.log'
+    record(path)
+    raw = bytearray(path.read_bytes())
+    raw[-1] ^= 0xFF                 # last byte of the END digest
+    path.write_bytes(bytes(raw))
+    result = headless.run_replay(str(path))
+    assert not result['matches_recording'] and result['first_mismatch'] == 200
+
+
+def test_cut_short_log_replays_what_is_there(tmp_path):
+    path = tmp_path / 'run.log'
+    record(path)
+    raw = path.read_bytes()
+    path.write_bytes(raw[:-(replay.RECORD.size + replay.DIGEST_SIZE)])   # drop the END record
+    log = replay.InputLog(str(path))
+    assert log.final_digest is None and 0 < log.end_tick < 200
+
+
+def test_input_log_rejects_other_files(tmp_path):
+    path = tmp_path / 'not.log'
+    path.write_bytes(b'short')
+    with pytest.raises(replay.InputLogError):
+        replay.InputLog(str(path))
+    path.write_bytes(replay.HEADER.pack(b'SOMETHNG', 1, 60, 0))
+    with pytest.raises(replay.InputLogError):
+        replay.InputLog(str(path))
+    path.write_bytes(replay.HEADER.pack(replay.MAGIC, replay.FORMAT_VERSION + 1, 60, 0))
+    with pytest.raises(replay.InputLogError, match='newer'):
+        replay.InputLog(str(path))
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+import crop_field
+import savefile
+from chunks import ChunkData
+
+
+def small_world():
+    """A few hundred crops at mixed growth stages over several chunks, plus two buildings."""
+    rng = np.random.default_rng(0)
+    field = crop_field.CropField(capacity=300)
+    positions = np.column_stack([rng.uniform(-100, 100, 300), np.full(300, -1.0), rng.uniform(-100, 100, 300)])
+    field.add_many(positions, rng.integers(1, 10, 300))
+    field.step(7.5)
+    field.remove(3)
+    buildings = ChunkData(building_positions=[(4.0, 0.0, 0.0), (-60.0, 0.0, 45.0)],
+                          building_sizes=[(5.0, 5.0, 5.0), (6.0, 4.8, 6.0)],
+                          building_wall_textures=['assets/wall.jpg', ''],
+                          building_roof_textures=['assets/roof.png', ''])
+    return ChunkData.concatenate([savefile.snapshot_field(field), buildings])
+
+
+def sorted_rows(data):
+    """Columns with crop and building rows in one canonical order."""
+    crops = np.lexsort((data.crop_positions[:, 2], data.crop_positions[:, 0]))
+    buildings = np.lexsort((data.building_positions[:, 2], data.building_positions[:, 0]))
+    return data.take(crops, buildings)
+
+
+def assert_same(a, b):
+    a, b = sorted_rows(a), sorted_rows(b)
+    for name in ChunkData().column_names():
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'farm.sav')
+    data = small_world()
+    metadata = {'elapsed_sec': 12.5, 'player': {'position': [1.0, 0.2, 2.0], 'crop_count': 7}}
+    savefile.write_save(path, data, metadata, chunk_size=32.0)
+
+    with savefile.SaveFile(path) as save:
+        assert save.crop_count == 299
+        assert save.building_count == 2
+        assert save.chunk_size == 32.0
+        assert save.metadata['player'] == metadata['player']
+        assert_same(save.world(), data)
+
+
+def test_single_chunk_read(tmp_path):
+    path = str(tmp_path / 'farm.sav')
+    data = small_world()
+    savefile.write_save(path, data, chunk_size=32.0)
+
+    with savefile.SaveFile(path) as save:
+        assert isinstance(save.array('crop_positions').base, np.memmap)
+        keys = save.chunk_keys()
+        assert len(keys) > 1
+        key = (0, 0)        # holds the building at (4, 0, 0)
+        assert key in keys
+        chunk = save.chunk(key)
+        assert save.chunk((1000, 1000)) is None
+
+    in_chunk = lambda positions: np.all(np.floor(positions[:, [0, 2]] / 32.0) == key, axis=1)
+    expected = data.take(np.flatnonzero(in_chunk(data.crop_positions)),
+                         np.flatnonzero(in_chunk(data.building_positions)))
+    assert chunk.crop_count == expected.crop_count > 0
+    assert chunk.building_count == 1
+    assert_same(chunk, expected)
+
+
+def test_rejects_newer_version(tmp_path):
+    path = str(tmp_path / 'farm.sav')
+    savefile.write_save(path, small_world())
+    with open(path, 'r+b') as f:
+        magic, version, flags, offset, length = savefile.HEADER.unpack(f.read(savefile.HEADER.size))
+        f.seek(0)
+        f.write(savefile.HEADER.pack(magic, savefile.FORMAT_VERSION + 1, flags, offset, length))
+    with pytest.raises(savefile.SaveFormatError, match='newer'):
+        savefile.SaveFile(path)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'not a save file, but long enough for a header')
+    with pytest.raises(savefile.SaveFormatError):
+        savefile.SaveFile(str(path))
+    path.write_bytes(b'FARM')
+    with pytest.raises(savefile.SaveFormatError):
+        savefile.SaveFile(str(path))
@@ -0,0 +1,84 @@
+import numpy as np
+import physics_world
+from crop_field import CropField
+from physics_object import PhysicsObject, Vector3
+from sharding import MIN_WORK_PER_REGION, ShardedSimulation, serial_fallback
+
+DT = 1.0 / 60.0
+
+
+def build(seed):
+    """Crops on both sides of x = 0 and bodies flying across it both ways."""
+    rng = np.random.default_rng(seed)
+    field = CropField(capacity=16)
+    positions = rng.uniform(-20, 20, (300, 3))
+    positions[:, 1] = 0.0
+    field.add_many(positions, rng.uniform(0.05, 0.5, 300))
+    world = physics_world.PhysicsWorld(capacity=8)
+    for _ in range(40):
+        x = rng.uniform(-3, 3)
+        PhysicsObject(Vector3(x, rng.uniform(0.5, 5.0), rng.uniform(-5, 5)),
+                      Vector3(-np.sign(x) * rng.uniform(5, 20), rng.uniform(0, 4), 0.0),
+                      1.0, 1.0, 1.0, world=world)
+    return field, world
+
+
+def edit(field, world, tick):
+    """Harvest and replant across the border; drop and add bodies mid-flight."""
+    if tick == 10:
+        right = np.flatnonzero(field.alive[:field.count] & (field.positions[:field.count, 0] > 0))
+        for index in right[:20].tolist():
+            field.remove(index)
+        for n in range(20):     # reuses the freed slots, now on the left
+            field.add(Vector3(-10.0 - n * 0.1, 0.0, 1.0), threshold=0.2)
+    if tick == 25:
+        for index in range(0, 40, 5):
+            world.remove(index)
+        for n in range(8):
+            world.add(None, Vector3(2.0 - n * 0.5, 3.0, 0.0), Vector3(8.0 * (-1) ** n, 1.0, 0.0),
+                      1.0, 1.0, 1.0)
+
+
+def run_serial(ticks):
+    field, world = build(0)
+    stages = []
+    for tick in range(ticks):
+        edit(field, world, tick)
+        field.step(DT)
+        world.step(DT)
+        stages.append(field.stages[:field.count].copy())
+    return field, world, stages
+
+
+def test_border_handoff_matches_serial_stepping():
+    ticks = 60
+    reference, reference_world, reference_stages = run_serial(ticks)
+    field, world = build(0)
+    simulation = ShardedSimulation(field, world, workers=2, bounds=[0.0])
+    try:
+        for tick in range(ticks):
+            edit(field, world, tick)
+            simulation.step(DT)
+            assert np.array_equal(field.stages[:field.count], reference_stages[tick])
+        n = world.count
+        assert np.array_equal(world.alive[:n], reference_world.alive[:n])
+        alive = world.alive[:n]
+        assert np.array_equal(world.positions[:n][alive], reference_world.positions[:n][alive])
+        assert np.array_equal(world.velocities[:n][alive], reference_world.velocities[:n][alive])
+        assert simulation.handoffs > 0
+    finally:
+        simulation.close()
+    assert np.array_equal(field.stages[:field.count], reference.stages[:reference.count])
+    field.step(DT)      # the field's own schedule is back after close()
+    reference.step(DT)
+    assert np.array_equal(field.stages[:field.count], reference.stages[:reference.count])
+
+
+def test_serial_fallback_reasons():
+    field, world = build(1)
+    assert serial_fallback(0, field, world, cpus=1) is None
+    assert 'CPU' in serial_fallback(4, field, world, cpus=2)
+    assert 'per region' in serial_fallback(2, field, world, cpus=8)
+    big = CropField(capacity=16)
+    big.add_many(np.zeros((2 * MIN_WORK_PER_REGION, 3)))
+    assert serial_fallback(2, big, world, cpus=8) is None
@@ -0,0 +1,101 @@
+import math
+import random
+from physics_object import Vector3
+from spatial import SpatialHash
+
+
+class Thing:
+    def __init__(self, x, z, size=1.0):
+        self.position = Vector3(x, 0.0, z)
+        self.width = self.height = self.depth = size
+        self.spatial_index = None
+
+
+def scattered(seed, count=500, extent=30.0):
+    rng = random.Random(seed)
+    return [Thing(rng.uniform(-extent, extent), rng.uniform(-extent, extent)) for _ in range(count)]
+
+
+def brute_radius(things, x, z, radius):
+    return {t for t in things if (t.position.x - x) ** 2 + (t.position.z - z) ** 2 < radius * radius}
+
+
+def test_radius_queries_match_brute_force_across_cell_borders():
+    things = scattered(1)
+    grid = SpatialHash(cell_size=4.0)
+    for thing in things:
+        grid.insert(thing)
+    rng = random.Random(2)
+    # centers on cell borders and corners as well as random points
+    centers = [(4.0, 0.0), (-8.0, 8.0), (0.0, 0.0)] + [(rng.uniform(-35, 35), rng.uniform(-35, 35)) for _ in range(200)]
+    for x, z in centers:
+        for radius in (0.5, 3.0, 4.0, 9.5):
+            assert set(grid.query_radius(x, z, radius)) == brute_radius(things, x, z, radius)
+
+
+def test_aabb_query_matches_brute_force():
+    things = scattered(3)
+    grid = SpatialHash(cell_size=4.0)
+    for thing in things:
+        grid.insert(thing)
+    found = set(grid.query_aabb(-6.0, -2.5, 7.9, 12.0))
+    assert found == {t for t in things if -6.0 <= t.position.x <= 7.9 and -2.5 <= t.position.z <= 12.0}
+
+
+def test_nearest_matches_brute_force_with_predicate():
+    things = scattered(4)
+    grid = SpatialHash(cell_size=4.0)
+    for thing in things:
+        grid.insert(thing)
+    even = set(things[::2])
+    rng = random.Random(5)
+    for _ in range(200):
+        x, z = rng.uniform(-30, 30), rng.uniform(-30, 30)
+        candidates = [t for t in brute_radius(things, x, z, 3.0) if t in even]
+        best = grid.nearest(x, z, 3.0, predicate=lambda t: t in even)
+        if not candidates:
+            assert best is None
+        else:
+            nearest = min(math.hypot(t.position.x - x, t.position.z - z) for t in candidates)
+            assert math.hypot(best.position.x - x, best.position.z - z) == nearest
+
+
+def test_move_and_remove_keep_buckets_consistent():
+    things = scattered(6, count=200)
+    grid = SpatialHash(cell_size=4.0)
+    for thing in things:
+        grid.insert(thing)
+    rng = random.Random(7)
+    for thing in things[:100]:
+        thing.position.x += rng.uniform(-10, 10)      # many cross one or more cells
+        thing.position.z += rng.uniform(-10, 10)
+        grid.move(thing)
+    for thing in things[150:]:
+        grid.remove(thing)
+    kept = things[:150]
+
+    assert len(grid) == 150 and all(thing.spatial_index is grid for thing in kept)
+    assert all(thing.spatial_index is None for thing in things[150:])
+    for thing in kept:
+        key = grid.entity_cells[thing]
+        assert key == grid.cell_of(thing.position.x, thing.position.z)
+        assert thing in grid.cells[key]
+    assert sum(len(bucket) for bucket in grid.cells.values()) == 150
+    assert all(grid.cells.values())                 # no empty buckets left behind
+    for x, z in ((0.0, 0.0), (12.0, -4.0), (-20.0, 20.0)):
+        assert set(grid.query_radius(x, z, 8.0)) == brute_radius(kept, x, z, 8.0)
+
+
+def test_oversized_entities_are_tracked():
+    grid = SpatialHash(cell_size=4.0)
+    small, floor = Thing(0.0, 0.0), Thing(0.0, 0.0, size=100.0)
+    grid.insert(small)
+    grid.insert(floor)
+    assert grid.oversized == {floor}
+    # still found by center like any other entity
+    assert set(grid.query_radius(0.5, 0.5, 1.0)) == {small, floor}
+    grid.remove(floor)
+    assert grid.oversized == set()
+    grid.insert(floor)
+    grid.clear()
+    assert grid.oversized == set() and len(grid) == 0
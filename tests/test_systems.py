@@ -0,0 +1,105 @@
+import pytest
+from systems import RENDER, SIMULATION, ComponentStore, EntityList, Registry, System, SystemRunner
+
+
+class Thing:
+    def draw(self):
+        pass
+
+
+class Building(Thing):
+    building_type = 'barn'
+
+
+def test_store_swap_remove_keeps_dense_index():
+    store = ComponentStore('tag', 1)
+    for entity in range(5):
+        store.add(entity, f"v{entity}")
+    store.remove(1)                 # last entry (4) fills the hole
+    store.remove(9)                 # not present: ignored
+    assert store.entities == [0, 4, 2, 3]
+    assert store.values == ['v0', 'v4', 'v2', 'v3']
+    assert all(store.entities[i] == e for e, i in store.dense_index.items())
+    store.add(2, 'new')             # re-adding replaces in place
+    assert len(store) == 4 and store.get(2) == 'new' and store.get(1) is None
+
+
+def test_destroy_entity_clears_masks_and_reuses_ids():
+    registry = Registry(capacity=2)
+    a, b, c = (registry.create_entity() for _ in range(3))     # grows past capacity
+    registry.add_component(a, 'position', (0, 0))
+    registry.add_component(a, 'tag', 'a')
+    registry.add_component(b, 'tag', 'b')
+    registry.destroy_entity(a)
+    assert registry.masks[a] == 0
+    assert a not in registry.component('position') and a not in registry.component('tag')
+    assert registry.create_entity() == a
+    assert registry.get(a, 'tag') is None
+    assert c == 2 and len(registry.masks) >= 3
+
+
+def test_query_uses_every_named_component():
+    registry = Registry()
+    for entity in range(6):
+        registry.create_entity()
+        registry.add_component(entity, 'tag', entity)
+        if entity % 2 == 0:
+            registry.add_component(entity, 'even', -entity)
+    registry.remove_component(4, 'tag')
+    assert sorted(registry.query('tag', 'even')) == [(0, 0, 0), (2, 2, -2)]
+    assert sorted(registry.query('even')) == [(0, 0), (2, -2), (4, -4)]
+    assert list(registry.query('tag', 'missing')) == []
+
+
+def test_at_most_64_component_types():
+    registry = Registry()
+    for n in range(64):
+        registry.component(f"c{n}")
+    assert registry.mask_of('c63') == 1 << 63
+    with pytest.raises(ValueError):
+        registry.component('one_too_many')
+    registry.component('c0')        # existing types still resolve
+
+
+def test_entity_list_keeps_slots_and_registry_in_sync():
+    registry = Registry()
+    things = [Thing() for _ in range(6)] + [Building()]
+    entities = EntityList(registry, things)
+    entities.remove(things[1])
+    entities.remove_many([things[2], things[2], things[4], Thing()])   # duplicates and strangers skipped
+    with pytest.raises(KeyError):
+        entities.remove(things[1])
+
+    kept = [things[0], things[3], things[5], things[6]]
+    assert sorted(map(id, entities)) == sorted(map(id, kept))
+    assert all(entities[index] is obj for obj, index in entities.slot.items())
+    assert len(entities.slot) == len(entities) == 4
+    assert set(registry.entity_of) == set(kept)
+    assert {id(obj) for _, obj in registry.query('drawable')} == set(map(id, kept))
+    assert [obj for _, obj in registry.query('building')] == [things[6]]
+    assert things[1] not in entities and things[0] in entities
+
+
+class Recorder(System):
+    def __init__(self, name, phase, log):
+        self.name, self.phase, self.log = name, phase, log
+
+    def update(self, state, delta_time):
+        self.log.append((self.name, delta_time))
+
+
+def test_runner_runs_one_phase_in_order_and_times_it():
+    log = []
+    runner = SystemRunner([Recorder('a', SIMULATION, log), Recorder('draw', RENDER, log),
+                           Recorder('b', SIMULATION, log)])
+    runner.run(SIMULATION, {}, 0.5)
+    runner.run(SIMULATION, {}, 0.25)
+    assert log == [('a', 0.5), ('b', 0.5), ('a', 0.25), ('b', 0.25)]
+    assert set(runner.timings) == {'a', 'b'}
+    assert runner.timings['a']['calls'] == 2
+    assert runner.timings['a']['total_ms'] >= runner.timings['a']['last_ms'] >= 0.0
+
+    runner.run(RENDER, {}, 0.0)
+    assert log[-1] == ('draw', 0.0) and runner.timings['draw']['calls'] == 1
+    runner.reset_timings()
+    assert runner.timings == {}
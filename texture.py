@@ -0,0 +1,332 @@
+import os
+import struct
+import numpy as np
+from OpenGL.GL import (
+    GL_COMPRESSED_RGB, GL_LINEAR, GL_LINEAR_MIPMAP_LINEAR, GL_NEAREST, GL_REPEAT, GL_RGB,
+    GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_TEXTURE_MAX_LEVEL, GL_TEXTURE_MIN_FILTER,
+    GL_TEXTURE_WRAP_S, GL_TEXTURE_WRAP_T, GL_UNPACK_ALIGNMENT, GL_UNSIGNED_BYTE, glBindTexture,
+    glDeleteTextures, glGenTextures, glPixelStorei, glTexImage2D, glTexParameteri
+)
+import events
+import jobs
+
+
+# --------------------
+# Mip chains (no GL calls, safe to run on worker threads)
+# --------------------
+def build_mipmaps(image_data):
+    """Full mip chain of an (H, W, C) uint8 image, down to 1x1.
+
+    Each level averages 2x2 blocks of the previous one; an odd last row or
+    column is folded into its neighbour so no pixels are dropped.
+    """
+    levels = [np.ascontiguousarray(image_data, dtype=np.uint8)]
+    level = levels[0].astype(np.float32)
+    while level.shape[0] > 1 or level.shape[1] > 1:
+        level = _halve(_halve(level, 0), 1)
+        levels.append(np.ascontiguousarray(np.rint(level).astype(np.uint8)))
+    return levels
+
+
+def _halve(level, axis):
+    size = level.shape[axis]
+    if size == 1:
+        return level
+    even = size - size % 2
+    a = level.take(range(0, even, 2), axis=axis)
+    b = level.take(range(1, even, 2), axis=axis)
+    half = (a + b) * 0.5
+    if size % 2:
+        # Blend the leftover row/column into the last output one
+        last = [slice(None)] * level.ndim
+        last[axis] = slice(-1, None)
+        tail = level[tuple(last)]
+        edge = [slice(None)] * level.ndim
+        edge[axis] = slice(-1, None)
+        half[tuple(edge)] = (half[tuple(edge)] * 2 + tail) / 3
+    return half
+
+
+def decode_image(path):
+    """Decode an image file to an RGB uint8 array."""
+    from PIL import Image
+    with Image.open(path) as image:
+        return np.array(image.convert('RGB'), dtype=np.uint8)
+
+
+# Disk cache: header, then every level's pixels back to back (level 0 first)
+CACHE_MAGIC = b'MIPS'
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct('<4sHHIII')    # magic, version, channels, width, height, levels
+
+
+class MipCache:
+    """Pre-mipped textures on disk, keyed by source path, size and mtime.
+
+    A hit reads one file with numpy and skips both PIL and mip generation.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, source):
+        import hashlib
+        stat = os.stat(source)
+        key = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}"
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.mip')
+
+    def load(self, source):
+        """Mip levels for source, or None when not cached (or stale/corrupt)."""
+        try:
+            path = self.path_for(source)
+            with open(path, 'rb') as f:
+                header = f.read(CACHE_HEADER.size)
+                if len(header) < CACHE_HEADER.size:
+                    return None
+                magic, version, channels, width, height, count = CACHE_HEADER.unpack(header)
+                if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                    return None
+                shapes = _mip_shapes(width, height, channels)[:count]
+                total = sum(h * w * c for h, w, c in shapes)
+                pixels = np.fromfile(f, dtype=np.uint8, count=total)
+        except OSError:
+            return None
+        if len(pixels) < total:
+            return None
+        levels, offset = [], 0
+        for shape in shapes:
+            size = shape[0] * shape[1] * shape[2]
+            levels.append(pixels[offset:offset + size].reshape(shape))
+            offset += size
+        return levels
+
+    def save(self, source, levels):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(source)
+        height, width, channels = levels[0].shape
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, channels, width, height, len(levels)))
+            for level in levels:
+                level.tofile(f)
+        os.replace(temporary, path)
+
+
+def _mip_shapes(width, height, channels):
+    shapes = [(height, width, channels)]
+    while height > 1 or width > 1:
+        height, width = max(1, height // 2), max(1, width // 2)
+        shapes.append((height, width, channels))
+    return shapes
+
+
+def load_mip_levels(path, cache=None):
+    """Mip chain for an image file, from the disk cache when possible.
+
+    Returns (levels, from_cache).
+    """
+    if cache is not None:
+        levels = cache.load(path)
+        if levels is not None:
+            return levels, True
+    levels = build_mipmaps(decode_image(path))
+    if cache is not None:
+        try:
+            cache.save(path, levels)
+        except OSError as error:
+            events.bus.log(f"Could not cache texture {path}: {error}", events.WARNING)
+    return levels, False
+
+
+# Neutral grey shown until a streamed texture is ready
+PLACEHOLDER = np.full((2, 2, 3), 128, dtype=np.uint8)
+
+
+class TextureManager:
+    """Shares GL textures between entities and streams their pixels in.
+
+    Textures are keyed by (path, wrap, min_filter, mag_filter) and reference
+    counted: every acquire() must be paired with a release(), and the GL
+    texture is deleted when its last owner releases it.
+
+    acquire() returns a texture id straight away. Given a JobSystem, the
+    texture starts out as a small placeholder while a job loads the mip
+    chain (from the disk cache, or by decoding and downsampling the image);
+    the job's completion, run on the main thread by the job system, uploads
+    it into the same texture id, so entities never see the swap. Releasing
+    the last texture of a path cancels its load. Without a job system
+    loading happens inside acquire().
+    """
+
+    def __init__(self, job_system=None, cache_dir=None, compress=True):
+        self.cache = MipCache(cache_dir) if cache_dir else None
+        self.compress = compress            # let the driver store textures compressed
+        self.job_system = job_system
+        self.loads = {}         # path -> Job loading its mip chain
+        self.levels = {}        # path -> mip chain, kept while a texture uses it
+        self.pending = {}       # path -> texture ids waiting for its pixels
+        self.textures = {}      # key -> [texture_id, ref_count]
+        self.keys_by_id = {}    # texture_id -> key
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.cache_loads = 0
+        self.uploads = 0
+
+    # --------------------
+    # Loading
+    # --------------------
+    def start_load(self, path):
+        if self.job_system is None:
+            self.finish_load(path, *load_mip_levels(path, self.cache))
+            return
+        # The job does file and numpy work only; GL waits for the completion
+        self.loads[path] = self.job_system.submit(load_mip_levels, path, self.cache, priority=jobs.NORMAL,
+                                                  on_complete=lambda job: self.finish_job(path, job))
+
+    def finish_job(self, path, job):
+        self.loads.pop(path, None)
+        if job.error is not None:
+            self.pending.pop(path, None)
+            events.bus.log(f"Texture {path} failed to load: {job.error}", events.WARNING)
+            return
+        self.finish_load(path, *job.value)
+
+    def finish_load(self, path, levels, from_cache):
+        texture_ids = self.pending.pop(path, [])
+        if from_cache:
+            self.cache_loads += 1
+        else:
+            self.decodes += 1
+        live = [texture_id for texture_id in texture_ids if texture_id in self.keys_by_id]
+        if not live:
+            return      # released before it arrived
+        self.levels[path] = levels
+        for texture_id in live:
+            key = self.keys_by_id[texture_id]
+            self.upload_levels(texture_id, levels, key[2])
+
+    def wait_idle(self):
+        """Block until every queued load is uploaded (startup, benchmarks)."""
+        while self.loads:
+            self.job_system.wait(list(self.loads.values()))
+
+    def shutdown(self):
+        for job in self.loads.values():
+            job.cancel()
+        self.loads = {}
+        self.pending = {}
+
+    # --------------------
+    # GL side (main thread)
+    # --------------------
+    def create(self, wrap, min_filter, mag_filter):
+        """A new GL texture showing the placeholder."""
+        texture_id = glGenTextures(1)
+        if not texture_id:
+            raise RuntimeError("glGenTextures failed (no GL context?)")
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, mag_filter)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, min_filter)
+        self.upload_levels(texture_id, [PLACEHOLDER], GL_LINEAR, compress=False)
+        return texture_id
+
+    def upload_levels(self, texture_id, levels, min_filter, compress=None):
+        """Replace a texture's pixels with a mip chain (level 0 only without mip filtering)."""
+        if compress is None:
+            compress = self.compress
+        if min_filter in (GL_NEAREST, GL_LINEAR):
+            levels = levels[:1]
+        internal_format = GL_COMPRESSED_RGB if compress else GL_RGB
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for i, level in enumerate(levels):
+            height, width = level.shape[:2]
+            glTexImage2D(GL_TEXTURE_2D, i, internal_format, width, height, 0,
+                         GL_RGB, GL_UNSIGNED_BYTE, level)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        self.uploads += 1
+
+    def acquire(self, path, wrap=GL_REPEAT, min_filter=GL_LINEAR_MIPMAP_LINEAR, mag_filter=GL_LINEAR):
+        """Return a texture id for path, adding one reference. None on failure."""
+        key = (path, wrap, min_filter, mag_filter)
+        entry = self.textures.get(key)
+        if entry is not None:
+            entry[1] += 1
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        if not os.path.exists(path):
+            return None
+        try:
+            texture_id = self.create(wrap, min_filter, mag_filter)
+        except Exception:
+            return None
+        self.textures[key] = [texture_id, 1]
+        self.keys_by_id[texture_id] = key
+
+        levels = self.levels.get(path)
+        if levels is not None:
+            self.upload_levels(texture_id, levels, min_filter)
+        elif path in self.pending:
+            self.pending[path].append(texture_id)
+        else:
+            self.pending[path] = [texture_id]
+            self.start_load(path)
+        return texture_id
+
+    def release(self, texture_id):
+        """Drop one reference; delete the texture when nobody uses it anymore."""
+        key = self.keys_by_id.get(texture_id)
+        if key is None:
+            return
+        entry = self.textures[key]
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+
+        del self.textures[key]
+        del self.keys_by_id[texture_id]
+        glDeleteTextures([texture_id])
+
+        # Forget the pixels once no texture is built from them
+        path = key[0]
+        if not any(k[0] == path for k in self.textures):
+            self.levels.pop(path, None)
+            job = self.loads.pop(path, None)
+            if job is not None:
+                job.cancel()
+                self.pending.pop(path, None)
+
+    def ref_count(self, texture_id):
+        key = self.keys_by_id.get(texture_id)
+        return self.textures[key][1] if key is not None else 0
+
+    def stats(self):
+        """Cache statistics for debugging and benchmarks."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'decodes': self.decodes,
+            'cache_loads': self.cache_loads,
+            'uploads': self.uploads,
+            'pending': len(self.pending),
+            'live_textures': len(self.textures),
+            'cached_images': len(self.levels),
+            'image_bytes': sum(sum(level.nbytes for level in levels) for levels in self.levels.values()),
+        }
+
+
+# Directory of pre-mipped texture files, relative to the working directory like the asset paths
+TEXTURE_CACHE_DIR = '.texture_cache'
+
+# Shared by every entity in the game
+texture_manager = TextureManager(jobs.job_system, cache_dir=TEXTURE_CACHE_DIR)
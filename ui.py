@@ -1,239 +1,186 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
+from hud import HudGeometry, HudLayer
 
 
-def render_text(text, x, y, font=GLUT_BITMAP_HELVETICA_12):
-    """Helper function to render text at specified position"""
-    glRasterPos2f(x, y)
-    for char in text:
-        glutBitmapCharacter(font, ord(char))
+# --------------------
+# HUD element base
+# --------------------
+class HudElement:
+    """A HUD widget split into static geometry and value-dependent geometry.
+
+    Subclasses fill build_static() (labels, backgrounds, borders) and
+    build_dynamic() (fill bars, value text). update() methods call
+    mark_dirty() only when the value actually changes, so the dynamic part
+    is rebuilt once per change instead of every frame.
+    """
+
+    def __init__(self):
+        self.dirty = True
+        self.dynamic_shapes = None
+        self.dynamic_text = None
+        self.layer = None   # private layer used when drawn on its own
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def build_static(self, geometry, atlas):
+        pass
+
+    def build_dynamic(self, geometry, atlas):
+        pass
+
+    def static_geometry(self, atlas):
+        geometry = HudGeometry()
+        self.build_static(geometry, atlas)
+        return geometry.arrays()
+
+    def rebuild_dynamic(self, atlas):
+        geometry = HudGeometry()
+        self.build_dynamic(geometry, atlas)
+        self.dynamic_shapes, self.dynamic_text = geometry.arrays()
+        self.dirty = False
+
+    def draw(self):
+        """Draw this element alone (a HudLayer draws many at once)."""
+        if self.layer is None:
+            self.layer = HudLayer([self])
+        self.layer.draw()
 
 
 # --------------------
 # Health Bar (HUD)
 # --------------------
-class HealthBar:
-    def __init__(self, max_val=100):
+class HealthBar(HudElement):
+    def __init__(self, max_val=100, x=20, y=560, width=200, height=20):
+        super().__init__()
         self.max_val = max_val
         self.curr_val = max_val
+        self.x, self.y, self.width, self.height = x, y, width, height
 
     def update(self, new_value):
-        self.curr_val = max(0, min(self.max_val, new_value))
-
-    def draw(self, x=20, y=560, width=200, height=20):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, 800, 0, 600)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
+        new_value = max(0, min(self.max_val, new_value))
+        if new_value != self.curr_val:
+            self.curr_val = new_value
+            self.mark_dirty()
 
+    def build_static(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Label
-        glColor3f(1.0, 1.0, 1.0)  # white text
-        render_text("Health", x, y + height + 5)
-
+        geometry.label(atlas, "Health", x, y + height + 5, (1.0, 1.0, 1.0))
         # Background bar (dark red)
-        glColor3f(0.2, 0.0, 0.0)
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
+        geometry.rect(x, y, width, height, (0.2, 0.0, 0.0))
         # Border
-        glColor3f(0.8, 0.8, 0.8)
-        glLineWidth(2)
-        glBegin(GL_LINE_LOOP)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
+        geometry.outline(x, y, width, height, (0.8, 0.8, 0.8), 2)
 
+    def build_dynamic(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Filled portion with gradient-like effect
         ratio = self.curr_val / self.max_val
         if ratio > 0.6:
-            glColor3f(0.0, 0.8, 0.0)  # green when healthy
+            color = (0.0, 0.8, 0.0)  # green when healthy
         elif ratio > 0.3:
-            glColor3f(1.0, 1.0, 0.0)  # yellow when moderate
+            color = (1.0, 1.0, 0.0)  # yellow when moderate
         else:
-            glColor3f(1.0, 0.0, 0.0)  # red when critical
-            
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width * ratio, y)
-        glVertex2f(x + width * ratio, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
+            color = (1.0, 0.0, 0.0)  # red when critical
+        geometry.rect(x, y, width * ratio, height, color)
 
         # Health value text
-        glColor3f(1.0, 1.0, 1.0)
         health_text = f"{int(self.curr_val)}/{int(self.max_val)}"
-        render_text(health_text, x + width//2 - 20, y + height//2 - 3)
-
-        # Restore matrices
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
+        geometry.label(atlas, health_text, x + width//2 - 20, y + height//2 - 3, (1.0, 1.0, 1.0))
 
 
 # --------------------
 # Energy Bar (HUD)
 # --------------------
-class EnergyBar:
-    def __init__(self, max_val=100):
+class EnergyBar(HudElement):
+    def __init__(self, max_val=100, x=20, y=530, width=200, height=20):
+        super().__init__()
         self.max_val = max_val
         self.curr_val = max_val
+        self.x, self.y, self.width, self.height = x, y, width, height
 
     def update(self, new_val):
-        self.curr_val = max(0, min(self.max_val, new_val))
-
-    def draw(self, x=20, y=530, width=200, height=20):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, 800, 0, 600)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
+        new_val = max(0, min(self.max_val, new_val))
+        if new_val != self.curr_val:
+            self.curr_val = new_val
+            self.mark_dirty()
 
+    def build_static(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Label
-        glColor3f(1.0, 1.0, 1.0)  # white text
-        render_text("Energy", x, y + height + 5)
-
+        geometry.label(atlas, "Energy", x, y + height + 5, (1.0, 1.0, 1.0))
         # Background (dark blue)
-        glColor3f(0.0, 0.0, 0.3)
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
+        geometry.rect(x, y, width, height, (0.0, 0.0, 0.3))
         # Border
-        glColor3f(0.8, 0.8, 0.8)
-        glLineWidth(2)
-        glBegin(GL_LINE_LOOP)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
+        geometry.outline(x, y, width, height, (0.8, 0.8, 0.8), 2)
 
+    def build_dynamic(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Fill with energy-appropriate colors
         ratio = self.curr_val / self.max_val
         if ratio > 0.7:
-            glColor3f(0.0, 0.8, 1.0)  # bright cyan when full
+            color = (0.0, 0.8, 1.0)  # bright cyan when full
         elif ratio > 0.4:
-            glColor3f(0.5, 0.7, 1.0)  # light blue when moderate
+            color = (0.5, 0.7, 1.0)  # light blue when moderate
         else:
-            glColor3f(0.8, 0.4, 1.0)  # purple when low
-            
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width * ratio, y)
-        glVertex2f(x + width * ratio, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
+            color = (0.8, 0.4, 1.0)  # purple when low
+        geometry.rect(x, y, width * ratio, height, color)
 
         # Energy value text
-        glColor3f(1.0, 1.0, 1.0)
         energy_text = f"{int(self.curr_val)}/{int(self.max_val)}"
-        render_text(energy_text, x + width//2 - 20, y + height//2 - 3)
-
-        # Restore
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
+        geometry.label(atlas, energy_text, x + width//2 - 20, y + height//2 - 3, (1.0, 1.0, 1.0))
 
 
 # --------------------
 # House Icon
 # --------------------
-class HouseIcon:
+class HouseIcon(HudElement):
     def __init__(self, x=750, y=550, size=40):
+        super().__init__()
         self.x = x
         self.y = y
         self.size = size
 
-    def draw(self):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, 800, 0, 600)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-
+    def build_static(self, geometry, atlas):
         # Base (house body) - warmer brown
-        glColor3f(0.8, 0.5, 0.3)
-        glBegin(GL_QUADS)
-        glVertex2f(self.x, self.y)
-        glVertex2f(self.x + self.size, self.y)
-        glVertex2f(self.x + self.size, self.y + self.size)
-        glVertex2f(self.x, self.y + self.size)
-        glEnd()
+        geometry.rect(self.x, self.y, self.size, self.size, (0.8, 0.5, 0.3))
 
         # Door
-        glColor3f(0.4, 0.2, 0.1)
         door_width = self.size // 4
         door_height = self.size // 2
         door_x = self.x + self.size // 2 - door_width // 2
-        glBegin(GL_QUADS)
-        glVertex2f(door_x, self.y)
-        glVertex2f(door_x + door_width, self.y)
-        glVertex2f(door_x + door_width, self.y + door_height)
-        glVertex2f(door_x, self.y + door_height)
-        glEnd()
+        geometry.rect(door_x, self.y, door_width, door_height, (0.4, 0.2, 0.1))
 
         # Window
-        glColor3f(0.7, 0.9, 1.0)  # light blue
         window_size = self.size // 6
         window_x = self.x + self.size // 4
         window_y = self.y + self.size // 2
-        glBegin(GL_QUADS)
-        glVertex2f(window_x, window_y)
-        glVertex2f(window_x + window_size, window_y)
-        glVertex2f(window_x + window_size, window_y + window_size)
-        glVertex2f(window_x, window_y + window_size)
-        glEnd()
+        geometry.rect(window_x, window_y, window_size, window_size, (0.7, 0.9, 1.0))  # light blue
 
         # Roof (triangle) - darker red
-        glColor3f(0.7, 0.2, 0.2)
-        glBegin(GL_TRIANGLES)
-        glVertex2f(self.x - 5, self.y + self.size)
-        glVertex2f(self.x + self.size + 5, self.y + self.size)
-        glVertex2f(self.x + self.size / 2, self.y + self.size + 25)
-        glEnd()
+        geometry.triangle((self.x - 5, self.y + self.size),
+                          (self.x + self.size + 5, self.y + self.size),
+                          (self.x + self.size / 2, self.y + self.size + 25),
+                          (0.7, 0.2, 0.2))
 
         # Home label
-        glColor3f(1.0, 1.0, 1.0)
-        render_text("Home", self.x - 5, self.y - 15)
-
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
+        geometry.label(atlas, "Home", self.x - 5, self.y - 15, (1.0, 1.0, 1.0))
 
 
 # --------------------
 # Crop Growth Bar
 # --------------------
-class CropGrowthBar:
-    def __init__(self, max_stg=100):
+class CropGrowthBar(HudElement):
+    def __init__(self, max_stg=100, x=350, y=20, width=100, height=15):
+        super().__init__()
         self.max_stg = max_stg
         self.curr_stg = 0
+        self.x, self.y, self.width, self.height = x, y, width, height
 
     def update(self, stage):
-        self.curr_stg = max(0, min(self.max_stg, stage))
+        stage = max(0, min(self.max_stg, stage))
+        if stage != self.curr_stg:
+            self.curr_stg = stage
+            self.mark_dirty()
 
     def get_growth_stage_text(self):
         if self.curr_stg == 0:
@@ -249,172 +196,143 @@ class CropGrowthBar:
         else:
             return "Harvest Ready"
 
-    def draw(self, x=350, y=20, width=100, height=15):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, 800, 0, 600)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-
+    def build_static(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Label
-        glColor3f(1.0, 1.0, 1.0)
-        render_text("Crop Growth", x, y + height + 5)
-
+        geometry.label(atlas, "Crop Growth", x, y + height + 5, (1.0, 1.0, 1.0))
         # Background (dark green)
-        glColor3f(0.1, 0.2, 0.0)
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
+        geometry.rect(x, y, width, height, (0.1, 0.2, 0.0))
         # Border
-        glColor3f(0.8, 0.8, 0.8)
-        glLineWidth(1)
-        glBegin(GL_LINE_LOOP)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
+        geometry.outline(x, y, width, height, (0.8, 0.8, 0.8), 1)
 
+    def build_dynamic(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Growth progress with stage-appropriate colors
         ratio = self.curr_stg / self.max_stg
         if ratio == 0:
-            glColor3f(0.4, 0.2, 0.1)  # brown for seed
+            color = (0.4, 0.2, 0.1)  # brown for seed
         elif ratio < 0.25:
-            glColor3f(0.5, 0.8, 0.2)  # light green for sprout
+            color = (0.5, 0.8, 0.2)  # light green for sprout
         elif ratio < 0.75:
-            glColor3f(0.2, 0.8, 0.2)  # green for growing
+            color = (0.2, 0.8, 0.2)  # green for growing
         elif ratio < 1.0:
-            glColor3f(1.0, 1.0, 0.0)  # yellow for flowering/ripening
+            color = (1.0, 1.0, 0.0)  # yellow for flowering/ripening
         else:
-            glColor3f(1.0, 0.6, 0.0)  # orange for harvest ready
-            
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width * ratio, y)
-        glVertex2f(x + width * ratio, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
+            color = (1.0, 0.6, 0.0)  # orange for harvest ready
+        geometry.rect(x, y, width * ratio, height, color)
 
         # Growth percentage
-        glColor3f(1.0, 1.0, 1.0)
         percent_text = f"{int(self.curr_stg)}%"
-        render_text(percent_text, x + width//2 - 10, y + height//2 - 3)
+        geometry.label(atlas, percent_text, x + width//2 - 10, y + height//2 - 3, (1.0, 1.0, 1.0))
 
         # Stage text
-        stage_text = self.get_growth_stage_text()
-        render_text(stage_text, x, y - 15)
-
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
+        geometry.label(atlas, self.get_growth_stage_text(), x, y - 15, (1.0, 1.0, 1.0))
 
 
 # --------------------
 # Additional HUD Elements
 # --------------------
-class MoneyDisplay:
-    def __init__(self, amount=0):
+class MoneyDisplay(HudElement):
+    def __init__(self, amount=0, x=600, y=560, width=120, height=25):
+        super().__init__()
         self.amount = amount
+        self.x, self.y, self.width, self.height = x, y, width, height
 
     def update(self, new_amount):
-        self.amount = max(0, new_amount)
-
-    def draw(self, x=600, y=560, width=120, height=25):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, 800, 0, 600)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
+        new_amount = max(0, new_amount)
+        if new_amount != self.amount:
+            self.amount = new_amount
+            self.mark_dirty()
 
+    def build_static(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Background
-        glColor3f(0.0, 0.3, 0.0)
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
+        geometry.rect(x, y, width, height, (0.0, 0.3, 0.0))
         # Border
-        glColor3f(0.0, 0.8, 0.0)
-        glLineWidth(2)
-        glBegin(GL_LINE_LOOP)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
-        # Money text
-        glColor3f(1.0, 1.0, 0.0)  # gold color
-        money_text = f"${self.amount:,}"
-        render_text(money_text, x + 10, y + height//2 - 3)
-
+        geometry.outline(x, y, width, height, (0.0, 0.8, 0.0), 2)
         # Label
-        glColor3f(1.0, 1.0, 1.0)
-        render_text("Money", x + 10, y + height + 5)
+        geometry.label(atlas, "Money", x + 10, y + height + 5, (1.0, 1.0, 1.0))
 
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
+    def build_dynamic(self, geometry, atlas):
+        # Money text in gold
+        money_text = f"${self.amount:,}"
+        geometry.label(atlas, money_text, self.x + 10, self.y + self.height//2 - 3, (1.0, 1.0, 0.0))
 
 
-class TimeDisplay:
-    def __init__(self, day=1, hour=6):
+class TimeDisplay(HudElement):
+    def __init__(self, day=1, hour=6, x=300, y=560, width=120, height=25):
+        super().__init__()
         self.day = day
         self.hour = hour
+        self.x, self.y, self.width, self.height = x, y, width, height
 
     def update(self, day, hour):
-        self.day = day
-        self.hour = hour % 24
-
-    def draw(self, x=300, y=560, width=120, height=25):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, 800, 0, 600)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-
+        hour = hour % 24
+        if (day, hour) != (self.day, self.hour):
+            self.day = day
+            self.hour = hour
+            self.mark_dirty()
+
+    def build_static(self, geometry, atlas):
+        x, y, width, height = self.x, self.y, self.width, self.height
         # Background
-        glColor3f(0.1, 0.1, 0.3)
-        glBegin(GL_QUADS)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
+        geometry.rect(x, y, width, height, (0.1, 0.1, 0.3))
         # Border
-        glColor3f(0.7, 0.7, 1.0)
-        glLineWidth(2)
-        glBegin(GL_LINE_LOOP)
-        glVertex2f(x, y)
-        glVertex2f(x + width, y)
-        glVertex2f(x + width, y + height)
-        glVertex2f(x, y + height)
-        glEnd()
-
-        # Time text
-        glColor3f(1.0, 1.0, 1.0)
+        geometry.outline(x, y, width, height, (0.7, 0.7, 1.0), 2)
+
+    def build_dynamic(self, geometry, atlas):
         time_text = f"Day {self.day} - {self.hour:02d}:00"
-        render_text(time_text, x + 10, y + height//2 - 3)
+        geometry.label(atlas, time_text, self.x + 10, self.y + self.height//2 - 3, (1.0, 1.0, 1.0))
+
 
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
\ No newline at end of file
+# --------------------
+# Profiler overlay (toggled at runtime, see main.toggle_profiler_overlay)
+# --------------------
+class ProfilerOverlay(HudElement):
+    """FPS, frame-time percentiles, the costliest scopes and the frame counters.
+
+    The text is refreshed every `refresh_interval` frames rather than every
+    frame, so the overlay itself adds little to what it measures.
+    """
+
+    def __init__(self, profiler, top=5, x=20, y=250, width=340, line_height=16, refresh_interval=30):
+        super().__init__()
+        self.profiler = profiler
+        self.top = top
+        self.x, self.y, self.width = x, y, width
+        self.line_height = line_height
+        self.refresh_interval = refresh_interval
+        self.frames_since_refresh = refresh_interval
+        self.lines = []
+
+    @property
+    def height(self):
+        return (self.top + 4) * self.line_height + 8
+
+    def update(self):
+        self.frames_since_refresh += 1
+        if self.frames_since_refresh < self.refresh_interval:
+            return
+        self.frames_since_refresh = 0
+        summary = self.profiler.summary(self.top)
+        frame_ms = summary['frame_ms']
+        lines = [
+            f"FPS {summary['fps']:.1f}",
+            f"Frame p50 {frame_ms[50]:.2f}  p95 {frame_ms[95]:.2f}  p99 {frame_ms[99]:.2f} ms",
+        ]
+        lines += [f"  {name:<14} {ms:7.3f} ms" for name, ms in summary['top_scopes']]
+        counters = summary['counters']
+        if counters:
+            lines.append('  '.join(f"{name} {value:.0f}" for name, value in sorted(counters.items())))
+        if lines != self.lines:
+            self.lines = lines
+            self.mark_dirty()
+
+    def build_static(self, geometry, atlas):
+        # Translucent panel
+        geometry.rect(self.x - 6, self.y - 6, self.width, self.height, (0.0, 0.0, 0.0, 0.6))
+
+    def build_dynamic(self, geometry, atlas):
+        top = self.y - 6 + self.height - self.line_height
+        for i, line in enumerate(self.lines):
+            geometry.label(atlas, line, self.x, top - i * self.line_height, (1.0, 1.0, 0.6))
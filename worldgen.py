@@ -0,0 +1,225 @@
+import math
+import numpy as np
+import crop_field
+from chunks import ChunkData
+
+
+# Plot kinds
+CROPS = 0
+YARD = 1        # a farmhouse and a few props
+MEADOW = 2      # props only
+
+WALL_TEXTURE = "assets/wall.jpg"
+ROOF_TEXTURE = "assets/roof.png"
+
+# Salts keeping the hashed streams of one plot independent
+_KIND, _SPACING, _THRESHOLD, _AGE, _JITTER_X, _JITTER_Z, _CROP_THRESHOLD, _SIZE, _PROPS, _PROP_X, _PROP_Z = range(11)
+
+
+# --------------------
+# Counter-based randomness: values are pure functions of integer coordinates
+# --------------------
+def _mix(h):
+    # splitmix64 finalizer; uint64 arithmetic wraps
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return h ^ (h >> np.uint64(31))
+
+
+def _hash(seed, *keys):
+    h = np.full(1, seed, dtype=np.int64).astype(np.uint64)
+    for key in keys:
+        h = _mix(h ^ (np.asarray(key, dtype=np.int64).astype(np.uint64) + np.uint64(0x9e3779b97f4a7c15)))
+    return h
+
+
+def _unit(seed, *keys):
+    """Uniform floats in [0, 1), one per element of the (broadcast) keys."""
+    return (_hash(seed, *keys) >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+class FarmGenerator:
+    """Seeded procedural farm: square plots on a grid, separated by paths.
+
+    The ground is cut into plots `plot_size` metres square with a path
+    `path_width` wide along their low X and Z edges. Each plot is, by
+    chance, a crop field (rows of crops `spacing` apart, jittered, with a
+    plot-wide planting age and growth speed), a yard (one farmhouse plus a
+    few props) or a meadow (props only). Props are small untextured
+    buildings.
+
+    Every value is hashed from (seed, plot, item) instead of drawn from a
+    running random stream, so generation is vectorized over whole areas
+    and any area - a chunk, a square around the origin - comes out the
+    same whichever order or size it is generated in. Nothing creates
+    Python objects: generate() returns ChunkData columns, which
+    add_to_field() writes into a CropField in bulk.
+    """
+
+    def __init__(self, seed=0, plot_size=24.0, path_width=3.0, spacing=(1.2, 2.0), thresholds=(5.0, 60.0),
+                 max_age=180.0, yard_chance=0.06, meadow_chance=0.1, props=(2, 8)):
+        self.seed = seed
+        self.plot_size = plot_size
+        self.path_width = path_width
+        self.spacing = spacing          # crop spacing range (per plot)
+        self.thresholds = thresholds    # seconds per stage range (per plot, +-20% per crop)
+        self.max_age = max_age          # plots were planted up to this many seconds ago
+        self.yard_chance = yard_chance
+        self.meadow_chance = meadow_chance
+        self.props = props              # props per yard/meadow plot, [min, max)
+
+    @property
+    def pitch(self):
+        return self.plot_size + self.path_width
+
+    def plots_in(self, x0, z0, x1, z1):
+        """(px, pz) grid coordinates of every plot overlapping the area."""
+        pitch = self.pitch
+        px = np.arange(math.floor(x0 / pitch), math.floor(x1 / pitch) + 1)
+        pz = np.arange(math.floor(z0 / pitch), math.floor(z1 / pitch) + 1)
+        grid_x, grid_z = np.meshgrid(px, pz, indexing='ij')
+        return grid_x.ravel(), grid_z.ravel()
+
+    def plot_kinds(self, px, pz):
+        u = _unit(self.seed, px, pz, _KIND)
+        return np.where(u < self.yard_chance, YARD, np.where(u < self.yard_chance + self.meadow_chance, MEADOW, CROPS))
+
+    def path_rects(self, x0, z0, x1, z1):
+        """(N, 4) rects (x0, z0, x1, z1) of the paths crossing the area."""
+        pitch, width = self.pitch, self.path_width
+        xs = np.arange(math.floor(x0 / pitch), math.floor(x1 / pitch) + 1) * pitch
+        zs = np.arange(math.floor(z0 / pitch), math.floor(z1 / pitch) + 1) * pitch
+        along_z = np.column_stack([xs, np.full(len(xs), z0), xs + width, np.full(len(xs), z1)])
+        along_x = np.column_stack([np.full(len(zs), x0), zs, np.full(len(zs), x1), zs + width])
+        rects = np.concatenate([along_z, along_x])
+        rects[:, 0] = np.maximum(rects[:, 0], x0)
+        rects[:, 1] = np.maximum(rects[:, 1], z0)
+        rects[:, 2] = np.minimum(rects[:, 2], x1)
+        rects[:, 3] = np.minimum(rects[:, 3], z1)
+        return rects[(rects[:, 0] < rects[:, 2]) & (rects[:, 1] < rects[:, 3])]
+
+    # --------------------
+    # Generation
+    # --------------------
+    def generate(self, x0, z0, x1, z1):
+        """ChunkData of everything whose position lies in [x0, x1) x [z0, z1)."""
+        px, pz = self.plots_in(x0, z0, x1, z1)
+        kinds = self.plot_kinds(px, pz)
+        crops = self.crops(px[kinds == CROPS], pz[kinds == CROPS])
+        buildings = self.buildings(px[kinds != CROPS], pz[kinds != CROPS], kinds[kinds != CROPS])
+
+        crop_x, crop_z = crops['crop_positions'][:, 0], crops['crop_positions'][:, 2]
+        inside = (crop_x >= x0) & (crop_x < x1) & (crop_z >= z0) & (crop_z < z1)
+        columns = {name: column[inside] for name, column in crops.items()}
+        building_x, building_z = buildings['building_positions'][:, 0], buildings['building_positions'][:, 2]
+        inside = (building_x >= x0) & (building_x < x1) & (building_z >= z0) & (building_z < z1)
+        columns.update({name: column[inside] for name, column in buildings.items()})
+        return ChunkData(**columns)
+
+    def crops(self, px, pz):
+        """Crop columns for whole crop plots."""
+        seed, size = self.seed, self.plot_size
+        low, high = self.spacing
+        spacing = low + (high - low) * _unit(seed, px, pz, _SPACING)
+        per_side = np.maximum(1, np.floor(size / spacing).astype(np.int64))
+        counts = per_side * per_side
+        total = int(counts.sum())
+
+        # One row per crop: its plot and its cell number inside the plot
+        plot = np.repeat(np.arange(len(px)), counts)
+        cell = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        row, col = np.divmod(cell, per_side[plot])
+        cpx, cpz, step = px[plot], pz[plot], spacing[plot]
+        jitter = 0.25 * step
+        x = (cpx * self.pitch + self.path_width + (col + 0.5) * step
+             + jitter * (_unit(seed, cpx, cpz, cell, _JITTER_X) - 0.5))
+        z = (cpz * self.pitch + self.path_width + (row + 0.5) * step
+             + jitter * (_unit(seed, cpx, cpz, cell, _JITTER_Z) - 0.5))
+
+        low, high = self.thresholds
+        plot_threshold = low + (high - low) * _unit(seed, px, pz, _THRESHOLD)
+        thresholds = plot_threshold[plot] * (0.8 + 0.4 * _unit(seed, cpx, cpz, cell, _CROP_THRESHOLD))
+        thresholds = thresholds.astype(np.float32)
+        elapsed = np.floor(self.max_age * _unit(seed, px, pz, _AGE))[plot]
+        # Growth so far, as a field stepped finely since planting would have it
+        checks = (np.floor(elapsed) // thresholds).astype(np.int64)
+        stages = np.minimum(checks, crop_field.MAX_STAGE)
+        return {
+            'crop_positions': np.column_stack([x, np.full(total, -1.0), z]).astype(np.float32),
+            'crop_elapsed': elapsed,
+            'crop_last_stage_update': stages,
+            'crop_stages': stages.astype(np.int8),
+            'crop_thresholds': thresholds,
+        }
+
+    def buildings(self, px, pz, kinds):
+        """Building columns (farmhouses and props) for yard and meadow plots."""
+        seed, size, pitch = self.seed, self.plot_size, self.pitch
+        base_x = px * pitch + self.path_width
+        base_z = pz * pitch + self.path_width
+
+        # Farmhouses in the middle of yards
+        yard = kinds == YARD
+        house_size = 4.0 + 4.0 * _unit(seed, px[yard], pz[yard], _SIZE)
+        houses = np.column_stack([base_x[yard] + size / 2, np.zeros(yard.sum()), base_z[yard] + size / 2])
+        house_sizes = np.column_stack([house_size, house_size * 0.8, house_size])
+
+        # Props scattered over the plot, clear of the farmhouse
+        low, high = self.props
+        counts = low + np.floor((high - low) * _unit(seed, px, pz, _PROPS)).astype(np.int64)
+        plot = np.repeat(np.arange(len(px)), counts)
+        item = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        u = _unit(seed, px[plot], pz[plot], item, _PROP_X)
+        v = _unit(seed, px[plot], pz[plot], item, _PROP_Z)
+        in_yard = kinds[plot] == YARD
+        u = np.where(in_yard, np.where(u < 0.5, 0.05 + 0.3 * u, 0.65 + 0.3 * u), 0.05 + 0.9 * u)
+        props = np.column_stack([base_x[plot] + u * size, np.zeros(len(plot)), base_z[plot] + (0.05 + 0.9 * v) * size])
+        prop_sizes = np.ones((len(plot), 3))
+
+        return {
+            'building_positions': np.concatenate([houses, props]),
+            'building_sizes': np.concatenate([house_sizes, prop_sizes]),
+            'building_wall_textures': np.array([WALL_TEXTURE] * len(houses) + [''] * len(props), dtype=np.str_),
+            'building_roof_textures': np.array([ROOF_TEXTURE] * len(houses) + [''] * len(props), dtype=np.str_),
+        }
+
+    def chunk_generator(self, chunk_size):
+        """A ChunkManager generator: key -> the chunk's ChunkData."""
+        def generate_chunk(key):
+            x0, z0 = key[0] * chunk_size, key[1] * chunk_size
+            return self.generate(x0, z0, x0 + chunk_size, z0 + chunk_size)
+        return generate_chunk
+
+    def farm(self, crop_count):
+        """ChunkData of exactly `crop_count` crops: a square around the origin, grown until it holds enough.
+
+        Crops are kept in order of distance from the origin (the square's
+        rings), so smaller counts are the middle of larger ones.
+        """
+        crops_per_area = 1.0 / ((self.spacing[0] + self.spacing[1]) / 2) ** 2
+        half = max(self.pitch, 0.5 * math.sqrt(1.3 * crop_count / crops_per_area))
+        while True:
+            data = self.generate(-half, -half, half, half)
+            if data.crop_count >= crop_count:
+                break
+            half *= 1.25
+        ring = np.max(np.abs(data.crop_positions[:, [0, 2]]), axis=1)
+        keep = np.sort(np.argsort(ring, kind='stable')[:crop_count])
+        far = np.max(np.abs(data.building_positions[:, [0, 2]]), axis=1) if data.building_count else np.empty(0)
+        limit = ring[keep].max() if crop_count else 0.0
+        return data.take(keep, np.flatnonzero(far <= limit))
+
+
+def add_to_field(field, data):
+    """Plant every crop of a ChunkData in a CropField in bulk; returns their slots."""
+    indices = field.add_many(data.crop_positions, data.crop_thresholds)
+    field.set_state(indices, data.crop_elapsed, data.crop_last_stage_update, data.crop_stages)
+    return indices
+
+
+def generate_field(crop_count, seed=0, **options):
+    """A CropField holding a generated farm of `crop_count` crops, and the farm's ChunkData."""
+    data = FarmGenerator(seed, **options).farm(crop_count)
+    field = crop_field.CropField(capacity=max(1, crop_count))
+    add_to_field(field, data)
+    return field, data